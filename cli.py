@@ -4,24 +4,25 @@ Intent Distillation Tool CLI
 Knowledge distillation for intent classification training data generation
 Based on easy-dataset's distillation methodology
 """
+import asyncio
 import click
+from contextlib import nullcontext
+from itertools import islice
 import logging
-import json
+import threading
 from pathlib import Path
+from typing import TYPE_CHECKING
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
-from rich.tree import Tree
-from rich.table import Table
-
-from src.llm.client import LLMClient
-from src.distillers.intent_tag_distiller import IntentTagDistiller, IntentNode
-from src.distillers.intent_question_distiller import IntentQuestionDistiller
-from src.distillers.intent_conversation_distiller import IntentConversationDistiller
-from src.distillers.medical_intent_tagger import MedicalIntentTagger
-from src.distillers.medical_taxonomy_builder import MedicalTaxonomyBuilder
-from src.parsers.medical_dialog_parser import MedicalDialogParser
-from src.exporters.dataset_exporter import DatasetExporter
+
+# Distillers, the LLM client and most of rich are imported inside the commands
+# that use them, so `--help` and `export` don't pay for openai/httpx imports
 from src.utils.config_loader import load_config, validate_config
+from src.utils import json_utils
+
+if TYPE_CHECKING:
+    from rich.progress import Progress
+    from src.distillers.intent_tag_distiller import IntentNode
+    from src.llm.client import LLMClient
 
 console = Console()
 
@@ -41,8 +42,9 @@ def setup_logging(level: str = "INFO"):
 @click.group()
 @click.option("--config", "-c", default="config.yaml", help="Path to config file")
 @click.option("--log-level", default="INFO", help="Logging level")
+@click.option("--max-retries", type=int, help="Retries per LLM request on transient errors (default: 4)")
 @click.pass_context
-def cli(ctx, config, log_level):
+def cli(ctx, config, log_level, max_retries):
     """Intent Distillation Tool - Generate training data through knowledge distillation"""
     setup_logging(log_level)
 
@@ -55,6 +57,12 @@ def cli(ctx, config, log_level):
         console.print(f"[red]Error loading config: {e}[/red]")
         raise click.Abort()
 
+    # Resolve every model's client settings once; clients are built on first use
+    ctx.meta["llm_configs"] = {
+        name: {**llm_config, "max_retries": max_retries} if max_retries is not None else llm_config
+        for name, llm_config in cfg["llm"].items()
+    }
+
 
 @cli.command()
 @click.option("--parent", "-p", required=True, help="Parent intent name")
@@ -67,15 +75,10 @@ def cli(ctx, config, log_level):
 @click.pass_context
 def distill_tags(ctx, parent, count, intent_path, existing, output, language, model):
     """Generate intent taxonomy (sub-intents for a parent intent)"""
-    config = ctx.obj
-
-    # Initialize LLM client
-    llm_config = config["llm"].get(model)
-    if not llm_config:
-        console.print(f"[red]Model '{model}' not configured[/red]")
-        raise click.Abort()
+    from src.distillers.intent_tag_distiller import IntentTagDistiller, IntentNode
 
-    llm_client = LLMClient(llm_config)
+    # Initialize LLM client (one shared connection pool for all distillers)
+    llm_client = _get_llm_client(ctx, model)
 
     # Initialize distiller
     distiller = IntentTagDistiller(llm_client, language)
@@ -84,7 +87,7 @@ def distill_tags(ctx, parent, count, intent_path, existing, output, language, mo
     console.print(f"[dim]Generating {count} sub-intents...[/dim]\n")
 
     # Distill tags
-    with console.status("[bold green]Generating intent tags..."):
+    with _make_status("[bold green]Generating intent tags..."):
         try:
             # Create parent node
             parent_node = IntentNode(name=parent)
@@ -116,8 +119,8 @@ def distill_tags(ctx, parent, count, intent_path, existing, output, language, mo
                     for intent in sub_intents
                 ]
 
-                with open(output, "w") as f:
-                    json.dump(intent_data, f, indent=2, ensure_ascii=False)
+                with open(output, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+                    f.write(json_utils.dumps(intent_data, indent=True))
 
                 console.print(f"\n[green]Saved to {output}[/green]")
 
@@ -134,29 +137,36 @@ def distill_tags(ctx, parent, count, intent_path, existing, output, language, mo
 @click.option("--output", "-o", help="Output file path")
 @click.option("--language", "-l", default="en", help="Language (en/zh)")
 @click.option("--model", "-m", default="deepseek", help="Model to use")
+@click.option("--no-cache", is_flag=True, help="Disable the semantic response cache")
+@click.option("--cache-ttl-days", type=float, help="Semantic cache entry lifetime in days (default: cache.ttl_days)")
 @click.pass_context
-def distill_questions(ctx, intent, intent_path, count, existing, output, language, model):
+def distill_questions(ctx, intent, intent_path, count, existing, output, language, model, no_cache, cache_ttl_days):
     """Generate diverse questions for a specific intent"""
-    config = ctx.obj
+    from src.distillers.intent_tag_distiller import IntentNode
+    from src.distillers.intent_question_distiller import IntentQuestionDistiller
 
-    # Initialize LLM client
-    llm_config = config["llm"].get(model)
-    if not llm_config:
-        console.print(f"[red]Model '{model}' not configured[/red]")
-        raise click.Abort()
+    config = ctx.obj
 
-    llm_client = LLMClient(llm_config)
+    # Initialize LLM client (one shared connection pool for all distillers)
+    llm_client = _get_llm_client(ctx, model)
 
     # Load existing questions if provided
     existing_questions = None
     if existing and Path(existing).exists():
-        with open(existing, "r") as f:
-            data = json.load(f)
+        with open(existing, "rb") as f:
+            if existing.endswith(".jsonl"):
+                data = [json_utils.loads(line) for line in f if line.strip()]
+            else:
+                data = json_utils.loads(f.read())
             if isinstance(data, list):
-                existing_questions = [q if isinstance(q, str) else q.get("question", "") for q in data]
+                # Deduplicate once at load time (order kept for the prompt examples)
+                existing_questions = list(dict.fromkeys(
+                    q if isinstance(q, str) else q.get("question", "") for q in data
+                ))
 
     # Initialize distiller
-    distiller = IntentQuestionDistiller(llm_client, language)
+    cache = _build_semantic_cache(config, no_cache, cache_ttl_days)
+    distiller = IntentQuestionDistiller(llm_client, language, cache=cache)
 
     console.print(f"\n[cyan]Generating questions for intent:[/cyan] {intent}")
     console.print(f"[dim]Generating {count} diverse questions...[/dim]\n")
@@ -168,7 +178,7 @@ def distill_questions(ctx, intent, intent_path, count, existing, output, languag
         intent_node.path = intent_path
 
     # Distill questions
-    with console.status("[bold green]Generating questions..."):
+    with _make_status("[bold green]Generating questions..."):
         try:
             questions = distiller.distill_questions(
                 intent_node=intent_node,
@@ -186,9 +196,8 @@ def distill_questions(ctx, intent, intent_path, count, existing, output, languag
 
             # Save to file
             if output:
-                with open(output, "w") as f:
-                    for q in questions:
-                        f.write(json.dumps(q, ensure_ascii=False) + "\n")
+                with open(output, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+                    json_utils.write_jsonl(f, questions)
 
                 console.print(f"\n[green]Saved {len(questions)} questions to {output}[/green]")
             else:
@@ -209,18 +218,28 @@ def distill_questions(ctx, intent, intent_path, count, existing, output, languag
 @click.option("--language", "-l", default="en", help="Language (en/zh)")
 @click.option("--model", "-m", default="deepseek", help="Model to use")
 @click.option("--export-taxonomy", help="Export taxonomy tree to file")
+@click.option("--no-cache", is_flag=True, help="Disable the semantic response cache")
+@click.option("--cache-ttl-days", type=float, help="Semantic cache entry lifetime in days (default: cache.ttl_days)")
+@click.option("--batch-api", is_flag=True, help="Generate questions via the provider Batch API (cheaper, up to 24h latency)")
+@click.option("--batch-taxonomy", is_flag=True, help="Build the taxonomy via the provider Batch API, one job per level (cheaper, up to 24h per level)")
+@click.option("--intents-per-call", type=int, help="Intents sharing one question request (default: processing.intents_per_call)")
+@click.option("--parents-per-call", type=int, help="Parents sharing one tag request (default: processing.parents_per_call)")
 @click.pass_context
-def distill_auto(ctx, topic, levels, tags_per_level, questions_per_tag, leaf_only, output, language, model, export_taxonomy):
+def distill_auto(ctx, topic, levels, tags_per_level, questions_per_tag, leaf_only, output, language, model,
+                 export_taxonomy, no_cache, cache_ttl_days, batch_api, batch_taxonomy, intents_per_call, parents_per_call):
     """Fully automated intent distillation (taxonomy + questions)"""
-    config = ctx.obj
+    from rich.table import Table
+    from rich.tree import Tree
+    from src.distillers.intent_tag_distiller import IntentTagDistiller
+    from src.distillers.intent_question_distiller import IntentQuestionDistiller
 
-    # Initialize LLM client
-    llm_config = config["llm"].get(model)
-    if not llm_config:
-        console.print(f"[red]Model '{model}' not configured[/red]")
-        raise click.Abort()
+    config = ctx.obj
 
-    llm_client = LLMClient(llm_config)
+    # Initialize LLM client (one shared connection pool for all distillers)
+    llm_client = _get_llm_client(ctx, model)
+    max_concurrency = config.get("processing", {}).get("max_concurrency", 20)
+    intents_per_call = max(1, intents_per_call or config.get("processing", {}).get("intents_per_call", 1))
+    parents_per_call = parents_per_call or config.get("processing", {}).get("parents_per_call", 1)
 
     # Calculate expected counts
     total_tags = sum(tags_per_level ** i for i in range(1, levels + 1))
@@ -240,24 +259,33 @@ def distill_auto(ctx, topic, levels, tags_per_level, questions_per_tag, leaf_onl
         # Stage 1: Build taxonomy
         console.print("[bold]Stage 1/2: Building Intent Taxonomy[/bold]")
 
-        tag_distiller = IntentTagDistiller(llm_client, language)
+        tag_distiller = IntentTagDistiller(
+            llm_client, language, cache=_build_llm_cache(config, llm_client, no_cache, cache_ttl_days)
+        )
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console
-        ) as progress:
-            task = progress.add_task(f"Building {levels}-level taxonomy...", total=levels)
+        if batch_taxonomy:
+            with _make_status(f"[bold green]Waiting for {levels} taxonomy batch jobs (up to 24h each)..."):
+                root = tag_distiller.build_taxonomy(
+                    root_topic=topic,
+                    levels=levels,
+                    tags_per_level=tags_per_level,
+                    use_batch_api=True,
+                    poll_interval=config.get("processing", {}).get("batch_poll_interval", 60)
+                )
+        else:
+            with _make_progress() as progress:
+                task = progress.add_task(f"Building {levels}-level taxonomy...", total=total_tags)
 
-            root = tag_distiller.build_taxonomy(
-                root_topic=topic,
-                levels=levels,
-                tags_per_level=tags_per_level
-            )
+                root = _run_async(llm_client, tag_distiller.abuild_taxonomy(
+                    root_topic=topic,
+                    levels=levels,
+                    tags_per_level=tags_per_level,
+                    max_concurrency=max_concurrency,
+                    on_expand=lambda parent, children: progress.advance(task, len(children)),
+                    parents_per_call=parents_per_call
+                ))
 
-            progress.update(task, completed=levels)
+                progress.update(task, completed=total_tags)
 
         # Display taxonomy tree
         console.print("\n[green]✓ Taxonomy built successfully![/green]\n")
@@ -269,49 +297,60 @@ def distill_auto(ctx, topic, levels, tags_per_level, questions_per_tag, leaf_onl
         # Export taxonomy if requested
         if export_taxonomy:
             taxonomy_data = tag_distiller.export_tree(root)
-            with open(export_taxonomy, "w") as f:
-                json.dump(taxonomy_data, f, indent=2, ensure_ascii=False)
+            with open(export_taxonomy, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+                f.write(json_utils.dumps(taxonomy_data, indent=True))
             console.print(f"\n[dim]Taxonomy saved to {export_taxonomy}[/dim]")
 
         # Stage 2: Generate questions
         console.print(f"\n[bold]Stage 2/2: Generating Questions[/bold]")
 
-        question_distiller = IntentQuestionDistiller(llm_client, language)
+        cache = _build_semantic_cache(config, no_cache, cache_ttl_days)
+        question_distiller = IntentQuestionDistiller(llm_client, language, cache=cache)
 
         leaf_intents = tag_distiller.get_leaf_intents(root)
-        target_intents = leaf_intents if leaf_only else tag_distiller.export_flat_list(root)
+        target_intents = leaf_intents if leaf_only else tag_distiller.get_all_intents(root)
 
         console.print(f"Generating questions for {len(target_intents)} intents...\n")
 
-        all_questions = []
-
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console
-        ) as progress:
-            task = progress.add_task("Generating questions...", total=len(target_intents))
-
-            for intent_node in (leaf_intents if leaf_only else tag_distiller._get_all_intents(root)):
-                try:
-                    questions = question_distiller.distill_questions(
-                        intent_node=intent_node,
-                        count=questions_per_tag
+        question_count = 0
+
+        # Stream each intent's questions to disk as soon as they are generated
+        with open(output, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            def _write_questions(intent_node, questions):
+                nonlocal question_count
+                json_utils.write_jsonl(f, questions)
+                question_count += len(questions)
+
+            if batch_api:
+                poll_interval = config.get("processing", {}).get("batch_poll_interval", 60)
+                with _make_status("[bold green]Waiting for batch job (may take up to 24h)..."):
+                    results = question_distiller.distill_questions_batch(
+                        target_intents,
+                        questions_per_tag,
+                        poll_interval=poll_interval
                     )
-                    all_questions.extend(questions)
-                    progress.advance(task)
-                except Exception as e:
-                    console.print(f"[yellow]Warning: Failed for {intent_node.full_name}: {e}[/yellow]")
-                    progress.advance(task)
 
-        # Save results
-        console.print(f"\n[bold]Saving Results[/bold]")
+                for intent_node, result in zip(target_intents, results):
+                    if not isinstance(result, Exception):
+                        _write_questions(intent_node, result)
+            else:
+                with _make_progress() as progress:
+                    task = progress.add_task("Generating questions...", total=len(target_intents))
+
+                    results = _run_async(llm_client, question_distiller.adistill_questions_for_intents(
+                        target_intents,
+                        questions_per_tag,
+                        max_concurrency,
+                        intents_per_call=intents_per_call,
+                        on_done=lambda: progress.advance(task),
+                        on_result=_write_questions
+                    ))
 
-        with open(output, "w") as f:
-            for q in all_questions:
-                f.write(json.dumps(q, ensure_ascii=False) + "\n")
+        for intent_node, result in zip(target_intents, results):
+            if isinstance(result, Exception):
+                console.print(f"[yellow]Warning: Failed for {intent_node.full_name}: {result}[/yellow]")
+
+        console.print(f"\n[dim]Saved {question_count} questions to {output}[/dim]")
 
         # Display summary
         console.print("\n[green]✓ Distillation Complete![/green]\n")
@@ -322,7 +361,9 @@ def distill_auto(ctx, topic, levels, tags_per_level, questions_per_tag, leaf_onl
 
         summary_table.add_row("Total Intents", str(total_tags))
         summary_table.add_row("Leaf Intents", str(len(leaf_intents)))
-        summary_table.add_row("Questions Generated", str(len(all_questions)))
+        summary_table.add_row("Questions Generated", str(question_count))
+        if cache:
+            summary_table.add_row("Cache Hits", f"{cache.hits}/{cache.hits + cache.misses}")
         summary_table.add_row("Output File", output)
 
         console.print(summary_table)
@@ -349,20 +390,25 @@ def distill_auto(ctx, topic, levels, tags_per_level, questions_per_tag, leaf_onl
 @click.option("--model", "-m", default="deepseek", help="Model to use")
 @click.option("--export-taxonomy", help="Export taxonomy tree to file")
 @click.option("--scenario", help="Custom conversation scenario description")
+@click.option("--concurrency", type=int, help="Max conversations generated concurrently (default: processing.max_concurrency)")
+@click.option("--parents-per-call", type=int, help="Parents sharing one tag request (default: processing.parents_per_call)")
+@click.option("--no-cache", is_flag=True, help="Disable the response cache")
 @click.pass_context
 def distill_conversations(ctx, topic, levels, tags_per_level, conversations_per_tag,
                          turns_per_conversation, transition_rate, leaf_only, output,
-                         language, model, export_taxonomy, scenario):
+                         language, model, export_taxonomy, scenario, concurrency, parents_per_call, no_cache):
     """Generate multi-turn conversations with intent transitions"""
-    config = ctx.obj
+    from rich.table import Table
+    from rich.tree import Tree
+    from src.distillers.intent_tag_distiller import IntentTagDistiller
+    from src.distillers.intent_conversation_distiller import IntentConversationDistiller
 
-    # Initialize LLM client
-    llm_config = config["llm"].get(model)
-    if not llm_config:
-        console.print(f"[red]Model '{model}' not configured[/red]")
-        raise click.Abort()
+    config = ctx.obj
 
-    llm_client = LLMClient(llm_config)
+    # Initialize LLM client (one shared connection pool for all distillers)
+    llm_client = _get_llm_client(ctx, model)
+    max_concurrency = concurrency or config.get("processing", {}).get("max_concurrency", 20)
+    parents_per_call = parents_per_call or config.get("processing", {}).get("parents_per_call", 1)
 
     # Calculate expected counts
     total_tags = sum(tags_per_level ** i for i in range(1, levels + 1))
@@ -385,24 +431,21 @@ def distill_conversations(ctx, topic, levels, tags_per_level, conversations_per_
         # Stage 1: Build taxonomy
         console.print("[bold]Stage 1/2: Building Intent Taxonomy[/bold]")
 
-        tag_distiller = IntentTagDistiller(llm_client, language)
+        tag_distiller = IntentTagDistiller(llm_client, language, cache=_build_llm_cache(config, llm_client, no_cache))
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console
-        ) as progress:
-            task = progress.add_task(f"Building {levels}-level taxonomy...", total=levels)
+        with _make_progress() as progress:
+            task = progress.add_task(f"Building {levels}-level taxonomy...", total=total_tags)
 
-            root = tag_distiller.build_taxonomy(
+            root = _run_async(llm_client, tag_distiller.abuild_taxonomy(
                 root_topic=topic,
                 levels=levels,
-                tags_per_level=tags_per_level
-            )
+                tags_per_level=tags_per_level,
+                max_concurrency=max_concurrency,
+                on_expand=lambda parent, children: progress.advance(task, len(children)),
+                parents_per_call=parents_per_call
+            ))
 
-            progress.update(task, completed=levels)
+            progress.update(task, completed=total_tags)
 
         console.print("\n[green]✓ Taxonomy built successfully![/green]\n")
 
@@ -413,8 +456,8 @@ def distill_conversations(ctx, topic, levels, tags_per_level, conversations_per_
         # Export taxonomy if requested
         if export_taxonomy:
             taxonomy_data = tag_distiller.export_tree(root)
-            with open(export_taxonomy, "w") as f:
-                json.dump(taxonomy_data, f, indent=2, ensure_ascii=False)
+            with open(export_taxonomy, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+                f.write(json_utils.dumps(taxonomy_data, indent=True))
             console.print(f"\n[dim]Taxonomy saved to {export_taxonomy}[/dim]")
 
         # Stage 2: Generate conversations
@@ -422,21 +465,27 @@ def distill_conversations(ctx, topic, levels, tags_per_level, conversations_per_
 
         conversation_distiller = IntentConversationDistiller(llm_client, language)
 
-        all_conversations = conversation_distiller.distill_conversations_for_tree(
-            root_node=root,
-            conversations_per_intent=conversations_per_tag,
-            turns_per_conversation=turns_per_conversation,
-            transition_rate=transition_rate,
-            leaf_only=leaf_only,
-            scenario=scenario
-        )
+        conversation_count = 0
 
-        # Save results
-        console.print(f"\n[bold]Saving Results[/bold]")
+        # Stream each conversation to disk as soon as it is generated
+        with open(output, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            def _write_conversation(conv):
+                nonlocal conversation_count
+                f.write(json_utils.dumps(conv) + b"\n")
+                conversation_count += 1
+
+            _run_async(llm_client, conversation_distiller.adistill_conversations_for_tree(
+                root_node=root,
+                conversations_per_intent=conversations_per_tag,
+                turns_per_conversation=turns_per_conversation,
+                transition_rate=transition_rate,
+                leaf_only=leaf_only,
+                scenario=scenario,
+                max_concurrency=max_concurrency,
+                on_conversation=_write_conversation
+            ))
 
-        with open(output, "w") as f:
-            for conv in all_conversations:
-                f.write(json.dumps(conv, ensure_ascii=False) + "\n")
+        console.print(f"\n[dim]Saved {conversation_count} conversations to {output}[/dim]")
 
         # Display summary
         console.print("\n[green]✓ Conversation Distillation Complete![/green]\n")
@@ -447,7 +496,7 @@ def distill_conversations(ctx, topic, levels, tags_per_level, conversations_per_
 
         summary_table.add_row("Total Intents", str(total_tags))
         summary_table.add_row("Leaf Intents", str(leaf_tags))
-        summary_table.add_row("Conversations Generated", str(len(all_conversations)))
+        summary_table.add_row("Conversations Generated", str(conversation_count))
         summary_table.add_row("Avg Turns per Conversation", str(avg_turns_per_conv))
         summary_table.add_row("Output File", output)
 
@@ -468,18 +517,27 @@ def distill_conversations(ctx, topic, levels, tags_per_level, conversations_per_
 @click.option("--limit", "-n", type=int, help="Limit number of conversations to process")
 @click.option("--language", "-l", default="en", help="Language (en/zh)")
 @click.option("--model", "-m", default="deepseek", help="Model to use")
+@click.option("--concurrency", type=int, help="Max conversations tagged concurrently (default: processing.max_concurrency)")
+@click.option("--batch-api", is_flag=True, help="Tag conversations via the provider Batch API (cheaper, up to 24h latency)")
+@click.option("--local-threshold", type=float, help="Tag turns locally when this similar (0-1) to turns the LLM already tagged")
+@click.option("--taxonomy-top-k", type=int, help="Show the LLM only the K taxonomy leaves most relevant to each conversation")
+@click.option("--no-cache", is_flag=True, help="Disable the response caches")
 @click.pass_context
-def import_medical_dialogs(ctx, input, output, limit, language, model):
+def import_medical_dialogs(ctx, input, output, limit, language, model, concurrency, batch_api, local_threshold,
+                           taxonomy_top_k, no_cache):
     """Import real-world medical dialogs and generate intent tags"""
-    config = ctx.obj
+    from rich.table import Table
+    from rich.tree import Tree
+    from src.distillers.local_intent_classifier import LocalIntentClassifier
+    from src.distillers.medical_intent_tagger import MedicalIntentTagger
+    from src.distillers.medical_taxonomy_builder import MedicalTaxonomyBuilder
+    from src.parsers.medical_dialog_parser import MedicalDialogParser
 
-    # Initialize LLM client
-    llm_config = config["llm"].get(model)
-    if not llm_config:
-        console.print(f"[red]Model '{model}' not configured[/red]")
-        raise click.Abort()
+    config = ctx.obj
+    max_concurrency = concurrency or config.get("processing", {}).get("max_concurrency", 20)
 
-    llm_client = LLMClient(llm_config)
+    # Initialize LLM client (one shared connection pool for all distillers)
+    llm_client = _get_llm_client(ctx, model)
 
     console.print("\n[bold cyan]Medical Dialog Import & Intent Tagging[/bold cyan]")
     console.print(f"[dim]{'='*60}[/dim]")
@@ -493,11 +551,12 @@ def import_medical_dialogs(ctx, input, output, limit, language, model):
 
         parser = MedicalDialogParser()
 
-        with console.status("[bold green]Loading conversations..."):
-            conversations = parser.parse_csv(input)
-
+        with _make_status("[bold green]Loading conversations..."):
             if limit:
-                conversations = conversations[:limit]
+                # Stream the CSV so rows past the limit are never read
+                conversations = list(islice(parser.iter_csv(input), limit))
+            else:
+                conversations = parser.parse_csv(input)
 
             stats = parser.get_statistics(conversations)
 
@@ -510,9 +569,10 @@ def import_medical_dialogs(ctx, input, output, limit, language, model):
         # Stage 2: Build intent taxonomy
         console.print("[bold]Stage 2/3: Building Intent Taxonomy[/bold]")
 
-        taxonomy_builder = MedicalTaxonomyBuilder(llm_client, language)
+        llm_cache = _build_llm_cache(config, llm_client, no_cache)
+        taxonomy_builder = MedicalTaxonomyBuilder(llm_client, language, cache=llm_cache)
 
-        with console.status("[bold green]Analyzing conversations to build taxonomy..."):
+        with _make_status("[bold green]Analyzing conversations to build taxonomy..."):
             taxonomy_root = taxonomy_builder.build_taxonomy_from_conversations(
                 conversations,
                 sample_size=min(10, len(conversations))
@@ -530,34 +590,45 @@ def import_medical_dialogs(ctx, input, output, limit, language, model):
         # Stage 3: Generate intent tags
         console.print("[bold]Stage 3/3: Generating Intent Tags[/bold]")
 
-        tagger = MedicalIntentTagger(llm_client, language, taxonomy=taxonomy_root)
-
-        tagged_conversations = []
+        tagger = MedicalIntentTagger(
+            llm_client,
+            language,
+            taxonomy=taxonomy_root,
+            cache=llm_cache,
+            semantic_cache=_build_semantic_cache(config, no_cache),
+            local_classifier=LocalIntentClassifier(local_threshold) if local_threshold is not None else None,
+            taxonomy_top_k=taxonomy_top_k
+        )
 
-        with Progress(
-            SpinnerColumn(),
-            TextColumn("[progress.description]{task.description}"),
-            BarColumn(),
-            TaskProgressColumn(),
-            console=console
-        ) as progress:
+        with _make_progress() as progress:
             task = progress.add_task("Tagging conversations...", total=len(conversations))
 
-            for conv in conversations:
-                try:
-                    tagged = tagger.tag_conversation(conv)
-                    tagged_conversations.append(tagged)
-                    progress.advance(task)
-                except Exception as e:
-                    console.print(f"[yellow]Warning: Failed for conversation {conv.get('conversation_id')}: {e}[/yellow]")
-                    progress.advance(task)
+            on_progress = lambda done, total: progress.update(task, completed=done)
+
+            if batch_api:
+                tagged_conversations = tagger.tag_conversations_batch(
+                    conversations,
+                    progress_callback=on_progress,
+                    use_batch_api=True,
+                    poll_interval=config.get("processing", {}).get("batch_poll_interval", 60)
+                )
+            else:
+                # Async fan-out multiplexes all requests over the client's shared HTTP/2 pool
+                tagged_conversations = _run_async(llm_client, tagger.atag_conversations_batch(
+                    conversations,
+                    progress_callback=on_progress,
+                    max_concurrency=max_concurrency
+                ))
+
+        failed = sum(1 for conv in tagged_conversations if conv.get('tagging_error'))
+        if failed:
+            console.print(f"[yellow]Warning: Tagging failed for {failed} conversations[/yellow]")
 
         # Save results
         console.print(f"\n[bold]Saving Results[/bold]")
 
-        with open(output, "w") as f:
-            for conv in tagged_conversations:
-                f.write(json.dumps(conv, ensure_ascii=False) + "\n")
+        with open(output, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            json_utils.write_jsonl(f, tagged_conversations)
 
         # Display summary
         console.print("\n[green]✓ Intent Tagging Complete![/green]\n")
@@ -609,13 +680,27 @@ def import_medical_dialogs(ctx, input, output, limit, language, model):
 @click.option("--mode", help="Export mode for conversations (intent-classification/conversation)")
 def export(input, output, format, split, system_prompt, mode):
     """Export distillation results to SLM training format"""
+    from src.exporters.dataset_exporter import DatasetExporter
+
+
+    # JSONL -> JSONL split: copy byte ranges of the input instead of re-serializing
+    if split and input.endswith(".jsonl") and format == "jsonl":
+        train_output = output.replace(".", "_train.")
+        test_output = output.replace(".", "_test.")
+
+        train_count, test_count = DatasetExporter.split_jsonl_file(input, train_output, test_output, split)
+
+        console.print(f"Loaded {train_count + test_count} samples")
+        console.print(f"[green]Train set ({train_count} samples): {train_output}[/green]")
+        console.print(f"[green]Test set ({test_count} samples): {test_output}[/green]")
+        return
 
     # Load results
-    with open(input, "r") as f:
+    with open(input, "rb") as f:
         if input.endswith(".jsonl"):
-            results = [json.loads(line) for line in f]
+            results = [json_utils.loads(line) for line in f if line.strip()]
         else:
-            results = json.load(f)
+            results = json_utils.loads(f.read())
 
     console.print(f"Loaded {len(results)} samples")
 
@@ -640,7 +725,124 @@ def export(input, output, format, split, system_prompt, mode):
         console.print(f"[green]Exported {len(results)} samples to {output}[/green]")
 
 
-def _build_tree_display(tree, node: IntentNode, max_depth: int = 3, current_depth: int = 0):
+def _get_llm_client(ctx, model: str) -> "LLMClient":
+    """Get the LLM client for a model, creating it on first use
+
+    Clients are stored on the click context so every distiller in a command
+    shares one client and its HTTP connection pool. Misconfigured models
+    abort with a readable message before any work starts.
+    """
+    from src.llm.client import LLMClient
+
+    clients = ctx.meta.setdefault("llm_clients", {})
+    if model not in clients:
+        llm_config = ctx.meta["llm_configs"].get(model)
+        if not llm_config:
+            console.print(f"[red]Model '{model}' not configured[/red]")
+            raise click.Abort()
+
+        try:
+            llm_client = LLMClient(llm_config)
+        except ValueError as e:
+            console.print(f"[red]Model '{model}' is misconfigured: {e}[/red]")
+            raise click.Abort()
+
+        clients[model] = llm_client
+
+        # Open the connection while the command prints its banner/sets up
+        warm_up = threading.Thread(target=llm_client.ping, daemon=True)
+        warm_up.start()
+
+        def close():
+            # The warm-up request may still be using the sync pool (bounded by its timeout)
+            warm_up.join()
+            llm_client.close()
+
+        ctx.call_on_close(close)
+
+    return clients[model]
+
+
+def _run_async(llm_client: "LLMClient", coro):
+    """Run a coroutine to completion, closing the async connection pool before the loop exits
+
+    The async pool is separate from the sync one, so it gets its own warm-up
+    request alongside the coroutine's setup.
+    """
+    async def _main():
+        warm_up = asyncio.ensure_future(llm_client.aping())
+        try:
+            return await coro
+        finally:
+            warm_up.cancel()
+            await asyncio.gather(warm_up, return_exceptions=True)
+            await llm_client.aclose()
+
+    return asyncio.run(_main())
+
+
+def _build_semantic_cache(config, no_cache: bool = False, ttl_days: float = None):
+    """Create the semantic response cache from config, or None if disabled"""
+    from src.cache.semantic_cache import SemanticCache
+
+    cache_config = config.get("cache", {})
+    if no_cache or not cache_config.get("enabled", True):
+        return None
+
+    return SemanticCache(
+        path=str(Path(cache_config.get("dir", ".cache")) / "semantic_cache.db"),
+        ttl_days=ttl_days if ttl_days is not None else cache_config.get("ttl_days", 7),
+        similarity_threshold=cache_config.get("similarity_threshold", 0.95)
+    )
+
+
+def _build_llm_cache(config, llm_client: "LLMClient", no_cache: bool = False, ttl_days: float = None):
+    """Create the exact-match LLM response cache from config, or None if disabled
+
+    The cache only serves temperature 0 requests (sampled responses are not
+    reproducible), so it is not opened for a client sampling above 0.
+    """
+    from src.cache.llm_cache import LLMCache, SQLiteCacheBackend
+
+    cache_config = config.get("cache", {})
+    if no_cache or not cache_config.get("enabled", True):
+        return None
+
+    if llm_client.temperature != 0:
+        console.print(
+            f"[dim]Response cache off: it needs temperature 0 (model temperature is {llm_client.temperature})[/dim]"
+        )
+        return None
+
+    ttl_days = ttl_days if ttl_days is not None else cache_config.get("ttl_days", 7)
+    return LLMCache(
+        backend=SQLiteCacheBackend(str(Path(cache_config.get("dir", ".cache")) / "llm_cache.db")),
+        ttl=ttl_days * 86400
+    )
+
+
+def _make_progress() -> "Progress":
+    """Progress bar for long-running stages; live rendering is disabled when stdout is not a TTY"""
+    from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
+
+    return Progress(
+        SpinnerColumn(),
+        TextColumn("[progress.description]{task.description}"),
+        BarColumn(),
+        TaskProgressColumn(),
+        console=console,
+        disable=not console.is_terminal
+    )
+
+
+def _make_status(message: str):
+    """Spinner status context; a no-op when stdout is not a TTY"""
+    if not console.is_terminal:
+        return nullcontext()
+    return console.status(message)
+
+
+def _build_tree_display(tree, node: "IntentNode", max_depth: int = 3, current_depth: int = 0):
     """Helper to build Rich tree display"""
     if current_depth >= max_depth:
         if node.children:
@@ -0,0 +1,209 @@
+"""
+LLM Response Cache
+Two-tier cache for JSON responses: an exact SHA-256 tier for deterministic
+(temperature 0) requests and an optional prompt-similarity tier backed by
+SemanticCache
+"""
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional, Protocol, Tuple
+
+from ..utils import json_utils
+from .semantic_cache import SemanticCache
+
+logger = logging.getLogger(__name__)
+
+
+class CacheBackend(Protocol):
+    """Key/value store used by the exact tier of LLMCache"""
+
+    def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+
+class MemoryCacheBackend:
+    """In-process cache backend (lost when the process exits)"""
+
+    def __init__(self):
+        self._entries: Dict[str, Tuple[bytes, float]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.time() + ttl)
+
+
+class SQLiteCacheBackend:
+    """SQLite cache backend, persistent across runs"""
+
+    def __init__(self, path: str = ".cache/llm_cache.db"):
+        """
+        Initialize SQLite backend
+
+        Args:
+            path: SQLite database file
+        """
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Shared across worker threads and the event loop; guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS responses (
+                cache_key TEXT PRIMARY KEY,
+                value BLOB NOT NULL,
+                expires_at REAL NOT NULL
+            )
+            """
+        )
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+            self._conn.commit()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value FROM responses WHERE cache_key = ? AND expires_at >= ?",
+                (key, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, key: str, value: bytes, ttl: float) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (cache_key, value, expires_at) VALUES (?, ?, ?)",
+                (key, value, time.time() + ttl)
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+
+class LLMCache:
+    """Cache parsed JSON responses keyed on the full request"""
+
+    def __init__(
+        self,
+        backend: Optional[CacheBackend] = None,
+        semantic: Optional[SemanticCache] = None,
+        ttl: float = 86400
+    ):
+        """
+        Initialize LLM cache
+
+        Args:
+            backend: Exact-tier store (in-memory if not provided)
+            semantic: Optional similarity tier for near-identical prompts
+            ttl: Seconds an exact-tier entry stays valid
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.semantic = semantic
+        self.ttl = ttl
+        self.stats = {"hits": 0, "semantic_hits": 0, "misses": 0}
+
+    @staticmethod
+    def make_key(prompt: str, system_prompt: Optional[str], model: str, temperature: float) -> str:
+        """SHA-256 of everything that determines a response"""
+        payload = json_utils.dumps({
+            "prompt": prompt,
+            "system": system_prompt,
+            "model": model,
+            "temperature": temperature
+        })
+        return hashlib.sha256(payload).hexdigest()
+
+    def get(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        model: str,
+        temperature: float
+    ) -> Optional[Any]:
+        """
+        Look up a cached response
+
+        The exact tier only serves temperature 0 requests, where a repeated
+        request would return the same answer anyway; sampled requests can
+        still hit the semantic tier if one is configured.
+
+        Returns:
+            Cached parsed response, or None on miss
+        """
+        if temperature == 0:
+            value = self.backend.get(self.make_key(prompt, system_prompt, model, temperature))
+            if value is not None:
+                self.stats["hits"] += 1
+                return json_utils.loads(value)
+
+        if self.semantic is not None:
+            value = self.semantic.get((model, system_prompt), prompt)
+            if value is not None:
+                self.stats["semantic_hits"] += 1
+                return value
+
+        self.stats["misses"] += 1
+        return None
+
+    def set(
+        self,
+        prompt: str,
+        system_prompt: Optional[str],
+        model: str,
+        temperature: float,
+        response: Any
+    ) -> None:
+        """Store a parsed response in every applicable tier"""
+        if temperature == 0:
+            key = self.make_key(prompt, system_prompt, model, temperature)
+            self.backend.set(key, json_utils.dumps(response), self.ttl)
+
+        if self.semantic is not None:
+            self.semantic.put((model, system_prompt), prompt, response)
+
+    def get_response(self, llm_client: Any, prompt: str, system_prompt: Optional[str] = None) -> Optional[Any]:
+        """get() keyed on the client's model and temperature"""
+        return self.get(
+            prompt,
+            system_prompt,
+            getattr(llm_client, "model", ""),
+            getattr(llm_client, "temperature", None)
+        )
+
+    def set_response(
+        self,
+        llm_client: Any,
+        prompt: str,
+        system_prompt: Optional[str],
+        response: Any
+    ) -> None:
+        """set() keyed on the client's model and temperature"""
+        self.set(
+            prompt,
+            system_prompt,
+            getattr(llm_client, "model", ""),
+            getattr(llm_client, "temperature", None),
+            response
+        )
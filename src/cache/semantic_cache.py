@@ -0,0 +1,178 @@
+"""
+Semantic Cache
+SQLite-backed cache for LLM responses, matched on an exact key plus
+prompt similarity so near-identical prompts across runs reuse results
+"""
+import hashlib
+import logging
+import math
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, List, Optional, Sequence
+
+from ..utils import json_utils
+
+logger = logging.getLogger(__name__)
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def embed_text(text: str, dims: int = 256) -> List[float]:
+    """
+    Embed text as an L2-normalized hashed bag of words and character trigrams
+
+    A lightweight local stand-in for a sentence embedding model: prompts
+    that differ only in a few words land very close to each other, which is
+    all the cache needs. Works for both English and Chinese prompts.
+
+    Args:
+        text: Text to embed
+        dims: Embedding dimensionality
+
+    Returns:
+        Unit-length embedding vector
+    """
+    vector = [0.0] * dims
+    normalized = " ".join(text.lower().split())
+
+    features = _TOKEN_PATTERN.findall(normalized)
+    features.extend(normalized[i:i + 3] for i in range(len(normalized) - 2))
+
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        bucket = int.from_bytes(digest[:4], "little") % dims
+        sign = 1.0 if digest[4] & 1 else -1.0
+        vector[bucket] += sign
+
+    norm = math.sqrt(sum(v * v for v in vector))
+    if norm:
+        vector = [v / norm for v in vector]
+    return vector
+
+
+def cosine_similarity(a: Sequence[float], b: Sequence[float]) -> float:
+    """Cosine similarity of two unit-length vectors"""
+    return sum(x * y for x, y in zip(a, b))
+
+
+class SemanticCache:
+    """Cache LLM responses keyed on exact metadata plus prompt similarity"""
+
+    def __init__(
+        self,
+        path: str = ".cache/semantic_cache.db",
+        ttl_days: float = 7,
+        similarity_threshold: float = 0.95,
+        dims: int = 256
+    ):
+        """
+        Initialize semantic cache
+
+        Args:
+            path: SQLite database file
+            ttl_days: Entries older than this are ignored and purged
+            similarity_threshold: Minimum prompt cosine similarity for a hit
+            dims: Prompt embedding dimensionality
+        """
+        self.path = path
+        self.ttl_seconds = ttl_days * 86400
+        self.similarity_threshold = similarity_threshold
+        self.dims = dims
+        self.hits = 0
+        self.misses = 0
+
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+
+        # Shared across worker threads and the event loop; guarded by a lock
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                cache_key TEXT NOT NULL,
+                embedding BLOB NOT NULL,
+                value BLOB NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_entries_key ON entries (cache_key)")
+        self._purge_expired()
+
+        logger.info(f"Opened semantic cache at {path} (ttl={ttl_days}d, threshold={similarity_threshold})")
+
+    def get(self, key: Sequence[Any], text: str) -> Optional[Any]:
+        """
+        Look up a cached value
+
+        Args:
+            key: Exact-match key components (e.g. intent, count, language, model)
+            text: Prompt text compared by embedding similarity
+
+        Returns:
+            Cached value, or None on miss
+        """
+        query_vector = embed_text(text, self.dims)
+        cutoff = time.time() - self.ttl_seconds
+
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT embedding, value FROM entries WHERE cache_key = ? AND created_at >= ?",
+                (self._serialize_key(key), cutoff)
+            ).fetchall()
+
+        best_value, best_score = None, self.similarity_threshold
+        for blob, value in rows:
+            score = cosine_similarity(query_vector, array("f", blob))
+            if score >= best_score:
+                best_value, best_score = value, score
+
+        if best_value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        logger.debug(f"Semantic cache hit for {key} (similarity={best_score:.3f})")
+        return json_utils.loads(best_value)
+
+    def put(self, key: Sequence[Any], text: str, value: Any) -> None:
+        """
+        Store a value
+
+        Args:
+            key: Exact-match key components
+            text: Prompt text the value was generated from
+            value: JSON-serializable value
+        """
+        blob = array("f", embed_text(text, self.dims)).tobytes()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO entries (cache_key, embedding, value, created_at) VALUES (?, ?, ?, ?)",
+                (self._serialize_key(key), blob, json_utils.dumps(value), time.time())
+            )
+            self._conn.commit()
+
+    def close(self) -> None:
+        """Close the underlying database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def _purge_expired(self) -> None:
+        """Delete entries past the TTL"""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM entries WHERE created_at < ?",
+                (time.time() - self.ttl_seconds,)
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _serialize_key(key: Sequence[Any]) -> str:
+        """Join key components into a single lookup string"""
+        return "\x1f".join(str(part) for part in key)
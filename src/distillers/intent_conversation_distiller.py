@@ -2,15 +2,21 @@
 Intent Conversation Distiller
 Generates multi-turn conversations with intent transitions for training conversational AI
 """
+import asyncio
 import logging
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import random
-from typing import List, Dict, Any, Optional
-from datetime import datetime
+import uuid
+from typing import List, Dict, Any, Optional, Callable, Generator, Iterator, Tuple
+from datetime import datetime, timezone
 
 from src.llm.prompts.distill_conversations import (
     build_assistant_reply_prompt,
     build_next_question_prompt
 )
+from src.llm.schemas import ASSISTANT_REPLY_SCHEMA, NEXT_QUESTION_SCHEMA, validate_response
+from src.cache.llm_cache import LLMCache
+from src.utils import json_utils
 
 logger = logging.getLogger(__name__)
 
@@ -18,28 +24,49 @@ logger = logging.getLogger(__name__)
 class IntentConversationDistiller:
     """Generate multi-turn conversations with intent awareness"""
 
-    def __init__(self, llm_client, language: str = "en"):
+    # Default scenario descriptions
+    default_scenarios = {
+        "en": "A helpful customer support conversation where users seek assistance and the assistant provides professional guidance.",
+        "zh": "一个有帮助的客户支持对话，用户寻求帮助，助手提供专业指导。"
+    }
+
+    # Default role names
+    default_roles = {
+        "en": {"user": "User", "assistant": "Assistant"},
+        "zh": {"user": "用户", "assistant": "助手"}
+    }
+
+    # Opening question templates, filled with the intent name
+    initial_templates = {
+        "en": (
+            "How do I {name}?",
+            "Can you help me with {name}?",
+            "I need assistance with {name}",
+            "What's the process for {name}?"
+        ),
+        "zh": (
+            "如何{name}？",
+            "能帮我{name}吗？",
+            "我需要{name}方面的帮助",
+            "{name}的流程是什么？"
+        )
+    }
+
+    def __init__(self, llm_client, language: str = "en", cache: Optional[LLMCache] = None):
         """
         Initialize the conversation distiller
 
         Args:
             llm_client: LLM client for generating conversations
             language: Language for generation (en/zh)
+            cache: Optional response cache for the per-turn LLM calls
         """
         self.llm_client = llm_client
         self.language = language
+        self.cache = cache
 
-        # Default scenario descriptions
-        self.default_scenarios = {
-            "en": "A helpful customer support conversation where users seek assistance and the assistant provides professional guidance.",
-            "zh": "一个有帮助的客户支持对话，用户寻求帮助，助手提供专业指导。"
-        }
-
-        # Default role names
-        self.default_roles = {
-            "en": {"user": "User", "assistant": "Assistant"},
-            "zh": {"user": "用户", "assistant": "助手"}
-        }
+        # Related intents per node; the taxonomy is fixed while distilling
+        self._related_cache: Dict[Any, List] = {}
 
     def distill_conversation(
         self,
@@ -64,6 +91,66 @@ class IntentConversationDistiller:
         Returns:
             Dictionary containing the conversation data
         """
+        steps = self._conversation_steps(
+            intent_node, turns, transition_rate, scenario, role_user, role_assistant
+        )
+        request = next(steps)
+        while True:
+            kind, kwargs = request
+            if kind == "assistant_reply":
+                result = self._generate_assistant_reply(**kwargs)
+            else:
+                result = self._generate_next_question(**kwargs)
+            try:
+                request = steps.send(result)
+            except StopIteration as done:
+                return done.value
+
+    async def adistill_conversation(
+        self,
+        intent_node,
+        turns: int = 4,
+        transition_rate: float = 0.3,
+        scenario: Optional[str] = None,
+        role_user: Optional[str] = None,
+        role_assistant: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of distill_conversation()
+
+        Turns stay sequential within a conversation (each depends on the
+        previous one); concurrency comes from running many conversations at once.
+        """
+        steps = self._conversation_steps(
+            intent_node, turns, transition_rate, scenario, role_user, role_assistant
+        )
+        request = next(steps)
+        while True:
+            kind, kwargs = request
+            if kind == "assistant_reply":
+                result = await self._agenerate_assistant_reply(**kwargs)
+            else:
+                result = await self._agenerate_next_question(**kwargs)
+            try:
+                request = steps.send(result)
+            except StopIteration as done:
+                return done.value
+
+    def _conversation_steps(
+        self,
+        intent_node,
+        turns: int,
+        transition_rate: float,
+        scenario: Optional[str],
+        role_user: Optional[str],
+        role_assistant: Optional[str]
+    ) -> Generator[Tuple[str, Dict[str, Any]], Any, Dict[str, Any]]:
+        """
+        Conversation state machine shared by the sync and async drivers
+
+        Yields ("assistant_reply" | "next_question", kwargs) requests, receives
+        the generated result, and returns the finished conversation dict.
+        """
         # Set defaults
         scenario = scenario or self.default_scenarios[self.language]
         roles = self.default_roles[self.language]
@@ -72,6 +159,7 @@ class IntentConversationDistiller:
 
         # Get related intents (siblings or parent's other children)
         related_intents = self._get_related_intents(intent_node)
+        can_transition = bool(related_intents) and transition_rate > 0
 
         conversation = []
         current_intent = intent_node
@@ -89,36 +177,38 @@ class IntentConversationDistiller:
             "intent": intent_node.name,
             "turn": 1
         })
+        # Formatted history, extended as turns are added instead of rebuilt
+        history = self._format_turn(conversation[-1])
 
         # Generate conversation turns
         for turn_idx in range(1, turns + 1):
             # Generate assistant response
-            conversation_history = self._format_conversation_history(conversation)
-
-            assistant_reply = self._generate_assistant_reply(
+            assistant_reply = yield ("assistant_reply", dict(
                 scenario=scenario,
                 role_user=role_user,
                 role_assistant=role_assistant,
                 current_intent=current_intent.name,
                 intent_path=current_intent.path if hasattr(current_intent, 'path') else current_intent.name,
-                conversation_history=conversation_history,
+                conversation_history=history,
                 current_turn=turn_idx,
                 total_turns=turns
-            )
+            ))
 
             conversation.append({
                 "role": "assistant",
                 "content": assistant_reply,
                 "turn": turn_idx + 1
             })
+            history += "\n" + self._format_turn(conversation[-1])
 
             # Generate next user question (if not last turn)
             if turn_idx < turns:
                 # Decide if we should transition to a related intent
+                # Cheap checks first: no random draw when a transition is impossible
                 should_transition = (
-                    random.random() < transition_rate and
-                    related_intents and
-                    turn_idx > 1  # Don't transition too early
+                    can_transition and
+                    turn_idx > 1 and  # Don't transition too early
+                    random.random() < transition_rate
                 )
 
                 if should_transition:
@@ -129,18 +219,18 @@ class IntentConversationDistiller:
                         transition_points.append(len(conversation) + 1)
                     logger.info(f"Transitioning to related intent: {current_intent.name}")
 
-                next_question = self._generate_next_question(
+                next_question = yield ("next_question", dict(
                     scenario=scenario,
                     role_user=role_user,
                     role_assistant=role_assistant,
                     primary_intent=intent_node.name,
                     current_intent=current_intent,
                     related_intents=related_intents,
-                    conversation_history=self._format_conversation_history(conversation),
+                    conversation_history=history,
                     next_turn=len(conversation) + 1,
                     total_turns=turns * 2,
                     transition_rate=transition_rate
-                )
+                ))
 
                 conversation.append({
                     "role": "user",
@@ -148,9 +238,10 @@ class IntentConversationDistiller:
                     "intent": next_question["intent"],
                     "turn": len(conversation) + 1
                 })
+                history += "\n" + self._format_turn(conversation[-1])
 
         return {
-            "conversation_id": f"conv_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}_{random.randint(1000, 9999)}",
+            "conversation_id": f"conv_{uuid.uuid4().hex[:16]}",
             "primary_intent": intent_node.name,
             "primary_intent_number": intent_node.number if hasattr(intent_node, 'number') else None,
             "primary_intent_path": intent_node.path if hasattr(intent_node, 'path') else intent_node.name,
@@ -158,7 +249,7 @@ class IntentConversationDistiller:
             "turns": conversation,
             "num_turns": len(conversation),
             "transition_points": transition_points,
-            "timestamp": datetime.utcnow().isoformat() + "Z"
+            "timestamp": datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
         }
 
     def distill_conversations_for_tree(
@@ -168,11 +259,16 @@ class IntentConversationDistiller:
         turns_per_conversation: int = 4,
         transition_rate: float = 0.3,
         leaf_only: bool = True,
-        scenario: Optional[str] = None
+        scenario: Optional[str] = None,
+        max_concurrency: int = 8
     ) -> List[Dict[str, Any]]:
         """
         Generate conversations for all intents in a taxonomy tree
 
+        Conversations are generated concurrently on a thread pool; results
+        keep the tree order. Use iter_distill_conversations_for_tree() or
+        distill_to_jsonl() to avoid holding every conversation in memory.
+
         Args:
             root_node: Root IntentNode of the taxonomy
             conversations_per_intent: Number of conversations to generate per intent
@@ -180,62 +276,195 @@ class IntentConversationDistiller:
             transition_rate: Probability of intent transitions
             leaf_only: Only generate for leaf nodes
             scenario: Custom conversation scenario
+            max_concurrency: Maximum number of conversations in flight
 
         Returns:
             List of conversation dictionaries
         """
-        from src.distillers.intent_tag_distiller import IntentTagDistiller
+        results = dict(self._iter_conversation_results(
+            root_node, conversations_per_intent, turns_per_conversation,
+            transition_rate, leaf_only, scenario, max_concurrency
+        ))
+        all_conversations = [results[job_idx] for job_idx in sorted(results)]
+
+        logger.info(f"Total conversations generated: {len(all_conversations)}")
+        return all_conversations
+
+    def iter_distill_conversations_for_tree(
+        self,
+        root_node,
+        conversations_per_intent: int = 5,
+        turns_per_conversation: int = 4,
+        transition_rate: float = 0.3,
+        leaf_only: bool = True,
+        scenario: Optional[str] = None,
+        max_concurrency: int = 8
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Streaming variant of distill_conversations_for_tree()
+
+        Yields each conversation as soon as it completes (completion order),
+        so memory stays constant regardless of corpus size.
+        """
+        for _, conversation in self._iter_conversation_results(
+            root_node, conversations_per_intent, turns_per_conversation,
+            transition_rate, leaf_only, scenario, max_concurrency
+        ):
+            yield conversation
 
-        # Get target intents
-        tag_distiller = IntentTagDistiller(self.llm_client, self.language)
-        if leaf_only:
-            target_intents = tag_distiller.get_leaf_intents(root_node)
-        else:
-            target_intents = tag_distiller.export_flat_list(root_node)
+    def distill_to_jsonl(self, path: str, root_node, **kwargs) -> int:
+        """
+        Generate conversations for a tree and stream them to a JSONL file
 
-        all_conversations = []
+        Args:
+            path: Output JSONL file
+            root_node: Root IntentNode of the taxonomy
+            **kwargs: Arguments for iter_distill_conversations_for_tree()
+
+        Returns:
+            Number of conversations written
+        """
+        with open(path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            count = json_utils.write_jsonl(f, self.iter_distill_conversations_for_tree(root_node, **kwargs))
+
+        logger.info(f"Wrote {count} conversations to {path}")
+        return count
+
+    def _iter_conversation_results(
+        self,
+        root_node,
+        conversations_per_intent: int,
+        turns_per_conversation: int,
+        transition_rate: float,
+        leaf_only: bool,
+        scenario: Optional[str],
+        max_concurrency: int
+    ) -> Iterator[Tuple[int, Dict[str, Any]]]:
+        """Run conversation jobs on a thread pool, yielding (job index, conversation) as they finish"""
+        # Get target intents (single tree walk)
+        target_intents = self._get_target_intents(root_node, leaf_only)
 
         logger.info(f"Generating conversations for {len(target_intents)} intents")
 
-        for intent_node in target_intents:
-            for conv_idx in range(conversations_per_intent):
+        jobs = [
+            (intent_node, conv_idx)
+            for intent_node in target_intents
+            for conv_idx in range(conversations_per_intent)
+        ]
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            futures = {
+                executor.submit(
+                    self.distill_conversation,
+                    intent_node=intent_node,
+                    turns=turns_per_conversation,
+                    transition_rate=transition_rate,
+                    scenario=scenario
+                ): job_idx
+                for job_idx, (intent_node, _) in enumerate(jobs)
+            }
+
+            try:
+                for future in as_completed(futures):
+                    job_idx = futures[future]
+                    intent_node, conv_idx = jobs[job_idx]
+                    try:
+                        conversation = future.result()
+                    except Exception as e:
+                        logger.error(f"Failed to generate conversation for {intent_node.full_name}: {e}")
+                        continue
+
+                    logger.info(
+                        f"Generated conversation {conv_idx + 1}/{conversations_per_intent} "
+                        f"for {intent_node.full_name}"
+                    )
+                    yield job_idx, conversation
+            finally:
+                # Consumer stopped early: don't start the remaining jobs
+                for future in futures:
+                    future.cancel()
+
+    async def adistill_conversations_for_tree(
+        self,
+        root_node,
+        conversations_per_intent: int = 5,
+        turns_per_conversation: int = 4,
+        transition_rate: float = 0.3,
+        leaf_only: bool = True,
+        scenario: Optional[str] = None,
+        max_concurrency: int = 20,
+        on_conversation: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of distill_conversations_for_tree()
+
+        Conversations are generated concurrently (bounded by max_concurrency);
+        results are returned in (intent, conversation index) order. When
+        on_conversation is given, each conversation is handed to it as soon as
+        it completes instead of being collected in memory.
+
+        Args:
+            root_node: Root IntentNode of the taxonomy
+            conversations_per_intent: Number of conversations to generate per intent
+            turns_per_conversation: Number of turns per conversation
+            transition_rate: Probability of intent transitions
+            leaf_only: Only generate for leaf nodes
+            scenario: Custom conversation scenario
+            max_concurrency: Maximum number of conversations in flight
+            on_conversation: Optional callback receiving each finished conversation
+
+        Returns:
+            List of conversation dictionaries (empty when on_conversation is given)
+        """
+        # Get target intents (single tree walk)
+        target_intents = self._get_target_intents(root_node, leaf_only)
+
+        jobs = [
+            (intent_node, conv_idx)
+            for intent_node in target_intents
+            for conv_idx in range(conversations_per_intent)
+        ]
+        results: List[Optional[Dict[str, Any]]] = [None] * len(jobs)
+        sem = asyncio.Semaphore(max_concurrency)
+        generated = 0
+
+        logger.info(f"Generating {len(jobs)} conversations for {len(target_intents)} intents")
+
+        async def _run(job_idx: int):
+            nonlocal generated
+            intent_node, conv_idx = jobs[job_idx]
+            async with sem:
                 try:
-                    conversation = self.distill_conversation(
+                    conversation = await self.adistill_conversation(
                         intent_node=intent_node,
                         turns=turns_per_conversation,
                         transition_rate=transition_rate,
                         scenario=scenario
                     )
-                    all_conversations.append(conversation)
+                    generated += 1
+                    if on_conversation:
+                        on_conversation(conversation)
+                    else:
+                        results[job_idx] = conversation
                     logger.info(
                         f"Generated conversation {conv_idx + 1}/{conversations_per_intent} "
                         f"for {intent_node.full_name}"
                     )
                 except Exception as e:
                     logger.error(f"Failed to generate conversation for {intent_node.full_name}: {e}")
-                    continue
 
-        logger.info(f"Total conversations generated: {len(all_conversations)}")
+        for finished in asyncio.as_completed([_run(i) for i in range(len(jobs))]):
+            await finished
+
+        all_conversations = [conv for conv in results if conv is not None]
+        logger.info(f"Total conversations generated: {generated}")
         return all_conversations
 
     def _generate_initial_question(self, intent_node) -> str:
         """Generate the first user question about an intent"""
         # Simple template-based initial question
-        templates = {
-            "en": [
-                f"How do I {intent_node.name.lower()}?",
-                f"Can you help me with {intent_node.name.lower()}?",
-                f"I need assistance with {intent_node.name.lower()}",
-                f"What's the process for {intent_node.name.lower()}?"
-            ],
-            "zh": [
-                f"如何{intent_node.name}？",
-                f"能帮我{intent_node.name}吗？",
-                f"我需要{intent_node.name}方面的帮助",
-                f"{intent_node.name}的流程是什么？"
-            ]
-        }
-        return random.choice(templates[self.language])
+        name = intent_node.name.lower() if self.language == "en" else intent_node.name
+        return random.choice(self.initial_templates[self.language]).format(name=name)
 
     def _generate_assistant_reply(
         self,
@@ -262,11 +491,12 @@ class IntentConversationDistiller:
         )
 
         try:
-            response = self.llm_client.get_json_response(
-                prompt=prompt,
-                system_prompt="You are a helpful assistant generating natural conversation responses."
+            response = self._get_json_response(
+                prompt,
+                "You are a helpful assistant generating natural conversation responses.",
+                ASSISTANT_REPLY_SCHEMA
             )
-            return response.get("content", "I'm happy to help with that.")
+            return response["content"]
         except Exception as e:
             logger.error(f"Error generating assistant reply: {e}")
             return "I'm happy to help with that."
@@ -285,31 +515,65 @@ class IntentConversationDistiller:
         transition_rate: float
     ) -> Dict[str, str]:
         """Generate next user question using LLM"""
-        related_intent_names = [intent.name for intent in related_intents]
-        related_intents_str = ", ".join(related_intent_names) if related_intent_names else "None"
-
-        prompt = build_next_question_prompt(
+        prompt = self._build_next_question_prompt(
             scenario=scenario,
             role_user=role_user,
             role_assistant=role_assistant,
             primary_intent=primary_intent,
-            related_intents=related_intents_str,
-            intent_path=current_intent.path if hasattr(current_intent, 'path') else current_intent.name,
+            current_intent=current_intent,
+            related_intents=related_intents,
             conversation_history=conversation_history,
             next_turn=next_turn,
             total_turns=total_turns,
-            transition_rate=transition_rate,
-            language=self.language
+            transition_rate=transition_rate
         )
 
         try:
-            response = self.llm_client.get_json_response(
-                prompt=prompt,
-                system_prompt="You are generating natural follow-up questions in a conversation."
+            response = self._get_json_response(
+                prompt,
+                "You are generating natural follow-up questions in a conversation.",
+                NEXT_QUESTION_SCHEMA
+            )
+            return {
+                "content": response["question"],
+                "intent": response["intent"]
+            }
+        except Exception as e:
+            logger.error(f"Error generating next question: {e}")
+            return {
+                "content": "Can you tell me more about that?",
+                "intent": current_intent.name
+            }
+
+    async def _agenerate_assistant_reply(self, **kwargs) -> str:
+        """Async variant of _generate_assistant_reply()"""
+        prompt = build_assistant_reply_prompt(language=self.language, **kwargs)
+
+        try:
+            response = await self._aget_json_response(
+                prompt,
+                "You are a helpful assistant generating natural conversation responses.",
+                ASSISTANT_REPLY_SCHEMA
+            )
+            return response["content"]
+        except Exception as e:
+            logger.error(f"Error generating assistant reply: {e}")
+            return "I'm happy to help with that."
+
+    async def _agenerate_next_question(self, **kwargs) -> Dict[str, str]:
+        """Async variant of _generate_next_question()"""
+        current_intent = kwargs["current_intent"]
+        prompt = self._build_next_question_prompt(**kwargs)
+
+        try:
+            response = await self._aget_json_response(
+                prompt,
+                "You are generating natural follow-up questions in a conversation.",
+                NEXT_QUESTION_SCHEMA
             )
             return {
-                "content": response.get("question", "Can you tell me more about that?"),
-                "intent": response.get("intent", current_intent.name)
+                "content": response["question"],
+                "intent": response["intent"]
             }
         except Exception as e:
             logger.error(f"Error generating next question: {e}")
@@ -318,8 +582,95 @@ class IntentConversationDistiller:
                 "intent": current_intent.name
             }
 
+    def _get_json_response(self, prompt: str, system_prompt: str, schema: Dict[str, Any]) -> Any:
+        """get_json_response() validated against schema, through the response cache if any"""
+        cache_args = self._cache_args(prompt, system_prompt)
+        if cache_args:
+            cached = self.cache.get(*cache_args)
+            if cached is not None:
+                return cached
+
+        response = validate_response(
+            self.llm_client.get_json_response(prompt=prompt, system_prompt=system_prompt, schema=schema),
+            schema
+        )
+
+        if cache_args:
+            self.cache.set(*cache_args, response)
+        return response
+
+    async def _aget_json_response(self, prompt: str, system_prompt: str, schema: Dict[str, Any]) -> Any:
+        """Async variant of _get_json_response()"""
+        cache_args = self._cache_args(prompt, system_prompt)
+        if cache_args:
+            cached = self.cache.get(*cache_args)
+            if cached is not None:
+                return cached
+
+        response = validate_response(
+            await self.llm_client.aget_json_response(prompt=prompt, system_prompt=system_prompt, schema=schema),
+            schema
+        )
+
+        if cache_args:
+            self.cache.set(*cache_args, response)
+        return response
+
+    def _cache_args(self, prompt: str, system_prompt: str) -> Optional[tuple]:
+        """Request fields the response cache is keyed on (None without a cache)"""
+        if self.cache is None:
+            return None
+        return (
+            prompt,
+            system_prompt,
+            getattr(self.llm_client, "model", ""),
+            getattr(self.llm_client, "temperature", None)
+        )
+
+    def _build_next_question_prompt(
+        self,
+        scenario: str,
+        role_user: str,
+        role_assistant: str,
+        primary_intent: str,
+        current_intent,
+        related_intents: List,
+        conversation_history: str,
+        next_turn: int,
+        total_turns: int,
+        transition_rate: float
+    ) -> str:
+        """Build the next-question prompt for the current conversation state"""
+        related_intent_names = [intent.name for intent in related_intents]
+        related_intents_str = ", ".join(related_intent_names) if related_intent_names else "None"
+
+        return build_next_question_prompt(
+            scenario=scenario,
+            role_user=role_user,
+            role_assistant=role_assistant,
+            primary_intent=primary_intent,
+            related_intents=related_intents_str,
+            intent_path=current_intent.path if hasattr(current_intent, 'path') else current_intent.name,
+            conversation_history=conversation_history,
+            next_turn=next_turn,
+            total_turns=total_turns,
+            transition_rate=transition_rate,
+            language=self.language
+        )
+
+    def _get_target_intents(self, root_node, leaf_only: bool) -> List:
+        """Get the intent nodes to generate conversations for"""
+        return [
+            node for node, _ in root_node.walk()
+            if not leaf_only or not node.children
+        ]
+
     def _get_related_intents(self, intent_node) -> List:
         """Get related intents (siblings or nearby in taxonomy)"""
+        cached = self._related_cache.get(intent_node)
+        if cached is not None:
+            return cached
+
         related = []
 
         # Get siblings (same parent)
@@ -329,14 +680,11 @@ class IntentConversationDistiller:
                 if child != intent_node
             ])
 
-        return related[:5]  # Limit to 5 related intents
-
-    def _format_conversation_history(self, conversation: List[Dict]) -> str:
-        """Format conversation history for prompt"""
-        history_lines = []
-        for turn in conversation:
-            role = turn["role"].capitalize()
-            content = turn["content"]
-            history_lines.append(f"{role}: {content}")
+        related = related[:5]  # Limit to 5 related intents
+        self._related_cache[intent_node] = related
+        return related
 
-        return "\n".join(history_lines) if history_lines else "No previous conversation"
+    @staticmethod
+    def _format_turn(turn: Dict) -> str:
+        """Format a single turn as a history line"""
+        return f"{turn['role'].capitalize()}: {turn['content']}"
@@ -3,12 +3,19 @@ Intent Question Distiller
 Generates diverse questions for each intent through knowledge distillation
 Based on easy-dataset's question distillation workflow
 """
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
-from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Union
+from datetime import datetime, timezone
 
+from ..cache.semantic_cache import SemanticCache
+from ..llm.batch import build_batch_request, run_batch
 from ..llm.client import LLMClient
-from ..llm.prompts.distill_intent_questions import build_distill_intent_questions_prompt
+from ..llm.schemas import QUESTIONS_SCHEMA, grouped_questions_schema
+from ..llm.prompts.distill_intent_questions import (
+    build_distill_intent_questions_prompt,
+    build_distill_multi_intent_questions_prompt
+)
 from .intent_tag_distiller import IntentNode
 
 logger = logging.getLogger(__name__)
@@ -17,16 +24,26 @@ logger = logging.getLogger(__name__)
 class IntentQuestionDistiller:
     """Distill diverse questions for intent classification training"""
 
-    def __init__(self, llm_client: LLMClient, language: str = "en"):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        language: str = "en",
+        cache: Optional[SemanticCache] = None
+    ):
         """
         Initialize intent question distiller
 
         Args:
             llm_client: LLM client instance
             language: Language for prompts ('zh' or 'en')
+            cache: Optional semantic cache for LLM responses
         """
         self.llm_client = llm_client
         self.language = language
+        self.cache = cache
+
+        # Ancestor names per node; the taxonomy is fixed while distilling
+        self._hierarchy_cache: Dict[IntentNode, List[str]] = {}
 
     def distill_questions(
         self,
@@ -40,15 +57,246 @@ class IntentQuestionDistiller:
         Args:
             intent_node: Intent node to generate questions for
             count: Number of questions to generate
-            existing_questions: Existing questions to avoid duplicates
+            existing_questions: Existing questions; shown to the LLM and
+                filtered out of the result (case/whitespace-insensitive)
+
+        Returns:
+            List of question dictionaries with metadata
+        """
+        logger.info(f"Distilling {count} questions for intent: {intent_node.full_name}")
+
+        prompt = self._build_prompt(intent_node, count, existing_questions)
+
+        cached = self._cache_lookup(intent_node, count, existing_questions)
+        if cached is not None:
+            return self._exclude_existing(cached, existing_questions)
+
+        # Get LLM response
+        try:
+            response = self.llm_client.get_json_response(prompt, schema=QUESTIONS_SCHEMA)
+            questions = self._build_questions(intent_node, response)
+            self._cache_store(intent_node, count, response, existing_questions)
+            return self._exclude_existing(questions, existing_questions)
+
+        except Exception as e:
+            logger.error(f"Error distilling questions: {e}")
+            raise
+
+    async def adistill_questions(
+        self,
+        intent_node: IntentNode,
+        count: int,
+        existing_questions: Optional[List[str]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of distill_questions() for concurrent fan-out
+
+        Args:
+            intent_node: Intent node to generate questions for
+            count: Number of questions to generate
+            existing_questions: Existing questions; shown to the LLM and
+                filtered out of the result (case/whitespace-insensitive)
 
         Returns:
             List of question dictionaries with metadata
         """
         logger.info(f"Distilling {count} questions for intent: {intent_node.full_name}")
 
-        # Build prompt
-        prompt = build_distill_intent_questions_prompt(
+        prompt = self._build_prompt(intent_node, count, existing_questions)
+
+        cached = self._cache_lookup(intent_node, count, existing_questions)
+        if cached is not None:
+            return self._exclude_existing(cached, existing_questions)
+
+        try:
+            response = await self.llm_client.aget_json_response(prompt, schema=QUESTIONS_SCHEMA)
+            questions = self._build_questions(intent_node, response)
+            self._cache_store(intent_node, count, response, existing_questions)
+            return self._exclude_existing(questions, existing_questions)
+
+        except Exception as e:
+            logger.error(f"Error distilling questions: {e}")
+            raise
+
+    def distill_questions_grouped(
+        self,
+        intent_nodes: List[IntentNode],
+        count: int
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """
+        Distill questions for several intents with a single LLM request
+
+        Amortizes the prompt prelude and round trip across the group. Intents
+        missing from (or malformed in) the grouped answer fall back to
+        individual distill_questions() calls.
+
+        Args:
+            intent_nodes: Intents to generate questions for (typically siblings)
+            count: Number of questions per intent
+
+        Returns:
+            One entry per intent (in order): a list of question dictionaries
+            or the exception that prevented generating them
+        """
+        results, pending = self._grouped_cache_lookup(intent_nodes, count)
+
+        if len(pending) > 1:
+            group = [intent_nodes[i] for i in pending]
+            try:
+                response = self.llm_client.get_json_response(
+                    self._build_grouped_prompt(group, count),
+                    schema=grouped_questions_schema(len(group))
+                )
+            except Exception as e:
+                logger.warning(f"Grouped question request failed, falling back to per-intent requests: {e}")
+                response = None
+            self._apply_grouped_response(results, pending, intent_nodes, count, response)
+
+        for i, result in enumerate(results):
+            if result is None:
+                try:
+                    results[i] = self.distill_questions(intent_nodes[i], count)
+                except Exception as e:
+                    results[i] = e
+
+        return results
+
+    async def adistill_questions_grouped(
+        self,
+        intent_nodes: List[IntentNode],
+        count: int
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """Async variant of distill_questions_grouped()"""
+        results, pending = self._grouped_cache_lookup(intent_nodes, count)
+
+        if len(pending) > 1:
+            group = [intent_nodes[i] for i in pending]
+            try:
+                response = await self.llm_client.aget_json_response(
+                    self._build_grouped_prompt(group, count),
+                    schema=grouped_questions_schema(len(group))
+                )
+            except Exception as e:
+                logger.warning(f"Grouped question request failed, falling back to per-intent requests: {e}")
+                response = None
+            self._apply_grouped_response(results, pending, intent_nodes, count, response)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        fallback = await asyncio.gather(
+            *(self.adistill_questions(intent_nodes[i], count) for i in missing),
+            return_exceptions=True
+        )
+        for i, result in zip(missing, fallback):
+            results[i] = result
+
+        return results
+
+    def _grouped_cache_lookup(self, intent_nodes: List[IntentNode], count: int):
+        """Resolve cached intents of a group; returns (results, indices still pending)"""
+        results: List[Any] = [
+            self._cache_lookup(node, count)
+            for node in intent_nodes
+        ]
+        pending = [i for i, result in enumerate(results) if result is None]
+        return results, pending
+
+    def _build_grouped_prompt(self, intent_nodes: List[IntentNode], count: int) -> str:
+        """Build the multi-intent question distillation prompt"""
+        logger.info(f"Distilling {count} questions each for {len(intent_nodes)} intents in one request")
+        return build_distill_multi_intent_questions_prompt(
+            intents=[(node.name, node.numbered_path) for node in intent_nodes],
+            count=count,
+            language=self.language
+        )
+
+    def _apply_grouped_response(
+        self,
+        results: List[Any],
+        pending: List[int],
+        intent_nodes: List[IntentNode],
+        count: int,
+        response: Any
+    ):
+        """Fill results from a grouped response keyed intent_1..intent_N; bad buckets stay None"""
+        if not isinstance(response, dict):
+            return
+
+        for position, i in enumerate(pending, 1):
+            bucket = response.get(f"intent_{position}")
+            if not isinstance(bucket, list) or not bucket:
+                logger.warning(f"Grouped response missing questions for {intent_nodes[i].full_name}")
+                continue
+
+            node = intent_nodes[i]
+            results[i] = self._build_questions(node, bucket)
+            self._cache_store(node, count, bucket)
+
+    def distill_questions_batch(
+        self,
+        intent_nodes: List[IntentNode],
+        count: int,
+        poll_interval: float = 60
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """
+        Distill questions for many intents through the provider's Batch API
+
+        Trades latency (up to the 24h completion window) for half the token
+        price. Cached intents are answered locally and not submitted.
+
+        Args:
+            intent_nodes: Intents to generate questions for
+            count: Number of questions per intent
+            poll_interval: Initial seconds between batch status polls
+
+        Returns:
+            One entry per intent (in order): a list of question dictionaries
+            or the exception that prevented generating them
+        """
+        results: List[Any] = [None] * len(intent_nodes)
+        requests = []
+
+        for i, intent_node in enumerate(intent_nodes):
+            cached = self._cache_lookup(intent_node, count)
+            if cached is not None:
+                results[i] = cached
+                continue
+
+            prompt = self._build_prompt(intent_node, count)
+            custom_id = f"intent-{i}"
+            requests.append(build_batch_request(
+                self.llm_client,
+                custom_id,
+                self.llm_client._build_messages(prompt),
+                response_format=self.llm_client.json_response_format(QUESTIONS_SCHEMA)
+            ))
+
+        if requests:
+            logger.info(f"Submitting {len(requests)} question requests via Batch API")
+            responses = run_batch(self.llm_client, requests, poll_interval=poll_interval)
+
+            for custom_id, response_text in responses.items():
+                i = int(custom_id.split("-", 1)[1])
+                intent_node = intent_nodes[i]
+                try:
+                    if isinstance(response_text, Exception):
+                        raise response_text
+                    response = self.llm_client._parse_json_text(response_text)
+                    results[i] = self._build_questions(intent_node, response)
+                    self._cache_store(intent_node, count, response)
+                except Exception as e:
+                    logger.error(f"Failed to distill questions for {intent_node.full_name}: {e}")
+                    results[i] = e
+
+        return results
+
+    def _build_prompt(
+        self,
+        intent_node: IntentNode,
+        count: int,
+        existing_questions: Optional[List[str]] = None
+    ) -> str:
+        """Build the question distillation prompt for an intent"""
+        return build_distill_intent_questions_prompt(
             current_intent=intent_node.name,
             count=count,
             intent_path=intent_node.numbered_path,
@@ -56,61 +304,288 @@ class IntentQuestionDistiller:
             language=self.language
         )
 
-        # Get LLM response
-        try:
-            response = self.llm_client.get_json_response(prompt)
+    def _cache_key(self, intent_node: IntentNode, count: int) -> tuple:
+        """Exact-match part of the cache key for a question request"""
+        model = getattr(self.llm_client, "model", None)
+        # The full numbered path, so same-named intents in other taxonomies don't collide
+        return (intent_node.numbered_path, count, self.language, model)
 
-            # Parse questions
-            if isinstance(response, list):
-                question_texts = response
-            elif isinstance(response, dict) and "questions" in response:
-                question_texts = response["questions"]
-            else:
-                raise ValueError(f"Unexpected response format: {response}")
-
-            # Build question objects with metadata
-            questions = []
-            for i, question_text in enumerate(question_texts):
-                question_obj = {
-                    "question": question_text,
-                    "intent": intent_node.name,
-                    "intent_number": intent_node.number,
-                    "intent_full_name": intent_node.full_name,
-                    "intent_path": intent_node.path,
-                    "intent_numbered_path": intent_node.numbered_path,
-                    "intent_hierarchy": self._get_hierarchy(intent_node),
-                    "question_index": i + 1,
-                    "timestamp": datetime.utcnow().isoformat() + "Z"
-                }
-                questions.append(question_obj)
-
-            logger.info(f"Generated {len(questions)} questions for {intent_node.full_name}")
+    @staticmethod
+    def _cache_text(intent_node: IntentNode, existing_questions: Optional[List[str]]) -> str:
+        """
+        Text compared by similarity: the variable part of the prompt only
+
+        The fixed template text would otherwise dominate the embedding and
+        make prompts for unrelated intents look near-identical.
+        """
+        return "\n".join([intent_node.numbered_path, *sorted(existing_questions or ())])
+
+    def _cache_lookup(
+        self,
+        intent_node: IntentNode,
+        count: int,
+        existing_questions: Optional[List[str]] = None
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return questions built from a cached response, or None on miss"""
+        if self.cache is None:
+            return None
+
+        response = self.cache.get(
+            self._cache_key(intent_node, count),
+            self._cache_text(intent_node, existing_questions)
+        )
+        if response is None:
+            return None
+
+        logger.info(f"Using cached questions for intent: {intent_node.full_name}")
+        return self._build_questions(intent_node, response)
+
+    def _cache_store(
+        self,
+        intent_node: IntentNode,
+        count: int,
+        response: Any,
+        existing_questions: Optional[List[str]] = None
+    ):
+        """Store a raw LLM response in the cache"""
+        if self.cache is not None:
+            self.cache.put(
+                self._cache_key(intent_node, count),
+                self._cache_text(intent_node, existing_questions),
+                response
+            )
+
+    def _build_questions(self, intent_node: IntentNode, response: Any) -> List[Dict[str, Any]]:
+        """Parse LLM response into question objects with metadata"""
+        # Parse questions
+        if isinstance(response, list):
+            question_texts = response
+        elif isinstance(response, dict) and "questions" in response:
+            question_texts = response["questions"]
+        else:
+            raise ValueError(f"Unexpected response format: {response}")
+
+        # Intent metadata is the same for every question; compute it once
+        metadata = {
+            "intent": intent_node.name,
+            "intent_number": intent_node.number,
+            "intent_full_name": intent_node.full_name,
+            "intent_path": intent_node.path,
+            "intent_numbered_path": intent_node.numbered_path
+        }
+        hierarchy = self._get_hierarchy(intent_node)
+        timestamp = datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+        # Build question objects with metadata
+        questions = []
+        for i, question_text in enumerate(question_texts):
+            question_obj = {
+                "question": question_text,
+                **metadata,
+                "intent_hierarchy": list(hierarchy),
+                "question_index": i + 1,
+                "timestamp": timestamp
+            }
+            questions.append(question_obj)
+
+        logger.info(f"Generated {len(questions)} questions for {intent_node.full_name}")
+        return questions
+
+    @staticmethod
+    def normalize_question(question: str) -> str:
+        """Normalize question text for duplicate detection"""
+        return " ".join(question.lower().split())
+
+    def _exclude_existing(
+        self,
+        questions: List[Dict[str, Any]],
+        existing_questions: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        """Drop generated questions that duplicate existing ones (or each other)"""
+        if not existing_questions:
             return questions
 
-        except Exception as e:
-            logger.error(f"Error distilling questions: {e}")
-            raise
+        # Build the lookup set once; membership checks are then O(1) per question
+        seen = set(self.normalize_question(q) for q in existing_questions if q)
+
+        unique = []
+        for question in questions:
+            key = self.normalize_question(question["question"])
+            if key in seen:
+                continue
+            seen.add(key)
+            question["question_index"] = len(unique) + 1
+            unique.append(question)
+
+        if len(unique) < len(questions):
+            logger.info(f"Dropped {len(questions) - len(unique)} duplicate questions")
+        return unique
 
     def distill_questions_for_tree(
         self,
         root_node: IntentNode,
         questions_per_intent: int,
-        leaf_only: bool = True
+        leaf_only: bool = True,
+        max_concurrency: int = 8,
+        use_batch_api: bool = False
     ) -> List[Dict[str, Any]]:
         """
         Distill questions for all intents in a tree
 
+        Runs adistill_questions_for_tree() on a private event loop; results
+        keep the tree order.
+
         Args:
             root_node: Root of intent taxonomy tree
             questions_per_intent: Number of questions per intent
             leaf_only: Only generate questions for leaf intents
+            max_concurrency: Maximum number of concurrent LLM requests
+            use_batch_api: Submit all intents as one Batch API job instead
+                (half price, results within the batch completion window)
 
         Returns:
             List of all generated question dictionaries
         """
-        logger.info(f"Distilling questions for intent tree: {root_node.name}")
+        if use_batch_api:
+            target_intents = self._get_target_intents(root_node, leaf_only)
+            batch_results = self.distill_questions_batch(target_intents, questions_per_intent)
+            all_questions = [
+                q for questions in batch_results
+                if not isinstance(questions, Exception)
+                for q in questions
+            ]
+            logger.info(f"Total questions distilled: {len(all_questions)}")
+            return all_questions
+
+        async def _main():
+            try:
+                return await self.adistill_questions_for_tree(
+                    root_node, questions_per_intent, leaf_only, max_concurrency
+                )
+            finally:
+                # The async connection pool is bound to this event loop
+                await self.llm_client.aclose()
+
+        return asyncio.run(_main())
+
+    async def adistill_questions_for_tree(
+        self,
+        root_node: IntentNode,
+        questions_per_intent: int,
+        leaf_only: bool = True,
+        max_concurrency: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of distill_questions_for_tree()
+
+        Args:
+            root_node: Root of intent taxonomy tree
+            questions_per_intent: Number of questions per intent
+            leaf_only: Only generate questions for leaf intents
+            max_concurrency: Maximum number of in-flight LLM requests
+
+        Returns:
+            List of all generated question dictionaries
+        """
+        target_intents = self._get_target_intents(root_node, leaf_only)
+        results = await self.adistill_questions_for_intents(target_intents, questions_per_intent, max_concurrency)
 
         all_questions = []
+        for intent_node, result in zip(target_intents, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to distill questions for {intent_node.full_name}: {result}")
+                continue
+            all_questions.extend(result)
+
+        logger.info(f"Total questions distilled: {len(all_questions)}")
+        return all_questions
+
+    async def adistill_questions_for_intents(
+        self,
+        intent_nodes: List[IntentNode],
+        count: int,
+        max_concurrency: int = 20,
+        intents_per_call: int = 1,
+        on_result: Optional[Callable[[IntentNode, List[Dict[str, Any]]], None]] = None,
+        on_done: Optional[Callable[[], None]] = None
+    ) -> List[Union[List[Dict[str, Any]], Exception]]:
+        """
+        Distill questions for many intents concurrently on the event loop
+
+        Intents with byte-identical prompts share one request, and with
+        intents_per_call > 1 consecutive (sibling) intents share a grouped
+        request. At most max_concurrency requests are in flight.
+
+        Args:
+            intent_nodes: Intents to generate questions for
+            count: Number of questions per intent
+            max_concurrency: Maximum number of in-flight LLM requests
+            intents_per_call: Intents sharing one request
+            on_result: Called with (intent_node, questions) as soon as each
+                intent succeeds, e.g. to stream results to disk
+            on_done: Called once per intent when it finishes, failed or not
+
+        Returns:
+            One entry per intent (in order): a list of question dictionaries
+            or the exception that prevented generating them
+        """
+        folded = self._group_identical_prompts(intent_nodes, count)
+        calls = [folded[i:i + intents_per_call] for i in range(0, len(folded), intents_per_call)]
+        sem = asyncio.Semaphore(max_concurrency)
+        results: List[Any] = [None] * len(intent_nodes)
+
+        async def _run(call: List[List[int]]):
+            # Each distinct prompt is sent for its first intent
+            representatives = [intent_nodes[members[0]] for members in call]
+            try:
+                async with sem:
+                    if len(representatives) == 1:
+                        call_results = [await self.adistill_questions(representatives[0], count)]
+                    else:
+                        call_results = await self.adistill_questions_grouped(representatives, count)
+            except Exception as e:
+                call_results = [e] * len(call)
+
+            for members, result in zip(call, call_results):
+                for position, i in enumerate(members):
+                    if position and not isinstance(result, Exception):
+                        results[i] = self._replicate_questions(intent_nodes[i], result)
+                    else:
+                        results[i] = result
+                    if on_result and not isinstance(result, Exception):
+                        on_result(intent_nodes[i], results[i])
+                    if on_done:
+                        on_done()
+
+        await asyncio.gather(*(_run(call) for call in calls))
+        return results
+
+    def _group_identical_prompts(self, intent_nodes: List[IntentNode], count: int) -> List[List[int]]:
+        """
+        Group intents whose question prompts are byte-identical
+
+        Returns:
+            Lists of intent indices (in order), one list per distinct prompt
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, intent_node in enumerate(intent_nodes):
+            groups.setdefault(self._build_prompt(intent_node, count), []).append(i)
+
+        if len(groups) < len(intent_nodes):
+            logger.info(f"Folded {len(intent_nodes)} intents into {len(groups)} distinct prompts")
+        return list(groups.values())
+
+    def _replicate_questions(
+        self,
+        intent_node: IntentNode,
+        questions: List[Dict[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        """Re-stamp questions generated for an identical prompt with another intent's metadata"""
+        return self._build_questions(intent_node, [q["question"] for q in questions])
+
+    def _get_target_intents(self, root_node: IntentNode, leaf_only: bool) -> List[IntentNode]:
+        """Get the intents to distill and precompute their hierarchies"""
+        logger.info(f"Distilling questions for intent tree: {root_node.name}")
 
         if leaf_only:
             # Get leaf intents only
@@ -119,47 +594,34 @@ class IntentQuestionDistiller:
             # Get all intents
             target_intents = self._get_all_intents(root_node)
 
-        logger.info(f"Distilling questions for {len(target_intents)} intents")
+        self._index_hierarchies(root_node)
 
-        for intent_node in target_intents:
-            try:
-                questions = self.distill_questions(
-                    intent_node=intent_node,
-                    count=questions_per_intent,
-                    existing_questions=None  # Could implement global deduplication
-                )
-                all_questions.extend(questions)
-
-            except Exception as e:
-                logger.error(f"Failed to distill questions for {intent_node.full_name}: {e}")
-                continue
-
-        logger.info(f"Total questions distilled: {len(all_questions)}")
-        return all_questions
+        logger.info(f"Distilling questions for {len(target_intents)} intents")
+        return target_intents
 
     def _get_leaf_intents(self, node: IntentNode) -> List[IntentNode]:
         """Get all leaf intent nodes"""
-        if not node.children:
-            return [node]
-
-        leaves = []
-        for child in node.children:
-            leaves.extend(self._get_leaf_intents(child))
-
-        return leaves
+        return [n for n, _ in node.walk() if not n.children]
 
     def _get_all_intents(self, node: IntentNode) -> List[IntentNode]:
         """Get all intent nodes in tree"""
-        result = [node]
-        for child in node.children:
-            result.extend(self._get_all_intents(child))
-        return result
+        return [n for n, _ in node.walk()]
 
     def _get_hierarchy(self, node: IntentNode) -> List[str]:
         """Get list of parent intent names up to root"""
-        hierarchy = []
-        current = node
-        while current:
-            hierarchy.insert(0, current.name)
-            current = current.parent
+        hierarchy = self._hierarchy_cache.get(node)
+        if hierarchy is None:
+            hierarchy = [n.name for n in node.ancestry()]
+            self._hierarchy_cache[node] = hierarchy
         return hierarchy
+
+    def _index_hierarchies(self, root_node: IntentNode) -> None:
+        """Precompute hierarchies for a whole tree in a single walk"""
+        for node, _ in root_node.walk():
+            parent = node.parent
+            parent_hierarchy = self._hierarchy_cache.get(parent) if parent else None
+            if parent_hierarchy is not None:
+                # Extend the parent's results instead of walking up to the root
+                self._hierarchy_cache[node] = parent_hierarchy + [node.name]
+            else:
+                self._get_hierarchy(node)
@@ -3,44 +3,91 @@ Intent Tag Distiller
 Builds hierarchical intent taxonomies through iterative distillation
 Based on easy-dataset's tag distillation workflow
 """
+import asyncio
+import heapq
 import logging
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterator, List, Optional, Any, Tuple, Union
 
+from ..cache.llm_cache import LLMCache
+from ..llm.batch import build_batch_request, run_batch
 from ..llm.client import LLMClient
-from ..llm.prompts.distill_intent_tags import build_distill_intent_tags_prompt
+from ..llm.schemas import TAGS_SCHEMA, grouped_tags_schema
+from ..llm.prompts.distill_intent_tags import (
+    build_distill_intent_tags_prompt,
+    build_distill_multi_intent_tags_prompt
+)
 
 logger = logging.getLogger(__name__)
 
+# Larger groups make answers long enough that models start dropping parents
+MAX_PARENTS_PER_CALL = 8
+
 
 class IntentNode:
     """Represents a node in the intent taxonomy tree"""
 
+    __slots__ = ("name", "number", "parent", "depth", "children", "_full_name", "_path", "_numbered_path")
+
     def __init__(self, name: str, number: str = "", parent: Optional['IntentNode'] = None):
         self.name = name
         self.number = number  # e.g., "1.2.3"
         self.parent = parent
+        self.depth = parent.depth + 1 if parent else 0  # 0 for the root
         self.children: List['IntentNode'] = []
 
+        # Names and paths are fixed once the node is linked; build them from the parent's
+        self._full_name = f"{number} {name}" if number else name
+        if parent:
+            self._path = f"{parent._path} -> {name}"
+            self._numbered_path = f"{parent._numbered_path} -> {self._full_name}"
+        else:
+            self._path = name
+            self._numbered_path = self._full_name
+
     @property
     def full_name(self) -> str:
         """Get numbered name (e.g., '1.2 Password Reset')"""
-        if self.number:
-            return f"{self.number} {self.name}"
-        return self.name
+        return self._full_name
 
     @property
     def path(self) -> str:
         """Get full path (e.g., 'Support -> Account -> Password Reset')"""
-        if self.parent:
-            return f"{self.parent.path} -> {self.name}"
-        return self.name
+        return self._path
+
+    @path.setter
+    def path(self, value: str):
+        """Override the path of a detached node; children created afterwards extend it"""
+        self._path = value
 
     @property
     def numbered_path(self) -> str:
         """Get numbered path (e.g., 'Support -> 1 Account -> 1.2 Password Reset')"""
-        if self.parent:
-            return f"{self.parent.numbered_path} -> {self.full_name}"
-        return self.full_name
+        return self._numbered_path
+
+    def ancestry(self) -> List['IntentNode']:
+        """Get nodes from the root down to this node (inclusive)"""
+        nodes = []
+        current = self
+        while current:
+            nodes.append(current)
+            current = current.parent
+        nodes.reverse()
+        return nodes
+
+    def walk(self) -> Iterator[Tuple['IntentNode', int]]:
+        """
+        Iterate over this subtree in pre-order without recursion
+
+        Yields:
+            (node, depth) pairs, depth being relative to this node
+        """
+        stack = [(self, 0)]
+        while stack:
+            node, depth = stack.pop()
+            yield node, depth
+            for child in reversed(node.children):
+                stack.append((child, depth + 1))
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary representation"""
@@ -57,16 +104,27 @@ class IntentNode:
 class IntentTagDistiller:
     """Distill hierarchical intent taxonomies"""
 
-    def __init__(self, llm_client: LLMClient, language: str = "en"):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        language: str = "en",
+        max_concurrency: int = 20,
+        cache: Optional[LLMCache] = None
+    ):
         """
         Initialize intent tag distiller
 
         Args:
             llm_client: LLM client instance
             language: Language for prompts ('zh' or 'en')
+            max_concurrency: Default number of sibling expansions in flight
+            cache: Optional response cache (re-runs of the same taxonomy
+                config skip the LLM)
         """
         self.llm_client = llm_client
         self.language = language
+        self.max_concurrency = max_concurrency
+        self.cache = cache
         self.root: Optional[IntentNode] = None
 
     def distill_tags(
@@ -90,11 +148,258 @@ class IntentTagDistiller:
         """
         logger.info(f"Distilling {count} sub-intents for: {parent_intent}")
 
+        prompt = self._build_prompt(parent_intent, count, parent_node, existing_tags)
+
+        # Get LLM response
+        try:
+            response = self.cache.get_response(self.llm_client, prompt) if self.cache else None
+            if response is None:
+                response = self.llm_client.get_json_response(prompt, schema=TAGS_SCHEMA)
+                nodes = self._build_nodes(response, parent_node)
+                if self.cache:
+                    self.cache.set_response(self.llm_client, prompt, None, response)
+                return nodes
+            return self._build_nodes(response, parent_node)
+
+        except Exception as e:
+            logger.error(f"Error distilling intent tags: {e}")
+            raise
+
+    async def adistill_tags(
+        self,
+        parent_intent: str,
+        count: int,
+        parent_node: Optional[IntentNode] = None,
+        existing_tags: Optional[List[str]] = None
+    ) -> List[IntentNode]:
+        """Async variant of distill_tags() for concurrent sibling expansion"""
+        logger.info(f"Distilling {count} sub-intents for: {parent_intent}")
+
+        prompt = self._build_prompt(parent_intent, count, parent_node, existing_tags)
+
+        try:
+            response = self.cache.get_response(self.llm_client, prompt) if self.cache else None
+            if response is None:
+                response = await self.llm_client.aget_json_response(prompt, schema=TAGS_SCHEMA)
+                nodes = self._build_nodes(response, parent_node)
+                if self.cache:
+                    self.cache.set_response(self.llm_client, prompt, None, response)
+                return nodes
+            return self._build_nodes(response, parent_node)
+
+        except Exception as e:
+            logger.error(f"Error distilling intent tags: {e}")
+            raise
+
+    def distill_tags_grouped(
+        self,
+        parents: List[Tuple[IntentNode, int]]
+    ) -> List[Union[List[IntentNode], Exception]]:
+        """
+        Distill sub-intent tags for several parents with a single LLM request
+
+        Each parent's existing children are passed as tags to avoid. Parents
+        missing from (or malformed in) the grouped answer fall back to
+        individual distill_tags() calls.
+
+        Args:
+            parents: (parent node, number of sub-tags) pairs, typically the
+                consecutive parents of one taxonomy level
+
+        Returns:
+            One entry per parent (in order): the new child nodes or the
+            exception that prevented generating them
+        """
+        results, pending, prompts = self._grouped_cache_lookup(parents)
+
+        if len(pending) > 1:
+            group = [parents[i] for i in pending]
+            try:
+                response = self.llm_client.get_json_response(
+                    self._build_grouped_prompt(group),
+                    schema=grouped_tags_schema(len(group))
+                )
+            except Exception as e:
+                logger.warning(f"Grouped tag request failed, falling back to per-parent requests: {e}")
+                response = None
+            self._apply_grouped_response(results, pending, parents, prompts, response)
+
+        for i, result in enumerate(results):
+            if result is None:
+                parent_node, count = parents[i]
+                try:
+                    results[i] = self.distill_tags(
+                        parent_node.name, count, parent_node, self._existing_tags(parent_node)
+                    )
+                except Exception as e:
+                    results[i] = e
+
+        return results
+
+    async def adistill_tags_grouped(
+        self,
+        parents: List[Tuple[IntentNode, int]]
+    ) -> List[Union[List[IntentNode], Exception]]:
+        """Async variant of distill_tags_grouped()"""
+        results, pending, prompts = self._grouped_cache_lookup(parents)
+
+        if len(pending) > 1:
+            group = [parents[i] for i in pending]
+            try:
+                response = await self.llm_client.aget_json_response(
+                    self._build_grouped_prompt(group),
+                    schema=grouped_tags_schema(len(group))
+                )
+            except Exception as e:
+                logger.warning(f"Grouped tag request failed, falling back to per-parent requests: {e}")
+                response = None
+            self._apply_grouped_response(results, pending, parents, prompts, response)
+
+        missing = [i for i, result in enumerate(results) if result is None]
+        fallback = await asyncio.gather(
+            *(
+                self.adistill_tags(
+                    parents[i][0].name, parents[i][1], parents[i][0], self._existing_tags(parents[i][0])
+                )
+                for i in missing
+            ),
+            return_exceptions=True
+        )
+        for i, result in zip(missing, fallback):
+            results[i] = result
+
+        return results
+
+    def distill_tags_batch(
+        self,
+        parents: List[Tuple[IntentNode, int]],
+        poll_interval: float = 60
+    ) -> List[Union[List[IntentNode], Exception]]:
+        """
+        Distill sub-intent tags for many parents through the provider's Batch API
+
+        Trades latency (up to the 24h completion window) for half the token
+        price. Cached parents are answered locally and not submitted.
+
+        Args:
+            parents: (parent node, number of sub-tags) pairs
+            poll_interval: Initial seconds between batch status polls
+
+        Returns:
+            One entry per parent (in order): the new child nodes or the
+            exception that prevented generating them
+        """
+        results: List[Any] = [None] * len(parents)
+        prompts = {}
+        requests = []
+
+        for i, (parent_node, count) in enumerate(parents):
+            prompt = self._build_prompt(parent_node.name, count, parent_node, self._existing_tags(parent_node))
+            cached = self.cache.get_response(self.llm_client, prompt) if self.cache else None
+            if cached is not None:
+                results[i] = self._build_nodes(cached, parent_node)
+                continue
+
+            custom_id = f"parent-{i}"
+            prompts[custom_id] = prompt
+            requests.append(build_batch_request(
+                self.llm_client,
+                custom_id,
+                self.llm_client._build_messages(prompt),
+                response_format=self.llm_client.json_response_format(TAGS_SCHEMA)
+            ))
+
+        if requests:
+            logger.info(f"Submitting {len(requests)} tag requests via Batch API")
+            responses = run_batch(self.llm_client, requests, poll_interval=poll_interval)
+
+            for custom_id, response_text in responses.items():
+                i = int(custom_id.split("-", 1)[1])
+                parent_node = parents[i][0]
+                try:
+                    if isinstance(response_text, Exception):
+                        raise response_text
+                    response = self.llm_client._parse_json_text(response_text)
+                    results[i] = self._build_nodes(response, parent_node)
+                    if self.cache:
+                        self.cache.set_response(self.llm_client, prompts[custom_id], None, response)
+                except Exception as e:
+                    logger.error(f"Failed to distill tags for {parent_node.full_name}: {e}")
+                    results[i] = e
+
+        return results
+
+    def _existing_tags(self, parent_node: IntentNode) -> Optional[List[str]]:
+        """Names of a parent's current children, or None if it has none"""
+        return [child.name for child in parent_node.children] or None
+
+    def _grouped_cache_lookup(self, parents: List[Tuple[IntentNode, int]]):
+        """
+        Resolve cached parents of a group
+
+        Returns:
+            (results, indices still pending, per-parent prompts); the
+            single-parent prompts are the cache keys for grouped answers too
+        """
+        prompts = [
+            self._build_prompt(node.name, count, node, self._existing_tags(node))
+            for node, count in parents
+        ]
+        results: List[Any] = [None] * len(parents)
+        if self.cache:
+            for i, ((node, _), prompt) in enumerate(zip(parents, prompts)):
+                response = self.cache.get_response(self.llm_client, prompt)
+                if response is not None:
+                    results[i] = self._build_nodes(response, node)
+        pending = [i for i, result in enumerate(results) if result is None]
+        return results, pending, prompts
+
+    def _build_grouped_prompt(self, parents: List[Tuple[IntentNode, int]]) -> str:
+        """Build the multi-parent tag distillation prompt"""
+        logger.info(f"Distilling sub-intents for {len(parents)} parents in one request")
+        return build_distill_multi_intent_tags_prompt(
+            parents=[
+                (node.name, node.numbered_path, count, self._existing_tags(node))
+                for node, count in parents
+            ],
+            language=self.language
+        )
+
+    def _apply_grouped_response(
+        self,
+        results: List[Any],
+        pending: List[int],
+        parents: List[Tuple[IntentNode, int]],
+        prompts: List[str],
+        response: Any
+    ):
+        """Fill results from a grouped response keyed parent_1..parent_N; bad buckets stay None"""
+        if not isinstance(response, dict):
+            return
+
+        for position, i in enumerate(pending, 1):
+            node = parents[i][0]
+            bucket = response.get(f"parent_{position}")
+            if not isinstance(bucket, list) or not bucket or not all(isinstance(tag, str) for tag in bucket):
+                logger.warning(f"Grouped response missing tags for {node.full_name}")
+                continue
+
+            results[i] = self._build_nodes(bucket, node)
+            if self.cache:
+                self.cache.set_response(self.llm_client, prompts[i], None, bucket)
+
+    def _build_prompt(
+        self,
+        parent_intent: str,
+        count: int,
+        parent_node: Optional[IntentNode] = None,
+        existing_tags: Optional[List[str]] = None
+    ) -> str:
+        """Build the tag distillation prompt for a parent intent"""
         # Build intent path
         intent_path = parent_node.numbered_path if parent_node else parent_intent
 
-        # Build prompt
-        prompt = build_distill_intent_tags_prompt(
+        return build_distill_intent_tags_prompt(
             parent_intent=parent_intent,
             count=count,
             intent_path=intent_path,
@@ -102,56 +407,68 @@ class IntentTagDistiller:
             language=self.language
         )
 
-        # Get LLM response
-        try:
-            response = self.llm_client.get_json_response(prompt)
-
-            # Parse tags
-            if isinstance(response, list):
-                tag_names = response
-            elif isinstance(response, dict) and "tags" in response:
-                tag_names = response["tags"]
+    def _build_nodes(self, response: Any, parent_node: Optional[IntentNode]) -> List[IntentNode]:
+        """Parse LLM response into IntentNode objects attached to parent_node"""
+        # Parse tags
+        if isinstance(response, list):
+            tag_names = response
+        elif isinstance(response, dict) and "tags" in response:
+            tag_names = response["tags"]
+        else:
+            raise ValueError(f"Unexpected response format: {response}")
+
+        # Create IntentNode objects
+        nodes = []
+        for tag_name in tag_names:
+            # Extract number and name
+            parts = tag_name.strip().split(" ", 1)
+            if len(parts) == 2:
+                number, name = parts
             else:
-                raise ValueError(f"Unexpected response format: {response}")
-
-            # Create IntentNode objects
-            nodes = []
-            for tag_name in tag_names:
-                # Extract number and name
-                parts = tag_name.strip().split(" ", 1)
-                if len(parts) == 2:
-                    number, name = parts
-                else:
-                    number = ""
-                    name = tag_name.strip()
-
-                node = IntentNode(name=name, number=number, parent=parent_node)
-                if parent_node:
-                    parent_node.children.append(node)
-                nodes.append(node)
+                number = ""
+                name = tag_name.strip()
 
-            logger.info(f"Generated {len(nodes)} sub-intents: {[n.full_name for n in nodes]}")
-            return nodes
+            node = IntentNode(name=name, number=number, parent=parent_node)
+            if parent_node:
+                parent_node.children.append(node)
+            nodes.append(node)
 
-        except Exception as e:
-            logger.error(f"Error distilling intent tags: {e}")
-            raise
+        logger.info(f"Generated {len(nodes)} sub-intents: {[n.full_name for n in nodes]}")
+        return nodes
 
     def build_taxonomy(
         self,
         root_topic: str,
         levels: int,
         tags_per_level: int,
-        existing_root: Optional[IntentNode] = None
+        existing_root: Optional[IntentNode] = None,
+        max_concurrency: Optional[int] = None,
+        parents_per_call: int = 1,
+        use_batch_api: bool = False,
+        poll_interval: float = 60
     ) -> IntentNode:
         """
         Build complete intent taxonomy tree
 
+        All parents of a level are expanded concurrently on a thread pool
+        (or as one Batch API job per level); children keep the parents'
+        order. Each level's budget of tags_per_level per parent is balanced
+        across parents, so existing children count against it (see
+        _allocate_counts).
+
         Args:
             root_topic: Root topic/intent
             levels: Number of hierarchy levels
             tags_per_level: Number of tags to generate per level
             existing_root: Existing root node to extend (optional)
+            max_concurrency: Maximum number of in-flight LLM requests
+                (defaults to the distiller's max_concurrency)
+            parents_per_call: Consecutive parents of a level sharing one
+                request (capped at MAX_PARENTS_PER_CALL; ignored with the
+                Batch API)
+            use_batch_api: Submit each level as one Batch API job (half
+                price, each level waits for the batch completion window)
+            poll_interval: Initial seconds between batch status polls
 
         Returns:
             Root IntentNode with full taxonomy tree
@@ -165,32 +482,130 @@ class IntentTagDistiller:
             root = IntentNode(name=root_topic)
             self.root = root
 
-        # Build tree level by level
-        current_level_nodes = [root]
-
-        for level in range(1, levels + 1):
-            logger.info(f"Building level {level}/{levels}")
-            next_level_nodes = []
-
-            for parent_node in current_level_nodes:
-                # Get existing children names to avoid duplicates
-                existing_names = [child.name for child in parent_node.children]
-
-                # Distill sub-intents
+        def _expand(group: List[Tuple[IntentNode, int]]):
+            if len(group) == 1:
+                parent_node, count = group[0]
                 try:
-                    child_nodes = self.distill_tags(
+                    # Distill sub-intents, avoiding names of existing children
+                    self.distill_tags(
                         parent_intent=parent_node.name,
-                        count=tags_per_level,
+                        count=count,
                         parent_node=parent_node,
-                        existing_tags=existing_names if existing_names else None
+                        existing_tags=self._existing_tags(parent_node)
                     )
-                    next_level_nodes.extend(child_nodes)
-
                 except Exception as e:
                     logger.error(f"Failed to distill tags for {parent_node.full_name}: {e}")
-                    continue
+                return
+
+            for (parent_node, _), result in zip(group, self.distill_tags_grouped(group)):
+                if isinstance(result, Exception):
+                    logger.error(f"Failed to distill tags for {parent_node.full_name}: {result}")
+
+        # Build tree level by level, expanding all parents of a level at once
+        current_level_nodes = [root]
+
+        with ThreadPoolExecutor(max_workers=max_concurrency or self.max_concurrency) as executor:
+            for level in range(1, levels + 1):
+                logger.info(f"Building level {level}/{levels} ({len(current_level_nodes)} parents)")
+
+                counts = self._allocate_counts(current_level_nodes, tags_per_level)
+                if use_batch_api:
+                    # Failures are logged by distill_tags_batch; those parents stay leaves
+                    work = [(node, count) for node, count in zip(current_level_nodes, counts) if count > 0]
+                    if work:
+                        self.distill_tags_batch(work, poll_interval)
+                else:
+                    list(executor.map(_expand, self._group_parents(current_level_nodes, counts, parents_per_call)))
+
+                # Existing children are expanded too, so extended trees stay balanced
+                current_level_nodes = [child for node in current_level_nodes for child in node.children]
+
+                if not current_level_nodes:
+                    logger.warning(f"No nodes generated at level {level}, stopping")
+                    break
+
+        logger.info(f"Taxonomy building complete. Total nodes: {self._count_nodes(root)}")
+        return root
+
+    async def abuild_taxonomy(
+        self,
+        root_topic: str,
+        levels: int,
+        tags_per_level: int,
+        existing_root: Optional[IntentNode] = None,
+        max_concurrency: Optional[int] = None,
+        on_expand: Optional[Callable[[IntentNode, List[IntentNode]], None]] = None,
+        parents_per_call: int = 1
+    ) -> IntentNode:
+        """
+        Async variant of build_taxonomy() that expands siblings concurrently
+
+        Each BFS level is expanded with one request per parent node (or per
+        group of parents_per_call parents), so Stage 1 latency scales with
+        the number of levels rather than the number of nodes.
+
+        Args:
+            root_topic: Root topic/intent
+            levels: Number of hierarchy levels
+            tags_per_level: Number of tags to generate per level
+            existing_root: Existing root node to extend (optional)
+            max_concurrency: Maximum number of in-flight LLM requests
+                (defaults to the distiller's max_concurrency)
+            on_expand: Optional callback(parent_node, child_nodes) called as
+                each parent finishes expanding
+            parents_per_call: Consecutive parents of a level sharing one
+                request (capped at MAX_PARENTS_PER_CALL)
+
+        Returns:
+            Root IntentNode with full taxonomy tree
+        """
+        logger.info(f"Building intent taxonomy: topic={root_topic}, levels={levels}, tags_per_level={tags_per_level}")
+
+        # Create or use existing root
+        if existing_root:
+            root = existing_root
+        else:
+            root = IntentNode(name=root_topic)
+            self.root = root
+
+        sem = asyncio.Semaphore(max_concurrency or self.max_concurrency)
+
+        async def _expand(group: List[Tuple[IntentNode, int]]):
+            if len(group) == 1:
+                parent_node, count = group[0]
+                try:
+                    # Distill sub-intents, avoiding names of existing children
+                    async with sem:
+                        results = [await self.adistill_tags(
+                            parent_intent=parent_node.name,
+                            count=count,
+                            parent_node=parent_node,
+                            existing_tags=self._existing_tags(parent_node)
+                        )]
+                except Exception as e:
+                    results = [e]
+            else:
+                async with sem:
+                    results = await self.adistill_tags_grouped(group)
+
+            for (parent_node, _), child_nodes in zip(group, results):
+                if isinstance(child_nodes, Exception):
+                    logger.error(f"Failed to distill tags for {parent_node.full_name}: {child_nodes}")
+                elif on_expand:
+                    on_expand(parent_node, child_nodes)
+
+        # Build tree level by level, expanding all parents of a level at once
+        current_level_nodes = [root]
 
-            current_level_nodes = next_level_nodes
+        for level in range(1, levels + 1):
+            logger.info(f"Building level {level}/{levels} ({len(current_level_nodes)} parents)")
+
+            counts = self._allocate_counts(current_level_nodes, tags_per_level)
+            groups = self._group_parents(current_level_nodes, counts, parents_per_call)
+            await asyncio.gather(*(_expand(group) for group in groups))
+
+            # Existing children are expanded too, so extended trees stay balanced
+            current_level_nodes = [child for node in current_level_nodes for child in node.children]
 
             if not current_level_nodes:
                 logger.warning(f"No nodes generated at level {level}, stopping")
@@ -199,12 +614,49 @@ class IntentTagDistiller:
         logger.info(f"Taxonomy building complete. Total nodes: {self._count_nodes(root)}")
         return root
 
+    def _group_parents(
+        self,
+        parents: List[IntentNode],
+        counts: List[int],
+        parents_per_call: int
+    ) -> List[List[Tuple[IntentNode, int]]]:
+        """Split a level's parents with a non-zero count into request groups, keeping their order"""
+        size = max(1, min(parents_per_call, MAX_PARENTS_PER_CALL))
+        work = [(parent, count) for parent, count in zip(parents, counts) if count > 0]
+        return [work[i:i + size] for i in range(0, len(work), size)]
+
+    def _allocate_counts(self, parents: List[IntentNode], tags_per_level: int) -> List[int]:
+        """
+        Split a level's budget of new sub-intents across its parents
+
+        The budget is tags_per_level per parent minus the children the
+        parents already have. It is handed out one tag at a time to the
+        parent with the fewest children, so a parent that already has many
+        children gets none and sparse parents are filled up first.
+
+        Args:
+            parents: Parent nodes of the level
+            tags_per_level: Target number of children per parent
+
+        Returns:
+            Number of sub-intents to generate per parent (same order)
+        """
+        counts = [0] * len(parents)
+        budget = tags_per_level * len(parents) - sum(len(parent.children) for parent in parents)
+
+        heap = [(len(parent.children), i) for i, parent in enumerate(parents)]
+        heapq.heapify(heap)
+        while budget > 0:
+            size, i = heapq.heappop(heap)
+            counts[i] += 1
+            budget -= 1
+            heapq.heappush(heap, (size + 1, i))
+
+        return counts
+
     def _count_nodes(self, node: IntentNode) -> int:
         """Count total nodes in tree"""
-        count = 1
-        for child in node.children:
-            count += self._count_nodes(child)
-        return count
+        return sum(1 for _ in node.walk())
 
     def get_leaf_intents(self, node: Optional[IntentNode] = None) -> List[IntentNode]:
         """
@@ -216,20 +668,45 @@ class IntentTagDistiller:
         Returns:
             List of leaf IntentNode objects
         """
+        return list(self.iter_leaf_intents(node))
+
+    def iter_leaf_intents(self, node: Optional[IntentNode] = None) -> Iterator[IntentNode]:
+        """
+        Iterate over leaf intent nodes in pre-order without building a list
+
+        Args:
+            node: Starting node (uses root if not provided)
+
+        Yields:
+            Leaf IntentNode objects
+        """
         if node is None:
             node = self.root
 
         if not node:
-            return []
+            return
+
+        for n, _ in node.walk():
+            if not n.children:
+                yield n
 
-        if not node.children:
-            return [node]
+    def get_all_intents(self, node: Optional[IntentNode] = None) -> List[IntentNode]:
+        """
+        Get all intent nodes in pre-order
+
+        Args:
+            node: Starting node (uses root if not provided)
+
+        Returns:
+            List of IntentNode objects
+        """
+        if node is None:
+            node = self.root
 
-        leaves = []
-        for child in node.children:
-            leaves.extend(self.get_leaf_intents(child))
+        if not node:
+            return []
 
-        return leaves
+        return [n for n, _ in node.walk()]
 
     def export_tree(self, node: Optional[IntentNode] = None) -> Dict[str, Any]:
         """
@@ -259,31 +736,33 @@ class IntentTagDistiller:
         Returns:
             List of intent dictionaries
         """
+        return list(self.iter_flat_list(node))
+
+    def iter_flat_list(self, node: Optional[IntentNode] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over flattened intent dictionaries in pre-order
+
+        Lets callers stream large taxonomies (e.g. to JSONL) without holding
+        every dictionary in memory.
+
+        Args:
+            node: Starting node (uses root if not provided)
+
+        Yields:
+            Intent dictionaries
+        """
         if node is None:
             node = self.root
 
         if not node:
-            return []
-
-        result = [{
-            "name": node.name,
-            "number": node.number,
-            "full_name": node.full_name,
-            "path": node.path,
-            "numbered_path": node.numbered_path,
-            "level": self._get_level(node)
-        }]
-
-        for child in node.children:
-            result.extend(self.export_flat_list(child))
-
-        return result
-
-    def _get_level(self, node: IntentNode) -> int:
-        """Get depth level of node"""
-        level = 0
-        current = node
-        while current.parent:
-            level += 1
-            current = current.parent
-        return level
+            return
+
+        for n, _ in node.walk():
+            yield {
+                "name": n.name,
+                "number": n.number,
+                "full_name": n.full_name,
+                "path": n.path,
+                "numbered_path": n.numbered_path,
+                "level": n.depth
+            }
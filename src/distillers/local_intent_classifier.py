@@ -0,0 +1,100 @@
+"""
+Local Intent Classifier
+Nearest-centroid classifier distilled from LLM-tagged patient turns, used to
+tag conversations whose turns closely resemble ones the LLM already labeled
+"""
+import logging
+import threading
+from array import array
+from typing import Dict, Optional, Tuple
+
+from ..cache.semantic_cache import cosine_similarity, embed_text
+
+logger = logging.getLogger(__name__)
+
+
+class LocalIntentClassifier:
+    """Classify patient turns by similarity to centroids of LLM-labeled turns"""
+
+    def __init__(self, threshold: float = 0.75, min_examples: int = 5, dims: int = 256):
+        """
+        Initialize local intent classifier
+
+        Args:
+            threshold: Minimum cosine similarity to a label centroid for a prediction
+            min_examples: LLM-labeled turns a label needs before it is predicted
+            dims: Turn embedding dimensionality
+        """
+        self.threshold = threshold
+        self.min_examples = min_examples
+        self.dims = dims
+        self.hits = 0
+        self.misses = 0
+
+        # (intent, intent_path) -> (summed embeddings, example count)
+        self._sums: Dict[Tuple[str, str], array] = {}
+        self._counts: Dict[Tuple[str, str], int] = {}
+        self._centroids: Dict[Tuple[str, str], array] = {}
+
+        # Learned from worker threads and the event loop alike
+        self._lock = threading.Lock()
+
+    def learn(self, text: str, intent: str, intent_path: str) -> None:
+        """
+        Add an LLM-labeled patient turn
+
+        Args:
+            text: Turn content
+            intent: Intent assigned by the LLM
+            intent_path: Hierarchical intent path assigned by the LLM
+        """
+        label = (intent, intent_path)
+        vector = embed_text(text, self.dims)
+
+        with self._lock:
+            sums = self._sums.get(label)
+            if sums is None:
+                sums = self._sums[label] = array("f", bytes(4 * self.dims))
+            for i, value in enumerate(vector):
+                sums[i] += value
+            count = self._counts[label] = self._counts.get(label, 0) + 1
+
+            if count >= self.min_examples:
+                self._centroids[label] = self._normalize(sums)
+
+    def classify(self, text: str) -> Optional[Tuple[str, str, float]]:
+        """
+        Classify a patient turn
+
+        Args:
+            text: Turn content
+
+        Returns:
+            (intent, intent_path, similarity), or None when no label
+            centroid is similar enough
+        """
+        with self._lock:
+            centroids = list(self._centroids.items())
+
+        if not centroids:
+            self.misses += 1
+            return None
+
+        vector = embed_text(text, self.dims)
+        label, score = max(
+            ((label, cosine_similarity(vector, centroid)) for label, centroid in centroids),
+            key=lambda item: item[1]
+        )
+
+        if score < self.threshold:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return label[0], label[1], score
+
+    @staticmethod
+    def _normalize(vector: array) -> array:
+        """Scale a vector to unit length"""
+        norm = sum(v * v for v in vector) ** 0.5
+        return array("f", (v / norm for v in vector)) if norm else array("f", vector)
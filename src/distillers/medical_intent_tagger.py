@@ -2,23 +2,45 @@
 Medical Intent Tagger
 Generate intent tags for medical conversations using LLM
 """
+import asyncio
+import hashlib
+import heapq
 import json
 import logging
-from typing import List, Dict, Any, Optional
+import re
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import List, Dict, Any, Optional, Tuple
 from datetime import datetime
 
+from src.cache.llm_cache import LLMCache
+from src.cache.semantic_cache import SemanticCache, cosine_similarity, embed_text
+from src.llm.batch import build_batch_request, run_batch
 from src.llm.client import LLMClient
-from src.llm.prompts.medical_intent_tagging import get_medical_intent_tagging_prompt
+from src.llm.prompts.medical_intent_tagging import format_candidate_intents, get_medical_intent_tagging_prompt
 from src.distillers.intent_tag_distiller import IntentNode
+from src.distillers.local_intent_classifier import LocalIntentClassifier
+from src.utils import json_utils
 from src.utils.taxonomy_utils import export_taxonomy_text
 
 logger = logging.getLogger(__name__)
 
+# Outermost {...} span, for responses wrapped in prose or code fences
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
 
 class MedicalIntentTagger:
     """Generate intent tags for medical conversations"""
 
-    def __init__(self, llm_client: LLMClient, language: str = "en", taxonomy: IntentNode = None):
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        language: str = "en",
+        taxonomy: IntentNode = None,
+        cache: Optional[LLMCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        local_classifier: Optional[LocalIntentClassifier] = None,
+        taxonomy_top_k: Optional[int] = None
+    ):
         """
         Initialize medical intent tagger
 
@@ -26,18 +48,43 @@ class MedicalIntentTagger:
             llm_client: LLM client for generating intent tags
             language: Language code (en/zh)
             taxonomy: Optional intent taxonomy tree to guide tagging
+            cache: Optional response cache for tagging results
+            semantic_cache: Optional similarity cache; near-identical
+                conversations (same number of patient turns) reuse tags
+            local_classifier: Optional classifier trained on the LLM's tags as
+                tagging proceeds; conversations whose every patient turn it
+                classifies confidently skip the LLM
+            taxonomy_top_k: If the taxonomy has more leaves than this, show the
+                LLM only the top_k leaves most similar to each conversation
+                instead of the whole taxonomy in the system prompt
         """
         self.llm_client = llm_client
         self.language = language
         self.taxonomy = taxonomy
-
-        # Build taxonomy text if provided
+        self.cache = cache
+        self.semantic_cache = semantic_cache
+        self.local_classifier = local_classifier
+
+        # Leaf paths with embeddings of their names, when retrieving candidates per conversation
+        self.taxonomy_top_k = taxonomy_top_k
+        self._leaf_index: List[Tuple[str, List[float]]] = []
+        if taxonomy and taxonomy_top_k:
+            leaves = [node for node, _ in taxonomy.walk() if not node.children]
+            if len(leaves) > taxonomy_top_k:
+                self._leaf_index = [(leaf.path, embed_text(leaf.name)) for leaf in leaves]
+                logger.info(f"Retrieving {taxonomy_top_k} of {len(leaves)} taxonomy leaves per conversation")
+
+        # Build taxonomy text if provided (retrieved candidates replace it)
         taxonomy_text = None
-        if taxonomy:
+        if taxonomy and not self._leaf_index:
             taxonomy_text = export_taxonomy_text(taxonomy)
 
         self.prompt_template = get_medical_intent_tagging_prompt(language, taxonomy_text)
 
+        # Semantic cache entries are only valid for the taxonomy they were tagged against
+        fingerprint = "\n".join([self.prompt_template['system'], *(path for path, _ in self._leaf_index)])
+        self._taxonomy_digest = hashlib.blake2b(fingerprint.encode("utf-8"), digest_size=16).hexdigest()
+
     def tag_conversation(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
         """
         Generate intent tags for a single conversation
@@ -48,69 +95,383 @@ class MedicalIntentTagger:
         Returns:
             Conversation with intent tags added
         """
-        # Format conversation for prompt
-        conversation_text = self._format_conversation(conversation['turns'])
+        try:
+            intent_data = self._get_intent_data(conversation)
+
+            # Merge intent data with conversation
+            return self._merge_intents(conversation, intent_data)
+
+        except Exception as e:
+            logger.error(f"Error tagging conversation {conversation.get('conversation_id')}: {e}")
+            # Return conversation with empty intents on error
+            return self._create_fallback_conversation(conversation)
+
+    async def atag_conversation(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async variant of tag_conversation() for concurrent fan-out
 
-        # Generate intent tags using LLM
-        prompt = self.prompt_template['user'].format(conversation=conversation_text)
+        Args:
+            conversation: Conversation dictionary with 'turns' field
 
+        Returns:
+            Conversation with intent tags added
+        """
         try:
+            intent_data = await self._aget_intent_data(conversation)
+            return self._merge_intents(conversation, intent_data)
+
+        except Exception as e:
+            logger.error(f"Error tagging conversation {conversation.get('conversation_id')}: {e}")
+            return self._create_fallback_conversation(conversation)
+
+    def _get_intent_data(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
+        """Get intent data for a conversation from the cache or the LLM"""
+        conversation_text, prompt, system_prompt = self._prepare_request(conversation)
+
+        intent_data = self._cache_lookup(conversation, conversation_text, prompt, system_prompt)
+        if intent_data is None:
+            intent_data = self._classify_locally(conversation)
+        if intent_data is None:
             response = self.llm_client.chat(
-                messages=[
-                    {"role": "system", "content": self.prompt_template['system']},
-                    {"role": "user", "content": prompt}
-                ],
+                messages=self._build_messages(prompt, system_prompt),
                 response_format={"type": "json_object"}
             )
 
             # Parse LLM response (extract text from response dict)
             response_text = response.get("text", response) if isinstance(response, dict) else response
             intent_data = self._parse_llm_response(response_text)
+            self._cache_store(conversation, conversation_text, prompt, system_prompt, intent_data)
+            self._learn_locally(conversation, intent_data)
 
-            # Merge intent data with conversation
-            tagged_conversation = self._merge_intents(conversation, intent_data)
+        return intent_data
 
-            return tagged_conversation
+    async def _aget_intent_data(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
+        """Async variant of _get_intent_data()"""
+        conversation_text, prompt, system_prompt = self._prepare_request(conversation)
 
-        except Exception as e:
-            logger.error(f"Error tagging conversation {conversation.get('conversation_id')}: {e}")
-            # Return conversation with empty intents on error
-            return self._create_fallback_conversation(conversation)
+        intent_data = self._cache_lookup(conversation, conversation_text, prompt, system_prompt)
+        if intent_data is None:
+            intent_data = self._classify_locally(conversation)
+        if intent_data is None:
+            response = await self.llm_client.achat(
+                messages=self._build_messages(prompt, system_prompt),
+                response_format={"type": "json_object"}
+            )
+
+            response_text = response.get("text", response) if isinstance(response, dict) else response
+            intent_data = self._parse_llm_response(response_text)
+            self._cache_store(conversation, conversation_text, prompt, system_prompt, intent_data)
+            self._learn_locally(conversation, intent_data)
+
+        return intent_data
 
     def tag_conversations_batch(
         self,
         conversations: List[Dict[str, Any]],
         batch_size: int = 1,
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        max_concurrency: int = 8,
+        use_batch_api: bool = False,
+        poll_interval: float = 60
     ) -> List[Dict[str, Any]]:
         """
-        Tag multiple conversations in batches
+        Tag multiple conversations concurrently
+
+        Conversations are tagged on a thread pool; results keep the input
+        order. Conversations with identical turns are tagged once and the
+        result shared. Failed conversations get fallback (empty) intents.
 
         Args:
             conversations: List of conversation dictionaries
-            batch_size: Number of conversations to process at once (currently only 1 supported)
+            batch_size: Unused, kept for backward compatibility (see max_concurrency)
             progress_callback: Optional callback function for progress updates
+            max_concurrency: Maximum number of concurrent LLM requests
+            use_batch_api: Submit all conversations as one Batch API job instead
+                (half price, results within the batch completion window)
+            poll_interval: Initial seconds between batch status polls
 
         Returns:
             List of tagged conversations
         """
-        tagged_conversations = []
+        groups = self._group_identical_conversations(conversations)
 
-        for i, conversation in enumerate(conversations):
-            try:
-                tagged = self.tag_conversation(conversation)
-                tagged_conversations.append(tagged)
+        if use_batch_api:
+            return self._tag_conversations_via_batch_api(conversations, groups, progress_callback, poll_interval)
+
+        tagged_conversations: List[Any] = [None] * len(conversations)
+        tagged_at = datetime.now().isoformat()  # one timestamp for the whole batch
+        done = 0
+
+        with ThreadPoolExecutor(max_workers=max_concurrency) as executor:
+            # One request per distinct conversation, sent for the group's first member
+            futures = {
+                executor.submit(self._get_intent_data, conversations[members[0]]): members
+                for members in groups
+            }
+
+            for future in as_completed(futures):
+                members = futures[future]
+                try:
+                    intent_data = future.result()
+                except Exception as e:
+                    logger.error(f"Error tagging conversation {conversations[members[0]].get('conversation_id')}: {e}")
+                    intent_data = None
+
+                self._apply_intent_data(conversations, tagged_conversations, members, intent_data, tagged_at)
+
+                done += len(members)
+                if progress_callback:
+                    progress_callback(done, len(conversations))
+
+        return tagged_conversations
+
+    async def atag_conversations_batch(
+        self,
+        conversations: List[Dict[str, Any]],
+        progress_callback: Optional[callable] = None,
+        max_concurrency: int = 20
+    ) -> List[Dict[str, Any]]:
+        """
+        Async variant of tag_conversations_batch()
+
+        A fixed pool of max_concurrency workers tags conversations on the
+        event loop, so pending work stays a plain list rather than one task
+        per conversation; results keep the input order.
 
+        Args:
+            conversations: List of conversation dictionaries
+            progress_callback: Optional callback function for progress updates
+            max_concurrency: Maximum number of in-flight LLM requests
+
+        Returns:
+            List of tagged conversations
+        """
+        groups = self._group_identical_conversations(conversations)
+        tagged_conversations: List[Any] = [None] * len(conversations)
+        tagged_at = datetime.now().isoformat()  # one timestamp for the whole batch
+        pending = iter(groups)
+        done = 0
+
+        async def _worker() -> None:
+            nonlocal done
+            # Workers share one iterator; each pulls the next group when it is free
+            for members in pending:
+                try:
+                    intent_data = await self._aget_intent_data(conversations[members[0]])
+                except Exception as e:
+                    logger.error(f"Error tagging conversation {conversations[members[0]].get('conversation_id')}: {e}")
+                    intent_data = None
+
+                self._apply_intent_data(conversations, tagged_conversations, members, intent_data, tagged_at)
+
+                done += len(members)
                 if progress_callback:
-                    progress_callback(i + 1, len(conversations))
+                    progress_callback(done, len(conversations))
+
+        await asyncio.gather(*(_worker() for _ in range(min(max_concurrency, len(groups)))))
+        return tagged_conversations
+
+    def _tag_conversations_via_batch_api(
+        self,
+        conversations: List[Dict[str, Any]],
+        groups: List[List[int]],
+        progress_callback: Optional[callable],
+        poll_interval: float
+    ) -> List[Dict[str, Any]]:
+        """Tag conversations through the provider's Batch API, answering cached ones locally"""
+        tagged_conversations: List[Any] = [None] * len(conversations)
+        tagged_at = datetime.now().isoformat()  # one timestamp for the whole batch
+        pending = {}
+        requests = []
+
+        for members in groups:
+            conversation = conversations[members[0]]
+            conversation_text, prompt, system_prompt = self._prepare_request(conversation)
+            cached = self._cache_lookup(conversation, conversation_text, prompt, system_prompt)
+            if cached is None:
+                cached = self._classify_locally(conversation)
+            if cached is not None:
+                self._apply_intent_data(conversations, tagged_conversations, members, cached, tagged_at)
+                continue
+
+            # Indices, not conversation ids: ids are not guaranteed unique
+            custom_id = f"conversation-{members[0]}"
+            pending[custom_id] = (members, conversation_text, prompt, system_prompt)
+            requests.append(build_batch_request(
+                self.llm_client,
+                custom_id,
+                self._build_messages(prompt, system_prompt),
+                response_format={"type": "json_object"}
+            ))
 
+        if requests:
+            logger.info(f"Submitting {len(requests)} tagging requests via Batch API")
+            try:
+                responses = run_batch(self.llm_client, requests, poll_interval=poll_interval)
             except Exception as e:
-                logger.error(f"Error processing conversation {i}: {e}")
-                # Add fallback on error
-                tagged_conversations.append(self._create_fallback_conversation(conversation))
+                logger.error(f"Batch tagging failed: {e}")
+                responses = {custom_id: e for custom_id in pending}
+
+            for custom_id, response_text in responses.items():
+                members, conversation_text, prompt, system_prompt = pending[custom_id]
+                conversation = conversations[members[0]]
+                if isinstance(response_text, Exception):
+                    logger.error(f"Error tagging conversation {conversation.get('conversation_id')}: {response_text}")
+                    self._apply_intent_data(conversations, tagged_conversations, members, None, tagged_at)
+                    continue
+
+                intent_data = self._parse_llm_response(response_text)
+                self._cache_store(conversation, conversation_text, prompt, system_prompt, intent_data)
+                self._learn_locally(conversation, intent_data)
+                self._apply_intent_data(conversations, tagged_conversations, members, intent_data, tagged_at)
+
+        if progress_callback:
+            progress_callback(len(conversations), len(conversations))
 
         return tagged_conversations
 
+    def _group_identical_conversations(self, conversations: List[Dict[str, Any]]) -> List[List[int]]:
+        """
+        Group conversations whose formatted turns are identical
+
+        Returns:
+            Lists of conversation indices (in order), one list per distinct conversation
+        """
+        groups: Dict[str, List[int]] = {}
+        for i, conversation in enumerate(conversations):
+            groups.setdefault(self._format_conversation(conversation['turns']), []).append(i)
+
+        if len(groups) < len(conversations):
+            logger.info(f"Folded {len(conversations)} conversations into {len(groups)} distinct ones")
+        return list(groups.values())
+
+    def _apply_intent_data(
+        self,
+        conversations: List[Dict[str, Any]],
+        tagged_conversations: List[Any],
+        members: List[int],
+        intent_data: Optional[Dict[str, Any]],
+        tagged_at: str
+    ) -> None:
+        """Tag every conversation of a group with the same intent data (fallback when None)"""
+        for i in members:
+            if intent_data is None:
+                tagged_conversations[i] = self._create_fallback_conversation(conversations[i], tagged_at)
+            else:
+                tagged_conversations[i] = self._merge_intents(conversations[i], intent_data, tagged_at)
+
+    def _prepare_request(self, conversation: Dict[str, Any]) -> Tuple[str, str, str]:
+        """Format a conversation and build its (conversation_text, prompt, system_prompt)"""
+        conversation_text = self._format_conversation(conversation['turns'])
+        prompt = self.prompt_template['render_user'](
+            conversation=conversation_text,
+            candidate_intents=self._candidate_intents(conversation)
+        )
+        return conversation_text, prompt, self.prompt_template['system']
+
+    def _candidate_intents(self, conversation: Dict[str, Any]) -> str:
+        """Candidate intent block for a conversation (empty unless retrieving from the taxonomy)"""
+        if not self._leaf_index:
+            return ""
+
+        patient_text = " ".join(turn['content'] for turn in conversation['turns'] if turn['role'] == 'user')
+        vector = embed_text(patient_text)
+        ranked = heapq.nlargest(
+            self.taxonomy_top_k,
+            self._leaf_index,
+            key=lambda leaf: cosine_similarity(vector, leaf[1])
+        )
+        return format_candidate_intents([path for path, _ in ranked], self.language)
+
+    @staticmethod
+    def _build_messages(prompt: str, system_prompt: str) -> List[Dict[str, str]]:
+        """Chat messages for a tagging request"""
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": prompt}
+        ]
+
+    def _cache_lookup(
+        self,
+        conversation: Dict[str, Any],
+        conversation_text: str,
+        prompt: str,
+        system_prompt: str
+    ) -> Optional[Dict[str, Any]]:
+        """Return cached intent data (exact match first, then similarity), or None"""
+        if self.cache:
+            intent_data = self.cache.get_response(self.llm_client, prompt, system_prompt)
+            if intent_data is not None:
+                return intent_data
+
+        # Tags are indexed by turn, so only conversations of the same shape are comparable
+        if self.semantic_cache:
+            return self.semantic_cache.get(self._semantic_key(conversation), conversation_text)
+        return None
+
+    def _cache_store(
+        self,
+        conversation: Dict[str, Any],
+        conversation_text: str,
+        prompt: str,
+        system_prompt: str,
+        intent_data: Dict[str, Any]
+    ) -> None:
+        """Cache intent data for a conversation"""
+        # Only cache real results, not the parse-failure placeholder
+        if not intent_data.get('user_turns'):
+            return
+        if self.cache:
+            self.cache.set_response(self.llm_client, prompt, system_prompt, intent_data)
+        if self.semantic_cache:
+            self.semantic_cache.put(self._semantic_key(conversation), conversation_text, intent_data)
+
+    def _classify_locally(self, conversation: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Intent data from the local classifier, or None unless every patient turn is confident"""
+        if not self.local_classifier:
+            return None
+
+        user_turns = []
+        for i, turn in enumerate(conversation['turns']):
+            if turn['role'] != 'user':
+                continue
+            prediction = self.local_classifier.classify(turn['content'])
+            if prediction is None:
+                return None
+            intent, intent_path, score = prediction
+            user_turns.append({
+                'turn_index': i,
+                'intent': intent,
+                'intent_path': intent_path,
+                'reasoning': f"Local classifier (similarity {score:.2f})"
+            })
+
+        if not user_turns:
+            return None
+
+        intents = [item['intent'] for item in user_turns]
+        return {
+            'user_turns': user_turns,
+            'primary_intent': max(set(intents), key=intents.count),
+            'all_intents': list(dict.fromkeys(intents)),
+            'conversation_summary': ''
+        }
+
+    def _learn_locally(self, conversation: Dict[str, Any], intent_data: Dict[str, Any]) -> None:
+        """Feed the LLM's per-turn tags to the local classifier"""
+        if not self.local_classifier or not intent_data.get('user_turns'):
+            return
+
+        for turn in self._merge_intents(conversation, intent_data, tagged_at="")['turns']:
+            if turn['role'] == 'user' and turn['intent'] != 'Unknown':
+                self.local_classifier.learn(turn['content'], turn['intent'], turn['intent_path'])
+
+    def _semantic_key(self, conversation: Dict[str, Any]) -> tuple:
+        """Exact-match part of the semantic cache key for a conversation"""
+        user_turns = sum(1 for turn in conversation['turns'] if turn['role'] == 'user')
+        model = getattr(self.llm_client, "model", None)
+        return ("medical_intent_tags", model, self.language, self._taxonomy_digest, user_turns)
+
     def _format_conversation(self, turns: List[Dict[str, str]]) -> str:
         """Format conversation turns for LLM prompt"""
         formatted_turns = []
@@ -125,15 +486,14 @@ class MedicalIntentTagger:
         """Parse LLM JSON response"""
         try:
             # Try to parse as JSON
-            data = json.loads(response)
+            data = json_utils.loads(response)
             return data
         except json.JSONDecodeError:
             # Try to extract JSON from response
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
+            json_match = _JSON_RE.search(response)
             if json_match:
                 try:
-                    return json.loads(json_match.group())
+                    return json_utils.loads(json_match.group())
                 except json.JSONDecodeError:
                     pass
 
@@ -148,31 +508,36 @@ class MedicalIntentTagger:
     def _merge_intents(
         self,
         conversation: Dict[str, Any],
-        intent_data: Dict[str, Any]
+        intent_data: Dict[str, Any],
+        tagged_at: Optional[str] = None
     ) -> Dict[str, Any]:
-        """Merge intent data into conversation structure"""
-
-        # Create a map of turn_index to intent info
-        intent_map = {
-            item['turn_index']: item
-            for item in intent_data.get('user_turns', [])
-        }
-
-        # Add intents to user turns
-        tagged_turns = []
-        user_turn_count = 0
-
-        for i, turn in enumerate(conversation['turns']):
-            tagged_turn = turn.copy()
-
-            if turn['role'] == 'user':
-                intent_info = intent_map.get(i, intent_map.get(user_turn_count, {}))
-                tagged_turn['intent'] = intent_info.get('intent', 'Unknown')
-                tagged_turn['intent_path'] = intent_info.get('intent_path', 'Unknown')
-                tagged_turn['intent_reasoning'] = intent_info.get('reasoning', '')
-                user_turn_count += 1
-
-            tagged_turns.append(tagged_turn)
+        """Merge intent data into conversation structure (tagged_at defaults to now)"""
+
+        turns = conversation['turns']
+        user_turn_indices = [i for i, turn in enumerate(turns) if turn['role'] == 'user']
+        entries = intent_data.get('user_turns', [])
+
+        if len(entries) == len(user_turn_indices):
+            # One entry per patient turn (the usual case): pair them in turn order,
+            # whether the LLM numbered turns within the conversation or among patient turns
+            entries = sorted(entries, key=lambda item: item.get('turn_index', 0))
+        else:
+            # Entries missing or extra: match on turn_index, then on patient-turn ordinal
+            intent_map = {item.get('turn_index'): item for item in entries}
+            entries = [
+                intent_map.get(i) or intent_map.get(ordinal, {})
+                for ordinal, i in enumerate(user_turn_indices)
+            ]
+
+        # Add intents to user turns; other turns are unchanged and shared, not copied
+        tagged_turns = list(turns)
+        for i, intent_info in zip(user_turn_indices, entries):
+            tagged_turns[i] = {
+                **turns[i],
+                'intent': intent_info.get('intent', 'Unknown'),
+                'intent_path': intent_info.get('intent_path', 'Unknown'),
+                'intent_reasoning': intent_info.get('reasoning', '')
+            }
 
         # Create tagged conversation
         tagged_conversation = conversation.copy()
@@ -180,12 +545,16 @@ class MedicalIntentTagger:
         tagged_conversation['primary_intent'] = intent_data.get('primary_intent', 'Unknown')
         tagged_conversation['all_intents'] = intent_data.get('all_intents', [])
         tagged_conversation['conversation_summary'] = intent_data.get('conversation_summary', '')
-        tagged_conversation['tagged_at'] = datetime.now().isoformat()
+        tagged_conversation['tagged_at'] = tagged_at or datetime.now().isoformat()
 
         return tagged_conversation
 
-    def _create_fallback_conversation(self, conversation: Dict[str, Any]) -> Dict[str, Any]:
-        """Create fallback conversation with empty intents"""
+    def _create_fallback_conversation(
+        self,
+        conversation: Dict[str, Any],
+        tagged_at: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Create fallback conversation with empty intents (tagged_at defaults to now)"""
         fallback = conversation.copy()
         fallback['turns'] = [
             {**turn, 'intent': 'Unknown', 'intent_path': 'Unknown'}
@@ -195,7 +564,7 @@ class MedicalIntentTagger:
         fallback['primary_intent'] = 'Unknown'
         fallback['all_intents'] = []
         fallback['conversation_summary'] = ''
-        fallback['tagged_at'] = datetime.now().isoformat()
+        fallback['tagged_at'] = tagged_at or datetime.now().isoformat()
         fallback['tagging_error'] = True
 
         return fallback
@@ -5,29 +5,66 @@ Analyzes real medical conversations to build domain-specific intent taxonomy
 import json
 import logging
 import random
-from typing import List, Dict, Any, Optional
+import re
+from typing import List, Dict, Any, Optional, Set
 
+from src.cache.llm_cache import LLMCache
 from src.llm.client import LLMClient
 from src.llm.prompts.medical_taxonomy_builder import get_medical_taxonomy_prompt
 from src.distillers.intent_tag_distiller import IntentNode
+from src.utils import json_utils
 from src.utils.taxonomy_utils import export_taxonomy_text
 
 logger = logging.getLogger(__name__)
 
+# Outermost {...} span, for responses wrapped in prose or code fences
+_JSON_RE = re.compile(r'\{.*\}', re.DOTALL)
+
+# Prompt budget per sampled turn, in estimated tokens
+TURN_TOKEN_BUDGET = 64
+
+# Sampled conversations whose opening patient turns overlap this much (Jaccard) are skipped
+NEAR_DUPLICATE_THRESHOLD = 0.8
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """
+    Truncate text to an estimated token budget
+
+    Estimates ~4 ASCII characters per token and one token per other
+    character (CJK), so both languages get a comparable share of the prompt.
+    """
+    budget = max_tokens * 4
+    for i, char in enumerate(text):
+        budget -= 1 if char.isascii() else 4
+        if budget < 0:
+            return text[:i]
+    return text
+
+
+def _shingles(text: str, size: int = 3) -> Set[str]:
+    """Character n-grams of whitespace-normalized, lowercased text"""
+    text = " ".join(text.lower().split())
+    if len(text) <= size:
+        return {text}
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
 
 class MedicalTaxonomyBuilder:
     """Build intent taxonomy from real medical conversations"""
 
-    def __init__(self, llm_client: LLMClient, language: str = "en"):
+    def __init__(self, llm_client: LLMClient, language: str = "en", cache: Optional[LLMCache] = None):
         """
         Initialize medical taxonomy builder
 
         Args:
             llm_client: LLM client for building taxonomy
             language: Language code (en/zh)
+            cache: Optional response cache for taxonomy results
         """
         self.llm_client = llm_client
         self.language = language
+        self.cache = cache
         self.prompt_template = get_medical_taxonomy_prompt(language)
 
     def build_taxonomy_from_conversations(
@@ -58,23 +95,31 @@ class MedicalTaxonomyBuilder:
         conversation_text = self._format_conversations_for_analysis(sample_conversations)
 
         # Generate taxonomy using LLM
-        prompt = self.prompt_template['user'].format(
+        prompt = self.prompt_template['render_user'](
             num_conversations=len(sample_conversations),
             conversation_samples=conversation_text
         )
 
+        system_prompt = self.prompt_template['system']
+
         try:
-            response = self.llm_client.chat(
-                messages=[
-                    {"role": "system", "content": self.prompt_template['system']},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
-            )
-
-            # Parse LLM response
-            response_text = response.get("text", response) if isinstance(response, dict) else response
-            taxonomy_data = self._parse_taxonomy_response(response_text)
+            taxonomy_data = self.cache.get_response(self.llm_client, prompt, system_prompt) if self.cache else None
+            if taxonomy_data is None:
+                response = self.llm_client.chat(
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": prompt}
+                    ],
+                    response_format={"type": "json_object"}
+                )
+
+                # Parse LLM response
+                response_text = response.get("text", response) if isinstance(response, dict) else response
+                taxonomy_data = self._parse_taxonomy_response(response_text)
+
+                # Only cache real results, not the parse-failure placeholder
+                if self.cache and taxonomy_data.get('root', {}).get('children'):
+                    self.cache.set_response(self.llm_client, prompt, system_prompt, taxonomy_data)
 
             # Convert to IntentNode tree
             root_node = self._build_intent_tree(taxonomy_data)
@@ -93,12 +138,25 @@ class MedicalTaxonomyBuilder:
         sample_size: int,
         max_turns_per_conv: int
     ) -> List[Dict[str, Any]]:
-        """Sample conversations for analysis"""
-        # If we have fewer conversations than sample_size, use all
-        if len(conversations) <= sample_size:
-            sampled = conversations
-        else:
-            sampled = random.sample(conversations, sample_size)
+        """Sample conversations for analysis, skipping near-duplicates"""
+        sampled = []
+        seen: List[Set[str]] = []
+
+        # Visit conversations in random order until the sample is full
+        for i in random.sample(range(len(conversations)), len(conversations)):
+            conv = conversations[i]
+            opening = next((turn['content'] for turn in conv['turns'] if turn['role'] == 'user'), "")
+            shingles = _shingles(opening)
+            if any(len(shingles & other) / len(shingles | other) >= NEAR_DUPLICATE_THRESHOLD for other in seen):
+                continue
+
+            sampled.append(conv)
+            seen.append(shingles)
+            if len(sampled) == sample_size:
+                break
+
+        if len(sampled) < min(sample_size, len(conversations)):
+            logger.info(f"Sampled {len(sampled)} conversations after skipping near-duplicates")
 
         # Truncate turns if needed
         truncated = []
@@ -121,7 +179,7 @@ class MedicalTaxonomyBuilder:
             conv_text = f"Conversation {i}:\n"
             for turn in conv['turns'][:20]:  # Limit to 20 turns per conversation
                 role = "Patient" if turn['role'] == 'user' else "Doctor"
-                content = turn['content'][:200]  # Truncate long turns
+                content = _truncate_to_tokens(turn['content'], TURN_TOKEN_BUDGET)  # Truncate long turns
                 conv_text += f"[{role}] {content}\n"
             formatted.append(conv_text)
 
@@ -130,15 +188,14 @@ class MedicalTaxonomyBuilder:
     def _parse_taxonomy_response(self, response: str) -> Dict[str, Any]:
         """Parse LLM JSON response"""
         try:
-            data = json.loads(response)
+            data = json_utils.loads(response)
             return data
         except json.JSONDecodeError:
             # Try to extract JSON from response
-            import re
-            json_match = re.search(r'\{.*\}', response, re.DOTALL)
+            json_match = _JSON_RE.search(response)
             if json_match:
                 try:
-                    return json.loads(json_match.group())
+                    return json_utils.loads(json_match.group())
                 except json.JSONDecodeError:
                     pass
 
@@ -146,40 +203,25 @@ class MedicalTaxonomyBuilder:
             return {"root": {"name": "Medical Consultation", "children": []}}
 
     def _build_intent_tree(self, taxonomy_data: Dict[str, Any]) -> IntentNode:
-        """Convert taxonomy JSON to IntentNode tree"""
+        """Convert taxonomy JSON to IntentNode tree (iteratively, so depth is unbounded)"""
         root_data = taxonomy_data.get('root', {})
-        return self._build_node_recursive(root_data, None, [])
-
-    def _build_node_recursive(
-        self,
-        node_data: Dict[str, Any],
-        parent: Optional[IntentNode],
-        path: List[str]
-    ) -> IntentNode:
-        """Recursively build IntentNode tree"""
-        name = node_data.get('name', 'Unknown')
 
         # Create node (path and full_name are computed automatically from parent/name)
-        node = IntentNode(name=name, parent=parent)
+        root = IntentNode(name=root_data.get('name', 'Unknown'))
 
-        # Recursively build children
-        children_data = node_data.get('children', [])
-        for child_data in children_data:
-            child_node = self._build_node_recursive(
-                child_data,
-                node,
-                path + [name]
-            )
-            node.children.append(child_node)
+        stack = [(root_data, root)]
+        while stack:
+            node_data, node = stack.pop()
+            for child_data in node_data.get('children', []):
+                child_node = IntentNode(name=child_data.get('name', 'Unknown'), parent=node)
+                node.children.append(child_node)
+                stack.append((child_data, child_node))
 
-        return node
+        return root
 
     def _count_nodes(self, node: IntentNode) -> int:
         """Count total nodes in tree"""
-        count = 1
-        for child in node.children:
-            count += self._count_nodes(child)
-        return count
+        return sum(1 for _ in node.walk())
 
     def _get_default_medical_taxonomy(self) -> IntentNode:
         """Return default medical intent taxonomy"""
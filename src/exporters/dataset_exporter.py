@@ -2,14 +2,148 @@
 Dataset exporters for SLM training
 Supports Alpaca, ShareGPT, and custom formats
 """
-import json
 import csv
-from typing import List, Dict, Any
+import functools
+import mmap
+import os
+from collections import deque
+from typing import List, Dict, Any, Callable, Iterable, Iterator, Optional, Tuple
 from pathlib import Path
 import logging
 
+from ..utils import json_utils
+from ..utils.uring_writer import write_jsonl_uring
+
 logger = logging.getLogger(__name__)
 
+# Alpaca instructions for distillation (question + intent) and classification (input + intent) results
+DISTILLATION_INSTRUCTION = "Classify the intent of the following user query."
+CLASSIFICATION_INSTRUCTION = "Classify the intent of the following user input."
+
+# Display labels for turn roles in flattened conversation text
+_ROLE_LABELS = {"user": "User", "assistant": "Assistant", "system": "System"}
+
+
+@functools.lru_cache(maxsize=256)
+def _ensure_dir(path: str) -> None:
+    """Create a directory (and parents) once per process; repeat calls are free"""
+    Path(path).mkdir(parents=True, exist_ok=True)
+
+
+def _is_blank(buffer, start: int, end: int) -> bool:
+    """Whether buffer[start:end] is whitespace only (a blank JSONL line)"""
+    # Records start with "{" or "[", so one byte settles almost every line
+    if start == end or not buffer[start:start + 1].isspace():
+        return start == end
+    return buffer[start:end].isspace()
+
+
+def _format_turn(turn: Dict[str, Any]) -> str:
+    """Format a turn as 'Role: content' for flattened conversation text"""
+    role = turn["role"]
+    return f"{_ROLE_LABELS.get(role) or role.capitalize()}: {turn['content']}"
+
+
+def _csv_cell(value: Any) -> Any:
+    """Encode a value for a CSV cell (lists and dicts as JSON text)"""
+    if isinstance(value, (list, dict)):
+        return json_utils.dumps(value).decode("utf-8")
+    return value
+
+
+def _map_by_schema(
+    results: Iterable[Dict[str, Any]],
+    pick_handler: Callable[[Dict[str, Any]], Optional[Callable]],
+    context: Any,
+    default: Optional[Callable] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Build a record per result with the handler for the result's schema
+
+    A handler is picked once and reused while rows fit it; a row missing a
+    field the handler reads (KeyError) gets a handler picked for its own
+    schema. Rows of unknown schema go to default, or are skipped.
+    """
+    handler = None
+    for result in results:
+        if handler is not None:
+            try:
+                yield handler(result, context)
+                continue
+            except KeyError:
+                pass
+
+        handler = pick_handler(result)
+        if handler is not None:
+            yield handler(result, context)
+        elif default is not None:
+            yield default(result, context)
+
+
+def _alpaca_handler(result: Dict[str, Any]) -> Optional[Callable]:
+    """Alpaca builder for a result's schema, or None if it has none"""
+    if "intent" not in result:
+        return None
+    if "question" in result:
+        return _alpaca_distillation
+    if "input" in result:
+        return _alpaca_classification
+    return None
+
+
+def _alpaca_distillation(result: Dict[str, Any], system_prompt: str) -> Dict[str, Any]:
+    """Alpaca record for a distillation result (question + intent)"""
+    return {
+        "instruction": system_prompt or DISTILLATION_INSTRUCTION,
+        "input": result["question"],
+        "output": result["intent"]
+    }
+
+
+def _alpaca_classification(result: Dict[str, Any], system_prompt: str) -> Dict[str, Any]:
+    """Alpaca record for a classification result (input + intent + confidence)"""
+    return {
+        "instruction": CLASSIFICATION_INSTRUCTION,
+        "input": result["input"],
+        "output": f"Intent: {result['intent']}\nConfidence: {result['confidence']}\nReasoning: {result['reasoning']}",
+        "system": system_prompt
+    }
+
+
+def _sharegpt_handler(result: Dict[str, Any]) -> Optional[Callable]:
+    """ShareGPT builder for a result's schema, or None if it has none"""
+    if "intent" not in result:
+        return None
+    if "question" in result:
+        return _sharegpt_distillation
+    if "input" in result:
+        return _sharegpt_classification
+    return None
+
+
+def _sharegpt_distillation(result: Dict[str, Any], system_messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """ShareGPT record for a distillation result (question + intent)"""
+    return {"messages": system_messages + [
+        {"role": "user", "content": result["question"]},
+        {"role": "assistant", "content": result["intent"]}
+    ]}
+
+
+def _sharegpt_classification(result: Dict[str, Any], system_messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """ShareGPT record for a classification result (input + intent + confidence)"""
+    return {"messages": system_messages + [
+        {"role": "user", "content": f"Classify the intent: {result['input']}"},
+        {
+            "role": "assistant",
+            "content": f"The intent is '{result['intent']}' with confidence {result['confidence']}. {result['reasoning']}"
+        }
+    ]}
+
+
+def _sharegpt_other(result: Dict[str, Any], system_messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """ShareGPT record for a result of unknown schema (system prompt only)"""
+    return {"messages": list(system_messages)}
+
 
 class DatasetExporter:
     """Export classification results to SLM training formats"""
@@ -28,32 +162,15 @@ class DatasetExporter:
             output_path: Output file path
             system_prompt: Optional system prompt
         """
-        alpaca_data = []
-
-        for result in results:
-            # For distillation results (question + intent)
-            if "question" in result and "intent" in result:
-                instruction = system_prompt or "Classify the intent of the following user query."
-                alpaca_data.append({
-                    "instruction": instruction,
-                    "input": result["question"],
-                    "output": result["intent"]
-                })
+        with open(output_path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            count = json_utils.write_json_array(f, DatasetExporter._iter_alpaca(results, system_prompt))
 
-            # For classification results (input + intent + confidence)
-            elif "input" in result and "intent" in result:
-                alpaca_data.append({
-                    "instruction": "Classify the intent of the following user input.",
-                    "input": result["input"],
-                    "output": f"Intent: {result['intent']}\nConfidence: {result['confidence']}\nReasoning: {result['reasoning']}",
-                    "system": system_prompt
-                })
-
-        # Write to file
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(alpaca_data, f, ensure_ascii=False, indent=2)
+        logger.info(f"Exported {count} samples to Alpaca format: {output_path}")
 
-        logger.info(f"Exported {len(alpaca_data)} samples to Alpaca format: {output_path}")
+    @staticmethod
+    def _iter_alpaca(results: Iterable[Dict[str, Any]], system_prompt: str = "") -> Iterator[Dict[str, Any]]:
+        """Yield Alpaca records for results, skipping ones of unknown shape"""
+        return _map_by_schema(results, _alpaca_handler, system_prompt)
 
     @staticmethod
     def export_to_sharegpt(
@@ -69,60 +186,40 @@ class DatasetExporter:
             output_path: Output file path
             system_prompt: Optional system prompt
         """
-        sharegpt_data = []
-
-        for result in results:
-            messages = []
-
-            if system_prompt:
-                messages.append({
-                    "role": "system",
-                    "content": system_prompt
-                })
-
-            # For distillation results (question + intent)
-            if "question" in result and "intent" in result:
-                messages.append({
-                    "role": "user",
-                    "content": result["question"]
-                })
-                messages.append({
-                    "role": "assistant",
-                    "content": result["intent"]
-                })
-
-            # For classification results (input + intent + confidence)
-            elif "input" in result and "intent" in result:
-                messages.append({
-                    "role": "user",
-                    "content": f"Classify the intent: {result['input']}"
-                })
-                messages.append({
-                    "role": "assistant",
-                    "content": f"The intent is '{result['intent']}' with confidence {result['confidence']}. {result['reasoning']}"
-                })
+        with open(output_path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            count = json_utils.write_json_array(f, DatasetExporter._iter_sharegpt(results, system_prompt))
 
-            sharegpt_data.append({"messages": messages})
+        logger.info(f"Exported {count} samples to ShareGPT format: {output_path}")
 
-        # Write to file
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(sharegpt_data, f, ensure_ascii=False, indent=2)
-
-        logger.info(f"Exported {len(sharegpt_data)} samples to ShareGPT format: {output_path}")
+    @staticmethod
+    def _iter_sharegpt(results: Iterable[Dict[str, Any]], system_prompt: str = "") -> Iterator[Dict[str, Any]]:
+        """Yield ShareGPT records for results"""
+        system_messages = [{"role": "system", "content": system_prompt}] if system_prompt else []
+        return _map_by_schema(results, _sharegpt_handler, system_messages, default=_sharegpt_other)
 
     @staticmethod
     def export_to_json(results: List[Dict[str, Any]], output_path: str) -> None:
         """Export to JSON format"""
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(results, f, ensure_ascii=False, indent=2)
+        with open(output_path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            f.write(json_utils.dumps(results, indent=True))
         logger.info(f"Exported {len(results)} results to JSON: {output_path}")
 
     @staticmethod
-    def export_to_jsonl(results: List[Dict[str, Any]], output_path: str) -> None:
-        """Export to JSONL format"""
-        with open(output_path, "w", encoding="utf-8") as f:
-            for result in results:
-                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+    def export_to_jsonl(results: List[Dict[str, Any]], output_path: str, use_uring: bool = False) -> None:
+        """
+        Export to JSONL format
+
+        Args:
+            results: Records to export
+            output_path: Output file path
+            use_uring: Submit writes through io_uring (Linux, needs liburing;
+                falls back to buffered writes otherwise)
+        """
+        if use_uring:
+            write_jsonl_uring(output_path, results)
+        else:
+            with open(output_path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+                json_utils.write_jsonl_parallel(f, results)
         logger.info(f"Exported {len(results)} results to JSONL: {output_path}")
 
     @staticmethod
@@ -137,18 +234,9 @@ class DatasetExporter:
         fieldnames = list(first_result.keys())
 
         with open(output_path, "w", newline="", encoding="utf-8") as f:
-            writer = csv.DictWriter(f, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for result in results:
-                # Convert lists to strings for CSV
-                row = {}
-                for key, value in result.items():
-                    if isinstance(value, (list, dict)):
-                        row[key] = json.dumps(value, ensure_ascii=False)
-                    else:
-                        row[key] = value
-                writer.writerow(row)
+            writer = csv.writer(f)
+            writer.writerow(fieldnames)
+            writer.writerows([_csv_cell(result.get(key)) for key in fieldnames] for result in results)
 
         logger.info(f"Exported {len(results)} results to CSV: {output_path}")
 
@@ -168,34 +256,47 @@ class DatasetExporter:
             mode: "intent-classification" or "conversation"
             system_prompt: Optional system prompt
         """
-        alpaca_data = []
+        with open(output_path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            count = json_utils.write_json_array(
+                f, DatasetExporter._iter_conversations_alpaca(conversations, mode, system_prompt)
+            )
 
+        logger.info(f"Exported {count} conversation samples to Alpaca format: {output_path}")
+
+    @staticmethod
+    def _iter_conversations_alpaca(
+        conversations: Iterable[Dict[str, Any]],
+        mode: str = "intent-classification",
+        system_prompt: str = ""
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield Alpaca samples for conversations"""
         for conv in conversations:
             if mode == "intent-classification":
                 # Extract each user turn as a separate intent classification sample
-                turns = conv.get("turns", [])
-                for i, turn in enumerate(turns):
+                # Context is the last 4 formatted turns, kept as a rolling window
+                window = deque(maxlen=4)
+                for turn in conv.get("turns", []):
                     if turn["role"] == "user" and "intent" in turn:
-                        # Build context from previous turns
-                        context_turns = turns[:i]
-                        if context_turns:
-                            context = "\n".join([f"{t['role'].capitalize()}: {t['content']}" for t in context_turns[-4:]])
+                        if window:
+                            context = "\n".join(window)
                             input_text = f"Previous conversation:\n{context}\n\nCurrent message:\n{turn['content']}"
                             instruction = "Given the conversation context, classify the intent of the user's current message."
                         else:
                             input_text = turn['content']
                             instruction = system_prompt or "Classify the intent of the following user query."
 
-                        alpaca_data.append({
+                        yield {
                             "instruction": instruction,
                             "input": input_text,
                             "output": turn['intent'],
                             "metadata": {
                                 "conversation_id": conv.get("conversation_id"),
                                 "turn": turn.get("turn"),
-                                "has_context": bool(context_turns)
+                                "has_context": bool(window)
                             }
-                        })
+                        }
+
+                    window.append(_format_turn(turn))
 
             elif mode == "conversation":
                 # Export full conversation as a single sample
@@ -204,9 +305,9 @@ class DatasetExporter:
                     continue
 
                 first_user_msg = next((t["content"] for t in turns if t["role"] == "user"), "")
-                full_conv = "\n".join([f"{t['role'].capitalize()}: {t['content']}" for t in turns])
+                full_conv = "\n".join(map(_format_turn, turns))
 
-                alpaca_data.append({
+                yield {
                     "instruction": system_prompt or "You are a helpful assistant. Engage in a multi-turn conversation.",
                     "input": first_user_msg,
                     "output": full_conv,
@@ -215,12 +316,7 @@ class DatasetExporter:
                         "primary_intent": conv.get("primary_intent"),
                         "all_intents": conv.get("all_intents", [])
                     }
-                })
-
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(alpaca_data, f, ensure_ascii=False, indent=2)
-
-        logger.info(f"Exported {len(alpaca_data)} conversation samples to Alpaca format: {output_path}")
+                }
 
     @staticmethod
     def export_conversations_to_sharegpt(
@@ -264,11 +360,83 @@ class DatasetExporter:
                 }
             })
 
-        with open(output_path, "w", encoding="utf-8") as f:
-            json.dump(sharegpt_data, f, ensure_ascii=False, indent=2)
+        with open(output_path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            f.write(json_utils.dumps(sharegpt_data, indent=True))
 
         logger.info(f"Exported {len(sharegpt_data)} conversations to ShareGPT format: {output_path}")
 
+    @staticmethod
+    def split_jsonl_file(
+        input_path: str,
+        train_path: str,
+        test_path: str,
+        split: float
+    ) -> Tuple[int, int]:
+        """
+        Split a JSONL file into train/test files by byte range, without parsing
+
+        Args:
+            input_path: Input JSONL file
+            train_path: Output file for the first `split` fraction of records
+            test_path: Output file for the remaining records
+            split: Train ratio (e.g., 0.8)
+
+        Returns:
+            (train record count, test record count)
+        """
+        for path in (train_path, test_path):
+            _ensure_dir(str(Path(path).parent))
+
+        with open(input_path, "rb") as src:
+            size = os.fstat(src.fileno()).st_size
+
+            # Locate record boundaries (one record per line; blank lines are
+            # not records, as when the file is loaded line by line)
+            line_ends = []
+            if size:
+                with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    start = 0
+                    while start < size:
+                        pos = mm.find(b"\n", start)
+                        end = size if pos == -1 else pos + 1
+                        if not _is_blank(mm, start, end):
+                            line_ends.append(end)
+                        start = end
+
+            total = len(line_ends)
+            split_idx = int(total * split)
+            boundary = line_ends[split_idx - 1] if split_idx else 0
+
+            DatasetExporter._copy_range(src, train_path, 0, boundary)
+            DatasetExporter._copy_range(src, test_path, boundary, size - boundary)
+
+        logger.info(f"Split {total} records into {train_path} ({split_idx}) and {test_path} ({total - split_idx})")
+        return split_idx, total - split_idx
+
+    @staticmethod
+    def _copy_range(src, output_path: str, offset: int, length: int) -> None:
+        """Copy a byte range of an open file into a new file (zero-copy where supported)"""
+        with open(output_path, "wb") as dst:
+            if hasattr(os, "sendfile"):
+                try:
+                    while length > 0:
+                        sent = os.sendfile(dst.fileno(), src.fileno(), offset, length)
+                        if sent == 0:
+                            break
+                        offset += sent
+                        length -= sent
+                    return
+                except OSError:
+                    pass  # e.g. unsupported file system; copy the rest in user space
+
+            src.seek(offset)
+            while length > 0:
+                chunk = src.read(min(length, json_utils.WRITE_BUFFER_SIZE))
+                if not chunk:
+                    break
+                dst.write(chunk)
+                length -= len(chunk)
+
     @classmethod
     def export(
         cls,
@@ -287,33 +455,112 @@ class DatasetExporter:
             **kwargs: Additional arguments (e.g., system_prompt, mode)
         """
         # Create output directory if needed
-        Path(output_path).parent.mkdir(parents=True, exist_ok=True)
+        _ensure_dir(str(Path(output_path).parent))
+
+        cls._export_format(results, output_path, format, cls._is_conversation_data(results), **kwargs)
+
+    @classmethod
+    def export_all(
+        cls,
+        results: List[Dict[str, Any]],
+        output_dir: str,
+        formats: Iterable[str] = ("jsonl", "alpaca", "sharegpt"),
+        basename: str = "dataset",
+        **kwargs
+    ) -> Dict[str, str]:
+        """
+        Export the same results to several formats in one pass over the setup
+
+        Args:
+            results: List of classification results, distillation results, or conversations
+            output_dir: Directory for the exported files
+            formats: Export formats (json, jsonl, csv, alpaca, sharegpt)
+            basename: File name (without extension) shared by every export
+            **kwargs: Additional arguments (e.g., system_prompt, mode)
+
+        Returns:
+            Mapping of format to output file path
+        """
+        _ensure_dir(output_dir)
+        is_conversation = cls._is_conversation_data(results)
+
+        paths = {}
+        for format in formats:
+            extension = format if format in ("jsonl", "csv") else "json"
+            paths[format] = str(Path(output_dir) / f"{basename}_{format}.{extension}")
+            cls._export_format(results, paths[format], format, is_conversation, **kwargs)
 
-        # Check if this is conversation data
-        is_conversation = (
+        return paths
+
+    @staticmethod
+    def _is_conversation_data(results: List[Dict[str, Any]]) -> bool:
+        """Whether results are multi-turn conversations (checked on the first record)"""
+        return bool(
             results and
             isinstance(results[0], dict) and
             "conversation_id" in results[0] and
             "turns" in results[0]
         )
 
-        mode = kwargs.get("mode") or "intent-classification"
-
-        if format == "json":
-            cls.export_to_json(results, output_path)
-        elif format == "jsonl":
-            cls.export_to_jsonl(results, output_path)
-        elif format == "csv":
-            cls.export_to_csv(results, output_path)
-        elif format == "alpaca":
-            if is_conversation:
-                cls.export_conversations_to_alpaca(results, output_path, mode, kwargs.get("system_prompt", ""))
-            else:
-                cls.export_to_alpaca(results, output_path, kwargs.get("system_prompt", ""))
-        elif format == "sharegpt":
-            if is_conversation:
-                cls.export_conversations_to_sharegpt(results, output_path, kwargs.get("system_prompt", ""))
-            else:
-                cls.export_to_sharegpt(results, output_path, kwargs.get("system_prompt", ""))
+    # Export format -> writer method taking (results, output_path, is_conversation, system_prompt, mode)
+    _FORMATS = {
+        "json": "_write_json",
+        "jsonl": "_write_jsonl",
+        "csv": "_write_csv",
+        "alpaca": "_write_alpaca",
+        "sharegpt": "_write_sharegpt",
+    }
+
+    @classmethod
+    def _export_format(
+        cls,
+        results: List[Dict[str, Any]],
+        output_path: str,
+        format: str,
+        is_conversation: bool,
+        **kwargs
+    ) -> None:
+        """Dispatch one export to the writer for its format"""
+        try:
+            writer = getattr(cls, cls._FORMATS[format])
+        except KeyError:
+            raise ValueError(f"Unsupported export format: {format}") from None
+
+        writer(
+            results,
+            output_path,
+            is_conversation,
+            kwargs.get("system_prompt", ""),
+            kwargs.get("mode") or "intent-classification"
+        )
+
+    @classmethod
+    def _write_json(cls, results, output_path, is_conversation, system_prompt, mode) -> None:
+        """JSON array of the raw results"""
+        cls.export_to_json(results, output_path)
+
+    @classmethod
+    def _write_jsonl(cls, results, output_path, is_conversation, system_prompt, mode) -> None:
+        """One raw result per line"""
+        cls.export_to_jsonl(results, output_path)
+
+    @classmethod
+    def _write_csv(cls, results, output_path, is_conversation, system_prompt, mode) -> None:
+        """CSV table of the raw results"""
+        cls.export_to_csv(results, output_path)
+
+    @classmethod
+    def _write_alpaca(cls, results, output_path, is_conversation, system_prompt, mode) -> None:
+        """Alpaca samples from results or conversations"""
+        if is_conversation:
+            cls.export_conversations_to_alpaca(results, output_path, mode, system_prompt)
+        else:
+            cls.export_to_alpaca(results, output_path, system_prompt)
+
+    @classmethod
+    def _write_sharegpt(cls, results, output_path, is_conversation, system_prompt, mode) -> None:
+        """ShareGPT samples from results or conversations"""
+        if is_conversation:
+            cls.export_conversations_to_sharegpt(results, output_path, system_prompt)
         else:
-            raise ValueError(f"Unsupported export format: {format}")
+            cls.export_to_sharegpt(results, output_path, system_prompt)
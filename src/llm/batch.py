@@ -0,0 +1,198 @@
+"""
+Batch API support
+Submits many chat completion requests as a single OpenAI-style batch job
+(half the token price, results within the provider's completion window)
+"""
+import io
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from .client import LLMClient
+from ..utils import json_utils
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+
+def build_batch_request(
+    llm_client: LLMClient,
+    custom_id: str,
+    messages: List[Dict[str, Any]],
+    response_format: Optional[Dict[str, str]] = None
+) -> Dict[str, Any]:
+    """
+    Build one line of a batch input file
+
+    Args:
+        llm_client: Client whose model and sampling settings are used
+        custom_id: Identifier used to match the result back to its request
+        messages: Chat messages
+        response_format: Optional response format (e.g., {"type": "json_object"})
+
+    Returns:
+        Batch request dict
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": llm_client._build_params(messages, None, None, response_format)
+    }
+
+
+class BatchDistillationBackend:
+    """Submit, poll and fetch OpenAI-style batch jobs for one LLM client"""
+
+    def __init__(self, llm_client: LLMClient):
+        """
+        Initialize batch backend
+
+        Args:
+            llm_client: LLM client (its OpenAI-compatible client is used)
+        """
+        self.client = llm_client.client
+
+    def submit(self, requests: List[Dict[str, Any]]) -> str:
+        """
+        Upload requests as a JSONL file and create a batch job
+
+        Args:
+            requests: Batch request dicts from build_batch_request()
+
+        Returns:
+            Batch job id
+        """
+        payload = b"".join(json_utils.dumps(request) + b"\n" for request in requests)
+        input_file = self.client.files.create(
+            file=("batch_input.jsonl", io.BytesIO(payload)),
+            purpose="batch"
+        )
+
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window="24h"
+        )
+        logger.info(f"Submitted batch {batch.id} with {len(requests)} requests")
+        return batch.id
+
+    def poll(
+        self,
+        job_id: str,
+        poll_interval: float = 60,
+        max_poll_interval: float = 600,
+        on_status: Optional[Callable[[Any], None]] = None
+    ) -> Any:
+        """
+        Wait for a batch job to reach a terminal status
+
+        Args:
+            job_id: Batch job id
+            poll_interval: Initial seconds between status polls
+            max_poll_interval: Upper bound for the exponentially growing poll interval
+            on_status: Optional callback receiving each polled batch object
+
+        Returns:
+            Final batch object
+        """
+        batch = self.client.batches.retrieve(job_id)
+
+        interval = poll_interval
+        while batch.status not in TERMINAL_STATUSES:
+            time.sleep(interval)
+            interval = min(interval * 1.5, max_poll_interval)
+            batch = self.client.batches.retrieve(job_id)
+            logger.debug(f"Batch {job_id} status: {batch.status}")
+            if on_status:
+                on_status(batch)
+
+        return batch
+
+    def fetch(self, job_id: str) -> Dict[str, Any]:
+        """
+        Download the results of a completed batch job
+
+        Args:
+            job_id: Batch job id
+
+        Returns:
+            Dict mapping custom_id to the response text, or to an Exception
+            for requests that failed
+
+        Raises:
+            RuntimeError if the batch job did not complete
+        """
+        batch = self.client.batches.retrieve(job_id)
+        if batch.status != "completed":
+            raise RuntimeError(f"Batch {job_id} ended with status '{batch.status}'")
+
+        results: Dict[str, Any] = {}
+        if batch.output_file_id:
+            results.update(_parse_output(self.client.files.content(batch.output_file_id).content))
+        if batch.error_file_id:
+            results.update(_parse_output(self.client.files.content(batch.error_file_id).content))
+
+        logger.info(f"Batch {job_id} completed")
+        return results
+
+
+def run_batch(
+    llm_client: LLMClient,
+    requests: List[Dict[str, Any]],
+    poll_interval: float = 60,
+    max_poll_interval: float = 600,
+    on_status: Optional[Callable[[Any], None]] = None
+) -> Dict[str, Any]:
+    """
+    Upload requests as a batch job, wait for it to finish and collect results
+
+    Args:
+        llm_client: LLM client (its OpenAI-compatible client is used)
+        requests: Batch request dicts from build_batch_request()
+        poll_interval: Initial seconds between status polls
+        max_poll_interval: Upper bound for the exponentially growing poll interval
+        on_status: Optional callback receiving each polled batch object
+
+    Returns:
+        Dict mapping custom_id to the response text, or to an Exception for
+        requests that failed
+
+    Raises:
+        RuntimeError if the batch job does not complete
+    """
+    backend = BatchDistillationBackend(llm_client)
+
+    job_id = backend.submit(requests)
+    backend.poll(job_id, poll_interval, max_poll_interval, on_status)
+    results = backend.fetch(job_id)
+
+    # Requests missing from both files are reported as failures
+    for request in requests:
+        results.setdefault(request["custom_id"], RuntimeError("No result returned by batch"))
+
+    return results
+
+
+def _parse_output(content: bytes) -> Dict[str, Any]:
+    """Parse a batch output/error file into custom_id -> text or Exception"""
+    results = {}
+    for line in content.splitlines():
+        if not line.strip():
+            continue
+
+        record = json_utils.loads(line)
+        custom_id = record.get("custom_id")
+        response = record.get("response") or {}
+
+        if record.get("error") or response.get("status_code") != 200:
+            error = record.get("error") or response.get("body", {}).get("error")
+            results[custom_id] = RuntimeError(f"Batch request failed: {error}")
+            continue
+
+        message = response["body"]["choices"][0]["message"]
+        results[custom_id] = message.get("content") or ""
+
+    return results
@@ -0,0 +1,83 @@
+"""
+Circuit breaker
+Stops sending LLM requests for a while after repeated transient failures,
+so workers fail fast during a provider outage instead of piling up retries
+"""
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of sending a request while the circuit is open"""
+
+
+class CircuitBreaker:
+    """Consecutive-failure circuit breaker shared by worker threads and asyncio tasks"""
+
+    def __init__(self, fail_max: int = 20, reset_timeout: float = 30):
+        """
+        Initialize circuit breaker
+
+        Args:
+            fail_max: Consecutive failures that open the circuit; 0 disables it
+            reset_timeout: Seconds the circuit stays open before letting a
+                single trial request through (half-open); concurrent callers
+                keep being rejected until it succeeds, or for another
+                reset_timeout if it fails or never reports back
+        """
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        """True while requests are being rejected"""
+        with self._lock:
+            return self._opened_at is not None and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def check(self) -> None:
+        """
+        Raise CircuitOpenError if requests are currently rejected
+
+        Once reset_timeout has elapsed, the first caller is let through as
+        the trial request and the timeout is re-armed, so the other callers
+        stay rejected while it runs. Its success closes the circuit and a
+        transient failure re-opens it.
+        """
+        with self._lock:
+            if self._opened_at is None:
+                return
+            now = time.monotonic()
+            if now - self._opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"LLM circuit open after {self._failures} consecutive failures")
+            self._opened_at = now
+
+        logger.info("LLM circuit half-open; sending a trial request")
+
+    def record_success(self) -> None:
+        """Close the circuit"""
+        with self._lock:
+            if self._opened_at is not None:
+                logger.info("LLM circuit closed")
+            self._failures = 0
+            self._opened_at = None
+
+    def record_failure(self) -> None:
+        """Count a failure, opening the circuit at fail_max"""
+        if not self.fail_max:
+            return
+
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.fail_max:
+                if self._opened_at is None:
+                    logger.warning(
+                        f"LLM circuit opened after {self._failures} consecutive failures; "
+                        f"rejecting requests for {self.reset_timeout}s"
+                    )
+                self._opened_at = time.monotonic()
@@ -2,14 +2,46 @@
 LLM Client for DeepSeek and OpenRouter APIs
 Based on easy-dataset's LLM client architecture
 """
+import asyncio
+import hashlib
 import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from importlib.util import find_spec
+from pathlib import Path
 from typing import Dict, List, Optional, Union, Any
-from openai import OpenAI
-from tenacity import retry, stop_after_attempt, wait_exponential
+import httpx
+from openai import (
+    OpenAI,
+    AsyncOpenAI,
+    APIConnectionError,
+    InternalServerError,
+    RateLimitError
+)
 import logging
 
+from .circuit_breaker import CircuitBreaker
+from ..cache.llm_cache import SQLiteCacheBackend
+from .rate_limiter import RateLimiter
+from ..utils import json_utils
+
+# h2 (from httpx[http2]) enables HTTP/2 multiplexing in httpx
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
 logger = logging.getLogger(__name__)
 
+# Errors worth retrying: rate limits, connection failures/timeouts and 5xx.
+# Other API errors (bad request, auth, not found) fail fast.
+TRANSIENT_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+# JSON object in a markdown code block, or anywhere in the text
+_JSON_BLOCK_RE = re.compile(r"```(?:json)?\s*(\{.*?\})\s*```", re.DOTALL)
+_JSON_OBJ_RE = re.compile(r"\{.*?\}", re.DOTALL)
+
 
 class LLMClient:
     """
@@ -29,6 +61,24 @@ class LLMClient:
                 - temperature: Sampling temperature (default: 0.7)
                 - max_tokens: Maximum tokens to generate (default: 2048)
                 - top_p: Nucleus sampling parameter (default: 0.9)
+                - timeout: Request timeout in seconds (default: 60)
+                - max_connections: Connection pool size (default: 100)
+                - max_keepalive_connections: Idle pooled connections (default: 50)
+                - max_retries: Retries on transient errors (default: 4)
+                - requests_per_minute: Provider RPM limit (default: unlimited)
+                - tokens_per_minute: Provider TPM limit, applied to an estimate
+                  of prompt + max_tokens per request (default: unlimited)
+                - max_concurrent_requests: Requests in flight at once across
+                  all workers using this client (default: unlimited)
+                - circuit_breaker_fail_max: Consecutive failed requests that
+                  pause all requests (default: 20, 0 disables)
+                - circuit_breaker_reset_timeout: Seconds to pause (default: 30)
+                - structured_output: Send JSON schemas as response_format
+                  json_schema (provider must support it; default: False)
+                - cache_dir: Directory for an on-disk memo of deterministic
+                  (temperature 0) completions (default: disabled)
+                - cache_ttl: Seconds a memoized completion stays valid
+                  (default: 604800, one week)
         """
         self.api_key = config.get("api_key")
         self.base_url = config.get("base_url")
@@ -36,22 +86,133 @@ class LLMClient:
         self.temperature = config.get("temperature", 0.7)
         self.max_tokens = config.get("max_tokens", 2048)
         self.top_p = config.get("top_p", 0.9)
+        self.max_retries = config.get("max_retries", 4)
+        self.structured_output = config.get("structured_output", False)
+        self.rate_limiter = RateLimiter(config.get("requests_per_minute"), config.get("tokens_per_minute"))
+        self.max_concurrent_requests = config.get("max_concurrent_requests")
+        self._request_slots = (
+            threading.BoundedSemaphore(self.max_concurrent_requests)
+            if self.max_concurrent_requests else None
+        )
+        self._async_request_slots: Optional[asyncio.Semaphore] = None
+        self.circuit_breaker = CircuitBreaker(
+            fail_max=config.get("circuit_breaker_fail_max", 20),
+            reset_timeout=config.get("circuit_breaker_reset_timeout", 30)
+        )
 
         if not self.api_key:
             raise ValueError("API key is required")
 
+        # Memo of completions keyed on the full request (opt-in)
+        cache_dir = config.get("cache_dir")
+        self.response_memo = (
+            SQLiteCacheBackend(str(Path(cache_dir) / "chat_memo.db")) if cache_dir else None
+        )
+        self.response_memo_ttl = config.get("cache_ttl", 7 * 86400)
+
+        # One connection pool per client, shared by every distiller using it
+        self.timeout = config.get("timeout", 60)
+        self._limits = httpx.Limits(
+            max_connections=config.get("max_connections", 100),
+            max_keepalive_connections=config.get("max_keepalive_connections", 50)
+        )
+
         # Initialize OpenAI client (compatible with DeepSeek, OpenRouter, etc.)
         self.client = OpenAI(
             api_key=self.api_key,
-            base_url=self.base_url
+            base_url=self.base_url,
+            http_client=httpx.Client(
+                http2=HTTP2_AVAILABLE,
+                limits=self._limits,
+                timeout=self.timeout
+            ),
+            max_retries=0  # retries are handled by chat()/achat()
         )
 
+        # Async client is created lazily: its pool is bound to the running event loop
+        self._async_client: Optional[AsyncOpenAI] = None
+
         logger.info(f"Initialized LLM client for {self.base_url} with model {self.model}")
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10)
-    )
+    @property
+    def async_client(self) -> AsyncOpenAI:
+        """Async client for concurrent fan-out (asyncio.gather over many requests)"""
+        if self._async_client is None:
+            self._async_client = AsyncOpenAI(
+                api_key=self.api_key,
+                base_url=self.base_url,
+                max_retries=0,
+                http_client=httpx.AsyncClient(
+                    http2=HTTP2_AVAILABLE,
+                    limits=self._limits,
+                    timeout=self.timeout
+                )
+            )
+        return self._async_client
+
+    async def aclose(self):
+        """
+        Close the async connection pool
+
+        Call before the event loop that used it shuts down; a fresh pool is
+        created on the next async request.
+        """
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+        self._async_request_slots = None
+
+    def close(self):
+        """Close the sync connection pool and the response memo"""
+        self.client.close()
+        if self.response_memo is not None:
+            self.response_memo.close()
+
+    def ping(self, timeout: float = 5) -> bool:
+        """
+        Issue a tiny request to warm up DNS, TCP/TLS and the keep-alive pool
+
+        Meant to run in a background thread right after construction so the
+        first real request doesn't pay the connection setup. Never raises.
+
+        Returns:
+            True if the endpoint answered
+        """
+        try:
+            self.client.with_options(timeout=timeout).models.list()
+            return True
+        except Exception as e:
+            logger.debug(f"Warm-up request to {self.base_url} failed: {e}")
+            return False
+
+    async def aping(self, timeout: float = 5) -> bool:
+        """
+        Async variant of ping(), warming the async connection pool
+
+        Returns:
+            True if the endpoint answered
+        """
+        try:
+            await self.async_client.with_options(timeout=timeout).models.list()
+            return True
+        except Exception as e:
+            logger.debug(f"Async warm-up request to {self.base_url} failed: {e}")
+            return False
+
+    def _retry_delay(self, attempt: int, error: Exception) -> Optional[float]:
+        """
+        Backoff before retrying a failed attempt, or None to give up
+
+        Only transient errors are retried, up to max_retries times, with
+        exponential backoff and jitter (1s up to 2^attempt s, capped at 60s).
+        """
+        if attempt >= self.max_retries or not isinstance(error, TRANSIENT_ERRORS):
+            return None
+
+        delay = random.uniform(1, min(60, 2 ** attempt))
+        logger.warning(f"Retrying LLM request in {delay:.1f}s after {type(error).__name__}: {error}")
+        return delay
+
     def chat(
         self,
         messages: List[Dict[str, Any]],
@@ -71,38 +232,233 @@ class LLMClient:
         Returns:
             Dict with 'text', 'reasoning' (if available), and 'raw' response
         """
+        params = self._build_params(messages, temperature, max_tokens, response_format)
+        memo_key = self._memo_key(params)
+        cached = self._memo_get(memo_key)
+        if cached is not None:
+            return cached
+
+        self.circuit_breaker.check()
+
         try:
-            params = {
-                "model": self.model,
-                "messages": messages,
-                "temperature": temperature or self.temperature,
-                "max_tokens": max_tokens or self.max_tokens,
-                "top_p": self.top_p,
-            }
-
-            if response_format:
-                params["response_format"] = response_format
-
-            response = self.client.chat.completions.create(**params)
-
-            # Extract text and reasoning (if available)
-            choice = response.choices[0]
-            text = choice.message.content or ""
-            reasoning = getattr(choice.message, "reasoning_content", None)
-
-            result = {
-                "text": text,
-                "reasoning": reasoning,
-                "raw": response
-            }
-
-            logger.debug(f"LLM response: {text[:100]}...")
+            attempt = 0
+            while True:
+                try:
+                    response = self._chat_once(params)
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(attempt, e)
+                    if delay is None:
+                        raise
+                    time.sleep(delay)
+                    attempt += 1
+            self.circuit_breaker.record_success()
+            result = self._parse_response(response)
+            self._memo_set(memo_key, result)
             return result
 
         except Exception as e:
+            if isinstance(e, TRANSIENT_ERRORS):
+                self.circuit_breaker.record_failure()
             logger.error(f"Error in LLM chat: {e}")
             raise
 
+    async def achat(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float] = None,
+        max_tokens: Optional[int] = None,
+        response_format: Optional[Dict[str, str]] = None
+    ) -> Dict[str, Any]:
+        """
+        Async variant of chat(), safe to fan out with asyncio.gather
+
+        Args:
+            messages: List of message dicts with 'role' and 'content'
+            temperature: Override default temperature
+            max_tokens: Override default max tokens
+            response_format: Optional response format (e.g., {"type": "json_object"})
+
+        Returns:
+            Dict with 'text', 'reasoning' (if available), and 'raw' response
+        """
+        params = self._build_params(messages, temperature, max_tokens, response_format)
+        memo_key = self._memo_key(params)
+        cached = self._memo_get(memo_key)
+        if cached is not None:
+            return cached
+
+        self.circuit_breaker.check()
+
+        try:
+            attempt = 0
+            while True:
+                try:
+                    response = await self._achat_once(params)
+                    break
+                except Exception as e:
+                    delay = self._retry_delay(attempt, e)
+                    if delay is None:
+                        raise
+                    await asyncio.sleep(delay)
+                    attempt += 1
+            self.circuit_breaker.record_success()
+            result = self._parse_response(response)
+            self._memo_set(memo_key, result)
+            return result
+
+        except Exception as e:
+            if isinstance(e, TRANSIENT_ERRORS):
+                self.circuit_breaker.record_failure()
+            logger.error(f"Error in async LLM chat: {e}")
+            raise
+
+    def _chat_once(self, params: Dict[str, Any]) -> Any:
+        """Send one completion request (no retries)"""
+        self.rate_limiter.acquire(self._estimate_tokens(params))
+        with self._request_slots or nullcontext():
+            return self.client.chat.completions.create(**params)
+
+    async def _achat_once(self, params: Dict[str, Any]) -> Any:
+        """Async variant of _chat_once()"""
+        await self.rate_limiter.aacquire(self._estimate_tokens(params))
+        slots = self._async_slots()
+        if slots is None:
+            return await self.async_client.chat.completions.create(**params)
+        async with slots:
+            return await self.async_client.chat.completions.create(**params)
+
+    def chat_batch(
+        self,
+        batch: List[List[Dict[str, Any]]],
+        max_concurrency: int = 16,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """
+        Run chat() for many message lists concurrently on a thread pool
+
+        Each request keeps chat()'s retries, rate limiting and circuit breaker.
+
+        Args:
+            batch: Message lists, one per request
+            max_concurrency: Maximum requests in flight
+            **kwargs: Additional parameters for chat()
+
+        Returns:
+            chat() results in the order of batch (the first error is raised)
+        """
+        if not batch:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(max_concurrency, len(batch))) as executor:
+            return list(executor.map(lambda messages: self.chat(messages, **kwargs), batch))
+
+    async def achat_batch(
+        self,
+        batch: List[List[Dict[str, Any]]],
+        max_concurrency: int = 16,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Async variant of chat_batch(), bounded by a semaphore"""
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def _chat(messages):
+            async with semaphore:
+                return await self.achat(messages, **kwargs)
+
+        return list(await asyncio.gather(*(_chat(messages) for messages in batch)))
+
+    def _async_slots(self) -> Optional[asyncio.Semaphore]:
+        """Semaphore bounding in-flight async requests, or None if unlimited"""
+        if not self.max_concurrent_requests:
+            return None
+        if self._async_request_slots is None:
+            self._async_request_slots = asyncio.Semaphore(self.max_concurrent_requests)
+        return self._async_request_slots
+
+    def _build_params(
+        self,
+        messages: List[Dict[str, Any]],
+        temperature: Optional[float],
+        max_tokens: Optional[int],
+        response_format: Optional[Dict[str, str]]
+    ) -> Dict[str, Any]:
+        """Build request parameters shared by chat() and achat()"""
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": temperature if temperature is not None else self.temperature,
+            "max_tokens": max_tokens or self.max_tokens,
+            "top_p": self.top_p,
+        }
+
+        if response_format:
+            params["response_format"] = response_format
+
+        return params
+
+    def _memo_key(self, params: Dict[str, Any]) -> Optional[str]:
+        """
+        Memo key for a request, or None if it is not memoized
+
+        Only temperature 0 requests are memoized: sampled requests are
+        expected to return a different answer each time.
+        """
+        if self.response_memo is None or params["temperature"] != 0:
+            return None
+        return hashlib.blake2b(json_utils.dumps(params), digest_size=32).hexdigest()
+
+    def _memo_get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Memoized completion for a key (without the raw response), or None"""
+        if key is None:
+            return None
+        value = self.response_memo.get(key)
+        if value is None:
+            return None
+        cached = json_utils.loads(value)
+        return {"text": cached["text"], "reasoning": cached["reasoning"], "raw": None}
+
+    def _memo_set(self, key: Optional[str], result: Dict[str, Any]) -> None:
+        """Memoize a completion's text and reasoning"""
+        if key is not None:
+            value = json_utils.dumps({"text": result["text"], "reasoning": result["reasoning"]})
+            self.response_memo.set(key, value, self.response_memo_ttl)
+
+    def _estimate_tokens(self, params: Dict[str, Any]) -> int:
+        """Estimate the tokens a request counts against a TPM limit (prompt + max_tokens)"""
+        if not self.rate_limiter.tokens_per_minute:
+            return 0
+
+        # ~4 ASCII characters per token; other (CJK) characters about one each
+        prompt_units = sum(
+            sum(1 if char.isascii() else 4 for char in str(message.get("content") or ""))
+            for message in params["messages"]
+        )
+        return prompt_units // 4 + params["max_tokens"]
+
+    @staticmethod
+    def _parse_response(response: Any) -> Dict[str, Any]:
+        """Extract text and reasoning (if available) from a completion"""
+        choice = response.choices[0]
+        text = choice.message.content or ""
+        reasoning = LLMClient._reasoning_content(choice.message)
+
+        logger.debug(f"LLM response: {text[:100]}...")
+        return {
+            "text": text,
+            "reasoning": reasoning,
+            "raw": response
+        }
+
+    @staticmethod
+    def _reasoning_content(message: Any) -> Optional[str]:
+        """Reasoning text of a completion message (e.g. DeepSeek reasoner), read from its field dicts"""
+        # Undeclared fields live in model_extra on pydantic v2 models, in __dict__ otherwise
+        extra = getattr(message, "model_extra", None)
+        if extra and "reasoning_content" in extra:
+            return extra["reasoning_content"]
+        return vars(message).get("reasoning_content")
+
     def get_response(
         self,
         prompt: Union[str, List[Dict[str, Any]]],
@@ -120,21 +476,55 @@ class LLMClient:
         Returns:
             Text response
         """
+        messages = self._build_messages(prompt, system_prompt)
+        result = self.chat(messages, **kwargs)
+        return result["text"]
+
+    async def aget_response(
+        self,
+        prompt: Union[str, List[Dict[str, Any]]],
+        system_prompt: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """Async variant of get_response()"""
+        messages = self._build_messages(prompt, system_prompt)
+        result = await self.achat(messages, **kwargs)
+        return result["text"]
+
+    @staticmethod
+    def _build_messages(
+        prompt: Union[str, List[Dict[str, Any]]],
+        system_prompt: Optional[str] = None
+    ) -> List[Dict[str, Any]]:
+        """Normalize a prompt string (or messages list) into a messages list"""
         if isinstance(prompt, str):
             messages = []
             if system_prompt:
                 messages.append({"role": "system", "content": system_prompt})
             messages.append({"role": "user", "content": prompt})
-        else:
-            messages = prompt
+            return messages
+        return prompt
 
-        result = self.chat(messages, **kwargs)
-        return result["text"]
+    def json_response_format(self, schema: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Build the response_format for a JSON request
+
+        Args:
+            schema: Optional json_schema spec ({"name", "schema", "strict"});
+                only sent when structured output is enabled for this provider
+
+        Returns:
+            response_format dict (json_schema, or plain JSON mode)
+        """
+        if schema and self.structured_output:
+            return {"type": "json_schema", "json_schema": schema}
+        return {"type": "json_object"}
 
     def get_json_response(
         self,
         prompt: Union[str, List[Dict[str, Any]]],
         system_prompt: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
@@ -143,48 +533,64 @@ class LLMClient:
         Args:
             prompt: User prompt
             system_prompt: Optional system prompt
+            schema: Optional JSON schema enforced server-side when supported
             **kwargs: Additional parameters
 
         Returns:
             Parsed JSON dict
         """
-        # Try to use JSON mode if supported
         response_text = self.get_response(
             prompt,
             system_prompt,
-            response_format={"type": "json_object"},
+            response_format=self.json_response_format(schema),
             **kwargs
         )
 
-        # Parse JSON from response
+        return self._parse_json_text(response_text)
+
+    async def aget_json_response(
+        self,
+        prompt: Union[str, List[Dict[str, Any]]],
+        system_prompt: Optional[str] = None,
+        schema: Optional[Dict[str, Any]] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Async variant of get_json_response()"""
+        response_text = await self.aget_response(
+            prompt,
+            system_prompt,
+            response_format=self.json_response_format(schema),
+            **kwargs
+        )
+        return self._parse_json_text(response_text)
+
+    @classmethod
+    def _parse_json_text(cls, response_text: str) -> Dict[str, Any]:
+        """Parse JSON from response text"""
         try:
-            return json.loads(response_text)
+            return json_utils.loads(response_text)
         except json.JSONDecodeError:
-            # Fallback: extract JSON from markdown code blocks
-            return self._extract_json_from_text(response_text)
+            # Fallback for plain JSON mode: extract JSON from markdown code blocks
+            return cls._extract_json_from_text(response_text)
 
     @staticmethod
     def _extract_json_from_text(text: str) -> Dict[str, Any]:
         """Extract JSON from text, handling markdown code blocks"""
-        import re
-
         # Try to find JSON in code blocks
-        json_pattern = r"```(?:json)?\s*(\{.*?\})\s*```"
-        match = re.search(json_pattern, text, re.DOTALL)
+        match = _JSON_BLOCK_RE.search(text)
 
         if match:
             json_str = match.group(1)
         else:
             # Try to find JSON object directly
-            json_pattern = r"\{.*?\}"
-            match = re.search(json_pattern, text, re.DOTALL)
+            match = _JSON_OBJ_RE.search(text)
             if match:
                 json_str = match.group(0)
             else:
                 raise ValueError(f"Could not extract JSON from response: {text[:200]}")
 
         try:
-            return json.loads(json_str)
+            return json_utils.loads(json_str)
         except json.JSONDecodeError as e:
             logger.error(f"Failed to parse JSON: {e}")
             logger.debug(f"JSON string: {json_str}")
@@ -1,245 +1,290 @@
 """
 Multi-turn conversation generation prompts
 Adapted from easy-dataset's multiTurnConversation.js for intent-based conversations
+
+Instructions that are identical for every turn of a run come first, then
+what is fixed for a conversation, then the history (which only grows), and
+the per-turn context (current intent, turn counter) last, so providers with
+automatic prefix caching (OpenAI, DeepSeek) can reuse the longest possible
+prompt prefix from one turn to the next.
 """
+from functools import lru_cache
+from typing import Dict, Sequence, Tuple
+
+from .template import compile_language_templates
+
+# Section titles and boilerplate shared by the user and assistant templates
+_LABELS: Dict[str, Dict[str, str]] = {
+    "en": {
+        "scenario": "Conversation Scenario",
+        "roles": "Role Settings",
+        "json_intro": "Return a bare JSON object (no Markdown code fence):",
+        "note": "Note:",
+        "valid_json": "Must return valid JSON format",
+        "history": "Conversation History",
+        "intent_context": "Current Intent Context",
+        "status": "Current Status"
+    },
+    "zh": {
+        "scenario": "对话场景设定",
+        "roles": "角色设定",
+        "json_intro": "返回纯JSON对象（不要使用Markdown代码块）：",
+        "note": "注意：",
+        "valid_json": "必须返回有效的JSON格式",
+        "history": "对话历史",
+        "intent_context": "当前意图上下文",
+        "status": "当前状态"
+    }
+}
+
+
+def _numbered(items: Sequence[str]) -> str:
+    """Numbered list, one item per line"""
+    return "\n".join(f"{i}. {item}" for i, item in enumerate(items, 1))
+
+
+def _sections(*sections: Tuple[str, str]) -> str:
+    """"## Title:" sections separated by blank lines"""
+    return "\n".join(f"## {title}:\n{body}\n" for title, body in sections)
+
+
+def _prefix_template(
+    language: str,
+    role: str,
+    description: str,
+    goal: str,
+    skills: Sequence[str],
+    user_setting: str,
+    assistant_setting: str,
+    workflow: Sequence[str],
+    constraints: Sequence[str],
+    json_fields: Sequence[str],
+    notes: Sequence[str]
+) -> str:
+    """Template text for the run-invariant part of a conversation prompt"""
+    labels = _LABELS[language]
+    # Literal JSON braces are doubled for str.format
+    json_block = "{{\n" + ",\n".join(f"  {field}" for field in json_fields) + "\n}}"
+    return (
+        f"\n# Role: {role}\n## Profile:\n- Description: {description}\n- Goal: {goal}\n\n"
+        + _sections(
+            ("Skills", _numbered(skills)),
+            (labels["scenario"], "{scenario}"),
+            (labels["roles"], f"- {{role_user}}: {user_setting}\n- {{role_assistant}}: {assistant_setting}"),
+            ("Workflow", _numbered(workflow)),
+            ("Constraints", _numbered(constraints)),
+            ("Output Format", f"{labels['json_intro']}\n{json_block}")
+        )
+        + f"\n{labels['note']}\n{_numbered([labels['valid_json'], *notes])}\n\n"
+    )
+
 
 # English prompt for assistant reply generation
-ASSISTANT_REPLY_PROMPT_EN = """
-# Role: Multi-turn Conversation Assistant
-## Profile:
-- Description: You are a professional conversation partner, playing the specified assistant role in an intent-based conversation.
-- Goal: Generate professional replies that match the role setting, maintaining conversation coherence and natural flow.
-
-## Skills:
-1. Understand the current intent and provide relevant responses
-2. Maintain role consistency throughout the conversation
-3. Generate logically coherent replies based on conversation history
-4. Handle intent transitions naturally
-
-## Conversation Scenario:
-{scenario}
-
-## Role Settings:
-- {role_user}: User seeking information and help
-- {role_assistant}: Assistant (your role) providing professional and helpful answers
-
-## Current Intent Context:
-Intent: {current_intent}
-Intent Path: {intent_path}
-
-## Conversation History:
-{conversation_history}
-
-## Current Status:
-This is turn {current_turn} of conversation (total {total_turns} turns)
-
-## Workflow:
-1. Review conversation history and understand the current context
-2. Generate a professional reply based on the {role_assistant} role setting
-3. Keep the response natural, helpful, and relevant to the current intent
-4. If this is a follow-up question, reference previous context appropriately
-
-## Constraints:
-1. Must maintain {role_assistant} role consistency and professionalism
-2. Replies must be logically coherent with conversation history
-3. Response should be detailed but concise (2-4 sentences typically)
-4. Do not use phrases like "based on the reference material" or "according to the data"
-5. Keep the tone natural and conversational
-6. If handling an intent transition, acknowledge the topic change naturally
-
-## Output Format:
-Return valid JSON format:
-```json
-{{
-  "content": "Your complete response as {role_assistant}"
-}}
-```
-
-Note:
-1. Must return valid JSON format
-2. Only include the content field
-3. Do not include any additional identifiers or format markers
-"""
+ASSISTANT_REPLY_PREFIX_EN = _prefix_template(
+    "en",
+    role="Multi-turn Conversation Assistant",
+    description="You are a professional conversation partner, playing the specified assistant role in an intent-based conversation.",
+    goal="Generate professional replies that match the role setting, maintaining conversation coherence and natural flow.",
+    skills=(
+        "Understand the current intent and provide relevant responses",
+        "Maintain role consistency throughout the conversation",
+        "Generate logically coherent replies based on conversation history",
+        "Handle intent transitions naturally"
+    ),
+    user_setting="User seeking information and help",
+    assistant_setting="Assistant (your role) providing professional and helpful answers",
+    workflow=(
+        "Review conversation history and understand the current context",
+        "Generate a professional reply based on the {role_assistant} role setting",
+        "Keep the response natural, helpful, and relevant to the current intent",
+        "If this is a follow-up question, reference previous context appropriately"
+    ),
+    constraints=(
+        "Must maintain {role_assistant} role consistency and professionalism",
+        "Replies must be logically coherent with conversation history",
+        "Response should be detailed but concise (2-4 sentences typically)",
+        'Do not use phrases like "based on the reference material" or "according to the data"',
+        "Keep the tone natural and conversational",
+        "If handling an intent transition, acknowledge the topic change naturally"
+    ),
+    json_fields=('"content": "Your complete response as {role_assistant}"',),
+    notes=(
+        "Only include the content field",
+        "Do not include any additional identifiers or format markers"
+    )
+)
+
+ASSISTANT_REPLY_TAIL_EN = _sections(
+    (_LABELS["en"]["history"], "{conversation_history}"),
+    (_LABELS["en"]["intent_context"], "Intent: {current_intent}\nIntent Path: {intent_path}"),
+    (_LABELS["en"]["status"], "This is turn {current_turn} of conversation (total {total_turns} turns)")
+)
+
+ASSISTANT_REPLY_PROMPT_EN = ASSISTANT_REPLY_PREFIX_EN + ASSISTANT_REPLY_TAIL_EN
 
 # Chinese prompt for assistant reply generation
-ASSISTANT_REPLY_PROMPT_ZH = """
-# Role: 多轮对话助手角色
-## Profile:
-- Description: 你是一个专业的对话助手，在基于意图的对话中扮演指定的助手角色。
-- Goal: 生成符合角色设定的专业回复，保持对话的连贯性和自然流畅。
-
-## Skills:
-1. 理解当前意图并提供相关回复
-2. 在整个对话中保持角色一致性
-3. 基于对话历史生成逻辑连贯的回复
-4. 自然地处理意图转换
-
-## 对话场景设定:
-{scenario}
-
-## 角色设定:
-- {role_user}: 寻求信息和帮助的用户
-- {role_assistant}: 助手（你的角色），提供专业和有帮助的回答
-
-## 当前意图上下文:
-意图: {current_intent}
-意图路径: {intent_path}
-
-## 对话历史:
-{conversation_history}
-
-## 当前状态:
-这是对话的第 {current_turn} 轮（总共 {total_turns} 轮）
-
-## Workflow:
-1. 回顾对话历史并理解当前上下文
-2. 基于{role_assistant}角色设定生成专业回复
-3. 保持回复自然、有帮助且与当前意图相关
-4. 如果是后续问题，适当引用之前的上下文
-
-## Constraints:
-1. 必须保持{role_assistant}角色的一致性和专业性
-2. 回复必须与对话历史保持逻辑连贯性
-3. 回复应详细但简洁（通常2-4句话）
-4. 不要使用"根据参考资料"或"根据数据"等措辞
-5. 保持语气自然和对话化
-6. 如果处理意图转换，自然地承认话题变化
-
-## Output Format:
-返回有效的JSON格式：
-```json
-{{
-  "content": "作为{role_assistant}的完整回复"
-}}
-```
-
-注意：
-1. 必须返回有效的JSON格式
-2. 仅包含content字段
-3. 不要包含任何额外的标识符或格式标记
-"""
+ASSISTANT_REPLY_PREFIX_ZH = _prefix_template(
+    "zh",
+    role="多轮对话助手角色",
+    description="你是一个专业的对话助手，在基于意图的对话中扮演指定的助手角色。",
+    goal="生成符合角色设定的专业回复，保持对话的连贯性和自然流畅。",
+    skills=(
+        "理解当前意图并提供相关回复",
+        "在整个对话中保持角色一致性",
+        "基于对话历史生成逻辑连贯的回复",
+        "自然地处理意图转换"
+    ),
+    user_setting="寻求信息和帮助的用户",
+    assistant_setting="助手（你的角色），提供专业和有帮助的回答",
+    workflow=(
+        "回顾对话历史并理解当前上下文",
+        "基于{role_assistant}角色设定生成专业回复",
+        "保持回复自然、有帮助且与当前意图相关",
+        "如果是后续问题，适当引用之前的上下文"
+    ),
+    constraints=(
+        "必须保持{role_assistant}角色的一致性和专业性",
+        "回复必须与对话历史保持逻辑连贯性",
+        "回复应详细但简洁（通常2-4句话）",
+        '不要使用"根据参考资料"或"根据数据"等措辞',
+        "保持语气自然和对话化",
+        "如果处理意图转换，自然地承认话题变化"
+    ),
+    json_fields=('"content": "作为{role_assistant}的完整回复"',),
+    notes=(
+        "仅包含content字段",
+        "不要包含任何额外的标识符或格式标记"
+    )
+)
+
+ASSISTANT_REPLY_TAIL_ZH = _sections(
+    (_LABELS["zh"]["history"], "{conversation_history}"),
+    (_LABELS["zh"]["intent_context"], "意图: {current_intent}\n意图路径: {intent_path}"),
+    (_LABELS["zh"]["status"], "这是对话的第 {current_turn} 轮（总共 {total_turns} 轮）")
+)
+
+ASSISTANT_REPLY_PROMPT_ZH = ASSISTANT_REPLY_PREFIX_ZH + ASSISTANT_REPLY_TAIL_ZH
 
 # English prompt for next question generation
-NEXT_QUESTION_PROMPT_EN = """
-# Role: Multi-turn Conversation User
-## Profile:
-- Description: You are a conversation participant playing the user role, generating natural follow-up questions.
-- Goal: Generate follow-up questions that advance the conversation naturally, potentially transitioning to related intents.
-
-## Skills:
-1. Analyze conversation history and identify natural progression
-2. Maintain user role consistency
-3. Generate natural, fluent follow-up questions
-4. Handle intent transitions smoothly when appropriate
-
-## Conversation Scenario:
-{scenario}
-
-## Role Settings:
-- {role_user}: User (your role) asking follow-up questions
-- {role_assistant}: Assistant providing answers
-
-## Current Intent Context:
-Primary Intent: {primary_intent}
-Related Intents: {related_intents}
-Intent Path: {intent_path}
-
-## Conversation History:
-{conversation_history}
-
-## Current Status:
-About to start turn {next_turn} of conversation (total {total_turns} turns)
-Intent transition probability: {transition_rate}%
-
-## Workflow:
-1. Review the conversation history and understand what has been discussed
-2. Decide whether to continue on current intent or transition to a related intent
-3. Generate a natural follow-up question from {role_user}'s perspective
-4. Ensure the question advances the conversation meaningfully
-
-## Constraints:
-1. Must maintain {role_user} role's language style
-2. Question must be based on conversation history
-3. Avoid repeating previously asked questions
-4. Question types can be: clarifying details, asking for examples, related topics, practical application
-5. Keep questions concise and clear
-6. If transitioning intents, make it natural (e.g., "Also, about...", "One more thing...")
-
-## Output Format:
-Return valid JSON format:
-```json
-{{
-  "question": "Your question as {role_user}",
-  "intent": "The intent this question belongs to"
-}}
-```
-
-Note:
-1. Must return valid JSON format
-2. Include both question and intent fields
-3. Intent should be from the provided intent options
-"""
+NEXT_QUESTION_PREFIX_EN = _prefix_template(
+    "en",
+    role="Multi-turn Conversation User",
+    description="You are a conversation participant playing the user role, generating natural follow-up questions.",
+    goal="Generate follow-up questions that advance the conversation naturally, potentially transitioning to related intents.",
+    skills=(
+        "Analyze conversation history and identify natural progression",
+        "Maintain user role consistency",
+        "Generate natural, fluent follow-up questions",
+        "Handle intent transitions smoothly when appropriate"
+    ),
+    user_setting="User (your role) asking follow-up questions",
+    assistant_setting="Assistant providing answers",
+    workflow=(
+        "Review the conversation history and understand what has been discussed",
+        "Decide whether to continue on current intent or transition to a related intent",
+        "Generate a natural follow-up question from {role_user}'s perspective",
+        "Ensure the question advances the conversation meaningfully"
+    ),
+    constraints=(
+        "Must maintain {role_user} role's language style",
+        "Question must be based on conversation history",
+        "Avoid repeating previously asked questions",
+        "Question types can be: clarifying details, asking for examples, related topics, practical application",
+        "Keep questions concise and clear",
+        'If transitioning intents, make it natural (e.g., "Also, about...", "One more thing...")'
+    ),
+    json_fields=(
+        '"question": "Your question as {role_user}"',
+        '"intent": "The intent this question belongs to"'
+    ),
+    notes=(
+        "Include both question and intent fields",
+        "Intent should be from the provided intent options"
+    )
+)
+
+NEXT_QUESTION_TAIL_EN = _sections(
+    (
+        "Conversation Intents",
+        "Primary Intent: {primary_intent}\nRelated Intents: {related_intents}\n"
+        "Intent transition probability: {transition_rate}%"
+    ),
+    (_LABELS["en"]["history"], "{conversation_history}"),
+    (_LABELS["en"]["intent_context"], "Intent Path: {intent_path}"),
+    (_LABELS["en"]["status"], "About to start turn {next_turn} of conversation (total {total_turns} turns)")
+)
+
+NEXT_QUESTION_PROMPT_EN = NEXT_QUESTION_PREFIX_EN + NEXT_QUESTION_TAIL_EN
 
 # Chinese prompt for next question generation
-NEXT_QUESTION_PROMPT_ZH = """
-# Role: 多轮对话用户角色
-## Profile:
-- Description: 你是一个对话参与者，扮演用户角色，生成自然的后续问题。
-- Goal: 生成推进对话自然发展的后续问题，可能转换到相关意图。
-
-## Skills:
-1. 分析对话历史并识别自然的发展方向
-2. 保持用户角色一致性
-3. 生成自然、流畅的后续问题
-4. 在适当时平滑处理意图转换
-
-## 对话场景设定:
-{scenario}
-
-## 角色设定:
-- {role_user}: 用户（你的角色）提出后续问题
-- {role_assistant}: 助手提供回答
-
-## 当前意图上下文:
-主要意图: {primary_intent}
-相关意图: {related_intents}
-意图路径: {intent_path}
-
-## 对话历史:
-{conversation_history}
-
-## 当前状态:
-即将开始第 {next_turn} 轮对话（总共 {total_turns} 轮）
-意图转换概率: {transition_rate}%
-
-## Workflow:
-1. 回顾对话历史并理解已讨论的内容
-2. 决定是继续当前意图还是转换到相关意图
-3. 从{role_user}的角度生成自然的后续问题
-4. 确保问题有意义地推进对话
-
-## Constraints:
-1. 必须保持{role_user}角色的语言风格
-2. 问题必须基于对话历史
-3. 避免重复之前已问过的问题
-4. 问题类型可以是：澄清细节、询问示例、相关话题、实际应用
-5. 保持问题简洁明确
-6. 如果转换意图，使其自然（例如："另外，关于..."，"还有一个问题..."）
-
-## Output Format:
-返回有效的JSON格式：
-```json
-{{
-  "question": "作为{role_user}的问题",
-  "intent": "这个问题所属的意图"
-}}
-```
-
-注意：
-1. 必须返回有效的JSON格式
-2. 包含question和intent两个字段
-3. intent应该从提供的意图选项中选择
-"""
+NEXT_QUESTION_PREFIX_ZH = _prefix_template(
+    "zh",
+    role="多轮对话用户角色",
+    description="你是一个对话参与者，扮演用户角色，生成自然的后续问题。",
+    goal="生成推进对话自然发展的后续问题，可能转换到相关意图。",
+    skills=(
+        "分析对话历史并识别自然的发展方向",
+        "保持用户角色一致性",
+        "生成自然、流畅的后续问题",
+        "在适当时平滑处理意图转换"
+    ),
+    user_setting="用户（你的角色）提出后续问题",
+    assistant_setting="助手提供回答",
+    workflow=(
+        "回顾对话历史并理解已讨论的内容",
+        "决定是继续当前意图还是转换到相关意图",
+        "从{role_user}的角度生成自然的后续问题",
+        "确保问题有意义地推进对话"
+    ),
+    constraints=(
+        "必须保持{role_user}角色的语言风格",
+        "问题必须基于对话历史",
+        "避免重复之前已问过的问题",
+        "问题类型可以是：澄清细节、询问示例、相关话题、实际应用",
+        "保持问题简洁明确",
+        '如果转换意图，使其自然（例如："另外，关于..."，"还有一个问题..."）'
+    ),
+    json_fields=(
+        '"question": "作为{role_user}的问题"',
+        '"intent": "这个问题所属的意图"'
+    ),
+    notes=(
+        "包含question和intent两个字段",
+        "intent应该从提供的意图选项中选择"
+    )
+)
+
+NEXT_QUESTION_TAIL_ZH = _sections(
+    ("对话意图", "主要意图: {primary_intent}\n相关意图: {related_intents}\n意图转换概率: {transition_rate}%"),
+    (_LABELS["zh"]["history"], "{conversation_history}"),
+    (_LABELS["zh"]["intent_context"], "意图路径: {intent_path}"),
+    (_LABELS["zh"]["status"], "即将开始第 {next_turn} 轮对话（总共 {total_turns} 轮）")
+)
+
+NEXT_QUESTION_PROMPT_ZH = NEXT_QUESTION_PREFIX_ZH + NEXT_QUESTION_TAIL_ZH
+
+# Templates parsed once; rendering is a single join per call
+_ASSISTANT_REPLY_PREFIX_RENDERERS = compile_language_templates(
+    ASSISTANT_REPLY_PREFIX_EN,
+    ASSISTANT_REPLY_PREFIX_ZH
+)
+_ASSISTANT_REPLY_TAIL_RENDERERS = compile_language_templates(ASSISTANT_REPLY_TAIL_EN, ASSISTANT_REPLY_TAIL_ZH)
+_NEXT_QUESTION_PREFIX_RENDERERS = compile_language_templates(NEXT_QUESTION_PREFIX_EN, NEXT_QUESTION_PREFIX_ZH)
+_NEXT_QUESTION_TAIL_RENDERERS = compile_language_templates(NEXT_QUESTION_TAIL_EN, NEXT_QUESTION_TAIL_ZH)
+
+
+@lru_cache(maxsize=64)
+def _assistant_reply_prefix(scenario: str, role_user: str, role_assistant: str, language: str) -> str:
+    """Formatted run-invariant part of the assistant reply prompt"""
+    render = _ASSISTANT_REPLY_PREFIX_RENDERERS[language]
+    return render(scenario=scenario, role_user=role_user, role_assistant=role_assistant)
+
+
+@lru_cache(maxsize=64)
+def _next_question_prefix(scenario: str, role_user: str, role_assistant: str, language: str) -> str:
+    """Formatted run-invariant part of the next question prompt"""
+    render = _NEXT_QUESTION_PREFIX_RENDERERS[language]
+    return render(scenario=scenario, role_user=role_user, role_assistant=role_assistant)
 
 
 def build_assistant_reply_prompt(
@@ -270,12 +315,9 @@ def build_assistant_reply_prompt(
     Returns:
         Formatted prompt string
     """
-    template = ASSISTANT_REPLY_PROMPT_EN if language == "en" else ASSISTANT_REPLY_PROMPT_ZH
+    render_tail = _ASSISTANT_REPLY_TAIL_RENDERERS[language]
 
-    return template.format(
-        scenario=scenario,
-        role_user=role_user,
-        role_assistant=role_assistant,
+    return _assistant_reply_prefix(scenario, role_user, role_assistant, language) + render_tail(
         current_intent=current_intent,
         intent_path=intent_path,
         conversation_history=conversation_history,
@@ -316,12 +358,9 @@ def build_next_question_prompt(
     Returns:
         Formatted prompt string
     """
-    template = NEXT_QUESTION_PROMPT_EN if language == "en" else NEXT_QUESTION_PROMPT_ZH
+    render_tail = _NEXT_QUESTION_TAIL_RENDERERS[language]
 
-    return template.format(
-        scenario=scenario,
-        role_user=role_user,
-        role_assistant=role_assistant,
+    return _next_question_prefix(scenario, role_user, role_assistant, language) + render_tail(
         primary_intent=primary_intent,
         related_intents=related_intents,
         intent_path=intent_path,
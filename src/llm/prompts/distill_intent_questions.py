@@ -3,7 +3,10 @@ Intent Question Distillation Prompts
 Adapted from easy-dataset: lib/llm/prompts/distillQuestions.js
 Purpose: Generate diverse questions for each intent
 """
-from typing import List, Optional
+from functools import lru_cache
+from typing import FrozenSet, List, Optional, Tuple
+
+from .template import compile_language_templates
 
 
 DISTILL_INTENT_QUESTIONS_PROMPT_ZH = """
@@ -128,6 +131,30 @@ DISTILL_INTENT_QUESTIONS_PROMPT_EN = """
 - Each question should be a natural, authentic user expression
 """
 
+_QUESTIONS_RENDERERS = compile_language_templates(
+    DISTILL_INTENT_QUESTIONS_PROMPT_EN,
+    DISTILL_INTENT_QUESTIONS_PROMPT_ZH
+)
+
+
+@lru_cache(maxsize=4096)
+def _existing_section(existing_questions: FrozenSet[str], language: str) -> str:
+    """
+    Render the existing questions section
+
+    Questions are stripped, deduplicated and sorted before the first ten are
+    shown, so the same set always renders the same prompt (and hits the same
+    cache entries); siblings sharing an exclusion set share the string.
+    """
+    questions = sorted({q.strip() for q in existing_questions if q and q.strip()})
+    if not questions:
+        return ""
+
+    questions_list = "- " + "\n- ".join(questions[:10])  # Show max 10
+    if language == "zh":
+        return f"\n## Existing Questions:\n已有的问题包括：\n{questions_list}\n请不要生成与这些重复或高度相似的问题。"
+    return f"\n## Existing Questions:\nExisting questions include:\n{questions_list}\nPlease do not generate duplicate or highly similar questions."
+
 
 def build_distill_intent_questions_prompt(
     current_intent: str,
@@ -149,30 +176,17 @@ def build_distill_intent_questions_prompt(
     Returns:
         Formatted prompt string
     """
-    # Build existing questions section
-    if existing_questions and len(existing_questions) > 0:
-        if language == "zh":
-            questions_list = "\n".join([f"- {q}" for q in existing_questions[:10]])  # Show max 10
-            existing_section = f"\n## Existing Questions:\n已有的问题包括：\n{questions_list}\n请不要生成与这些重复或高度相似的问题。"
-        else:
-            questions_list = "\n".join([f"- {q}" for q in existing_questions[:10]])
-            existing_section = f"\n## Existing Questions:\nExisting questions include:\n{questions_list}\nPlease do not generate duplicate or highly similar questions."
-    else:
-        existing_section = ""
+    existing_section = _existing_section(frozenset(existing_questions or ()), language)
 
     # Use current intent as path if no path provided
     if not intent_path:
         intent_path = current_intent
 
     # Select template
-    template = (
-        DISTILL_INTENT_QUESTIONS_PROMPT_EN
-        if language == "en"
-        else DISTILL_INTENT_QUESTIONS_PROMPT_ZH
-    )
+    render = _QUESTIONS_RENDERERS[language]
 
     # Fill in the template
-    prompt = template.format(
+    prompt = render(
         current_intent=current_intent,
         count=count,
         intent_path=intent_path,
@@ -180,3 +194,84 @@ def build_distill_intent_questions_prompt(
     )
 
     return prompt
+
+
+DISTILL_MULTI_INTENT_QUESTIONS_PROMPT_ZH = """
+# Role: 意图问题蒸馏专家
+## Profile:
+- Description: 你是一个专业的意图问题生成助手，精通各类用户意图的表达方式。
+- Task: 为下列{intent_count}个意图分别生成{count}个高质量、多样化的用户问题。
+
+## Intents:
+{intent_list}
+
+## Constraints:
+1. 每个意图的问题必须与该意图紧密相关，代表真实用户会问的内容，且不能与其他意图的问题混淆
+2. 表达多样性：直接提问、描述问题、请求帮助、简短表达、口语化表达，每种类型至少占15%
+3. 避免过于正式或书面化的表述，避免技术术语，使用日常用语
+4. 避免重复或高度相似的问题，长度适中（5-30个字）
+5. 模拟真实用户的表达习惯，可以包含常见的口语化表达和语气词（适度）
+
+## Output Format:
+- 返回JSON对象，不包含额外解释或说明
+- 键为意图编号（intent_1、intent_2……），值为该意图的问题数组
+- 格式示例：{{"intent_1": ["问题1", "问题2", ...], "intent_2": ["问题1", "问题2", ...]}}
+"""
+
+DISTILL_MULTI_INTENT_QUESTIONS_PROMPT_EN = """
+# Role: Intent Question Distillation Expert
+## Profile:
+- Description: You are a professional intent question generation assistant, proficient in how users express many kinds of intents.
+- Task: Generate {count} high-quality, diverse user questions for each of the {intent_count} intents below.
+
+## Intents:
+{intent_list}
+
+## Constraints:
+1. Each intent's questions must be closely related to that intent, represent what real users would ask, and not be confusable with the other intents
+2. Expression diversity: direct questions, problem descriptions, help requests, brief expressions and colloquial expressions, each at least 15%
+3. Avoid overly formal or written expressions and technical jargon; use everyday language
+4. Avoid repetitive or highly similar questions; moderate length (5-30 words)
+5. Simulate real users' expression habits, including colloquial phrasing and tone words (in moderation)
+
+## Output Format:
+- Return a JSON object without additional explanations or descriptions
+- Keys are the intent ids (intent_1, intent_2, ...), values are that intent's question array
+- Format example: {{"intent_1": ["Question 1", "Question 2", ...], "intent_2": ["Question 1", "Question 2", ...]}}
+"""
+
+_MULTI_QUESTIONS_RENDERERS = compile_language_templates(
+    DISTILL_MULTI_INTENT_QUESTIONS_PROMPT_EN,
+    DISTILL_MULTI_INTENT_QUESTIONS_PROMPT_ZH
+)
+
+
+def build_distill_multi_intent_questions_prompt(
+    intents: List[Tuple[str, str]],
+    count: int,
+    language: str = "en"
+) -> str:
+    """
+    Build a prompt generating questions for several intents in one request
+
+    Args:
+        intents: (intent name, full intent path) pairs; answers are keyed
+            intent_1..intent_N in this order
+        count: Number of questions to generate per intent
+        language: Language code ('zh' or 'en')
+
+    Returns:
+        Formatted prompt string
+    """
+    intent_list = "\n".join(
+        f"- intent_{i}: {name} ({path or name})"
+        for i, (name, path) in enumerate(intents, 1)
+    )
+
+    render = _MULTI_QUESTIONS_RENDERERS[language]
+
+    return render(
+        intent_count=len(intents),
+        count=count,
+        intent_list=intent_list
+    )
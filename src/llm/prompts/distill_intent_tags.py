@@ -3,7 +3,10 @@ Intent Tag Distillation Prompts
 Adapted from easy-dataset: lib/llm/prompts/distillTags.js
 Purpose: Generate hierarchical intent taxonomies
 """
-from typing import List, Optional
+from functools import lru_cache
+from typing import FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+from .template import compile_language_templates
 
 
 DISTILL_INTENT_TAGS_PROMPT_ZH = """
@@ -108,6 +111,25 @@ DISTILL_INTENT_TAGS_PROMPT_EN = """
 - Example: ["1.1 Password Reset", "1.2 Account Deletion", "1.3 Personal Info Update"]
 """
 
+_TAGS_RENDERERS = compile_language_templates(DISTILL_INTENT_TAGS_PROMPT_EN, DISTILL_INTENT_TAGS_PROMPT_ZH)
+
+
+def _normalize_existing(existing_tags: Optional[Iterable[str]]) -> List[str]:
+    """Stripped, deduplicated and sorted tags, so equal sets render identical prompts"""
+    return sorted({tag.strip() for tag in existing_tags or () if tag and tag.strip()})
+
+
+@lru_cache(maxsize=4096)
+def _existing_section(existing_tags: FrozenSet[str], language: str) -> str:
+    """Render the existing tags section; sibling calls with the same set share the string"""
+    tags = _normalize_existing(existing_tags)
+    if not tags:
+        return ""
+
+    if language == "zh":
+        return f"\n## Existing Tags:\n已有的子标签包括：{', '.join(tags)}\n请不要生成与这些重复或相似的标签。"
+    return f"\n## Existing Tags:\nExisting sub-tags include: {', '.join(tags)}\nPlease do not generate duplicate or similar tags."
+
 
 def build_distill_intent_tags_prompt(
     parent_intent: str,
@@ -129,28 +151,17 @@ def build_distill_intent_tags_prompt(
     Returns:
         Formatted prompt string
     """
-    # Build existing tags section
-    if existing_tags and len(existing_tags) > 0:
-        if language == "zh":
-            existing_section = f"\n## Existing Tags:\n已有的子标签包括：{', '.join(existing_tags)}\n请不要生成与这些重复或相似的标签。"
-        else:
-            existing_section = f"\n## Existing Tags:\nExisting sub-tags include: {', '.join(existing_tags)}\nPlease do not generate duplicate or similar tags."
-    else:
-        existing_section = ""
+    existing_section = _existing_section(frozenset(existing_tags or ()), language)
 
     # Use parent intent as path if no path provided
     if not intent_path:
         intent_path = parent_intent
 
     # Select template
-    template = (
-        DISTILL_INTENT_TAGS_PROMPT_EN
-        if language == "en"
-        else DISTILL_INTENT_TAGS_PROMPT_ZH
-    )
+    render = _TAGS_RENDERERS[language]
 
     # Fill in the template
-    prompt = template.format(
+    prompt = render(
         parent_intent=parent_intent,
         count=count,
         intent_path=intent_path,
@@ -158,3 +169,97 @@ def build_distill_intent_tags_prompt(
     )
 
     return prompt
+
+
+DISTILL_MULTI_INTENT_TAGS_PROMPT_ZH = """
+# Role: 意图标签蒸馏专家
+## Profile:
+- Description: 你是一个专业的意图标签生成助手，专长于为特定主题创建细分的子意图标签体系。
+- Task: 为下列{parent_count}个父意图分别生成指定数量的专业子意图标签。
+
+## Parent Intents:
+{parent_list}
+
+## Constraints:
+1. 每个父意图的标签应该是该意图领域内的专业子类别或子意图，彼此区分明显，覆盖不同方面
+2. 标签应该代表用户的实际意图，而不是技术术语，能够作为问题生成的基础
+3. 每个标签简洁、明确，通常为2-8个字，是表示用户目的或需求的名词或名词短语
+4. 序号规则：若父意图有序号（如"1 账户管理"），子标签格式为"1.1 密码重置"、"1.2 账户删除"；若父意图无序号，子标签格式为"1 技术支持"、"2 账户管理"
+5. 不与该父意图已有的子标签重复或高度相似
+
+## Output Format:
+- 返回JSON对象，不包含额外解释或说明
+- 键为父意图编号（parent_1、parent_2……），值为该父意图的带序号标签数组
+- 格式示例：{{"parent_1": ["1.1 密码重置", "1.2 账户删除"], "parent_2": ["2.1 订单查询", "2.2 退款申请"]}}
+"""
+
+DISTILL_MULTI_INTENT_TAGS_PROMPT_EN = """
+# Role: Intent Tag Distillation Expert
+## Profile:
+- Description: You are a professional intent tag generation assistant, specializing in creating refined sub-intent tag systems for specific topics.
+- Task: Generate the requested number of professional sub-intent tags for each of the {parent_count} parent intents below.
+
+## Parent Intents:
+{parent_list}
+
+## Constraints:
+1. Each parent's tags should be professional sub-categories or sub-intents within that parent's domain, clearly distinguishable and covering different aspects
+2. Tags should represent actual user intents, not technical terms, and serve as a basis for question generation
+3. Each tag should be concise and clear, typically 2-8 words, a noun or noun phrase representing a user goal or need
+4. Numbering rules: if the parent has numbering (e.g., "1 Account Management"), sub-tags are "1.1 Password Reset", "1.2 Account Deletion"; if the parent is unnumbered, sub-tags are "1 Technical Support", "2 Account Management"
+5. Do not duplicate or highly resemble the parent's existing sub-tags
+
+## Output Format:
+- Return a JSON object without additional explanations or descriptions
+- Keys are the parent ids (parent_1, parent_2, ...), values are that parent's array of numbered tags
+- Format example: {{"parent_1": ["1.1 Password Reset", "1.2 Account Deletion"], "parent_2": ["2.1 Order Inquiry", "2.2 Refund Request"]}}
+"""
+
+_MULTI_TAGS_RENDERERS = compile_language_templates(
+    DISTILL_MULTI_INTENT_TAGS_PROMPT_EN,
+    DISTILL_MULTI_INTENT_TAGS_PROMPT_ZH
+)
+
+# One line per parent in the {parent_list} section, plus its existing tags if any
+_PARENT_LINE_RENDERERS = compile_language_templates(
+    "- parent_{index}: {name} (full chain: {path}), generate {count} tags",
+    "- parent_{index}: {name}（完整链路：{path}），生成{count}个标签"
+)
+_PARENT_EXISTING_RENDERERS = compile_language_templates(
+    "; existing: {tags}",
+    "，已有：{tags}"
+)
+
+
+def build_distill_multi_intent_tags_prompt(
+    parents: Sequence[Tuple[str, str, int, Optional[List[str]]]],
+    language: str = "en"
+) -> str:
+    """
+    Build a prompt generating sub-intent tags for several parents in one request
+
+    Args:
+        parents: (parent intent name, full intent path, tag count, existing
+            sub-tags) tuples; answers are keyed parent_1..parent_N in this order
+        language: Language code ('zh' or 'en')
+
+    Returns:
+        Formatted prompt string
+    """
+    render_line = _PARENT_LINE_RENDERERS[language]
+    render_existing = _PARENT_EXISTING_RENDERERS[language]
+
+    lines = []
+    for i, (name, path, count, existing_tags) in enumerate(parents, 1):
+        line = render_line(index=i, name=name, path=path or name, count=count)
+        existing_tags = _normalize_existing(existing_tags)
+        if existing_tags:
+            line += render_existing(tags=", ".join(existing_tags))
+        lines.append(line)
+
+    render = _MULTI_TAGS_RENDERERS[language]
+
+    return render(
+        parent_count=len(parents),
+        parent_list="\n".join(lines)
+    )
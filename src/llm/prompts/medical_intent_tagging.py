@@ -1,10 +1,40 @@
 """
 Prompt templates for medical conversation intent tagging
+
+The system prompt (instructions plus the rendered taxonomy) is constant for a
+run and the user prompt ends with the per-conversation parts (retrieved
+candidate intents, conversation), so every tagging request shares one long
+identical prefix that providers with automatic prefix caching (OpenAI,
+DeepSeek) can reuse.
 """
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+from .template import compile_template
 
 
 def get_medical_intent_tagging_prompt(language: str = "en", taxonomy_text: str = None) -> dict:
-    """Get prompt for generating intent tags for medical conversations"""
+    """
+    Get prompt for generating intent tags for medical conversations
+
+    The user template takes {conversation} and {candidate_intents}; the latter
+    is empty or a block from format_candidate_intents(). "render_user" is the
+    user template precompiled (render_user(conversation=..., candidate_intents=...)).
+    """
+    # Taggers built for the same taxonomy share one rendered template
+    return dict(_build_prompt(language, taxonomy_text))
+
+
+@lru_cache(maxsize=32)
+def _build_prompt(language: str, taxonomy_text: Optional[str]) -> Dict[str, Any]:
+    """Render the templates for a language and taxonomy and compile the user template"""
+    prompt: Dict[str, Any] = _prompt_templates(language, taxonomy_text)
+    prompt["render_user"] = compile_template(prompt["user"])
+    return prompt
+
+
+def _prompt_templates(language: str, taxonomy_text: Optional[str]) -> Dict[str, str]:
+    """Render the system/user templates for a language and taxonomy"""
 
     # Add taxonomy context if provided
     taxonomy_context = ""
@@ -27,10 +57,7 @@ def get_medical_intent_tagging_prompt(language: str = "en", taxonomy_text: str =
 
 请为每轮患者发言生成结构化的意图标签。""",
 
-            "user": """请分析以下医患对话，为每一轮患者的发言生成意图标签。
-
-对话内容：
-{conversation}
+            "user": """请分析下面的医患对话，为每一轮患者的发言生成意图标签。
 
 请以JSON格式返回结果，包含：
 1. user_turns: 每轮患者发言的意图信息列表
@@ -44,7 +71,10 @@ def get_medical_intent_tagging_prompt(language: str = "en", taxonomy_text: str =
 3. all_intents: 对话中出现的所有意图列表（去重）
 4. conversation_summary: 对话的简短摘要（1-2句话）
 
-请确保返回有效的JSON格式。"""
+请确保返回有效的JSON格式。
+
+{candidate_intents}对话内容：
+{conversation}"""
         }
 
     # English version
@@ -60,10 +90,7 @@ Intent tags should be:
 
 Generate structured intent tags for each patient turn.""",
 
-        "user": """Analyze the following doctor-patient conversation and generate intent tags for each patient turn.
-
-Conversation:
-{conversation}
+        "user": """Analyze the doctor-patient conversation below and generate intent tags for each patient turn.
 
 Return the result in JSON format with:
 1. user_turns: List of intent information for each patient turn
@@ -77,5 +104,25 @@ Return the result in JSON format with:
 3. all_intents: List of all unique intents in the conversation
 4. conversation_summary: Brief summary of the conversation (1-2 sentences)
 
-Ensure you return valid JSON format."""
+Ensure you return valid JSON format.
+
+{candidate_intents}Conversation:
+{conversation}"""
     }
+
+
+def format_candidate_intents(candidate_paths: List[str], language: str = "en") -> str:
+    """
+    Format the taxonomy intents retrieved for one conversation
+
+    Args:
+        candidate_paths: Intent paths (e.g., "Medical Consultation -> Chief Complaint")
+        language: Language code (en/zh)
+
+    Returns:
+        Block for the {candidate_intents} slot of the user template
+    """
+    intents = "\n".join(f"- {path}" for path in candidate_paths)
+    if language == "zh":
+        return f"候选意图（分类树中与本对话最相关的部分，请优先从中选择）：\n{intents}\n\n"
+    return f"Candidate Intents (the parts of the taxonomy most relevant to this conversation; prefer these):\n{intents}\n\n"
@@ -1,10 +1,32 @@
 """
 Prompt templates for building medical intent taxonomy from real conversations
 """
+from functools import lru_cache
+from typing import Any, Dict
+
+from .template import compile_template
 
 
 def get_medical_taxonomy_prompt(language: str = "en") -> dict:
-    """Get prompt for building intent taxonomy from medical conversations"""
+    """
+    Get prompt for building intent taxonomy from medical conversations
+
+    The user template takes {num_conversations} and {conversation_samples};
+    "render_user" is the same template precompiled.
+    """
+    return dict(_build_prompt(language))
+
+
+@lru_cache(maxsize=4)
+def _build_prompt(language: str) -> Dict[str, Any]:
+    """System/user templates for a language plus the compiled user template"""
+    prompt: Dict[str, Any] = _prompt_templates(language)
+    prompt["render_user"] = compile_template(prompt["user"])
+    return prompt
+
+
+def _prompt_templates(language: str) -> Dict[str, str]:
+    """System/user templates for a language"""
 
     if language == "zh":
         return {
@@ -0,0 +1,73 @@
+"""
+Precompiled prompt templates
+Parses a str.format template once so rendering is a single join over its
+literal text and field values, without re-parsing the template per call
+"""
+from string import Formatter
+from typing import Callable, Dict, FrozenSet, List, Optional, Tuple
+
+
+def compile_template(template: str) -> Callable[..., str]:
+    """
+    Compile a str.format template with plain {name} fields
+
+    Args:
+        template: Template text; "{{" and "}}" are literal braces as with
+            str.format, and fields may not use conversions, format specs,
+            attribute access or indexing
+
+    Returns:
+        render(**fields) -> str, equivalent to template.format(**fields)
+
+    Raises:
+        ValueError: If the template uses unsupported field syntax
+    """
+    segments: List[Tuple[str, Optional[str]]] = []
+    for literal, name, spec, conversion in Formatter().parse(template):
+        if name is not None and (spec or conversion or not name.isidentifier()):
+            raise ValueError(f"Unsupported template field: {{{name}}}")
+        segments.append((literal, name))
+
+    def render(**fields) -> str:
+        return "".join([
+            literal if name is None else literal + str(fields[name])
+            for literal, name in segments
+        ])
+
+    return render
+
+
+class LanguageTable(dict):
+    """Renderers keyed by language code; codes other than "en" fall back to "zh" like the prompt builders"""
+
+    def __missing__(self, language: str) -> Callable[..., str]:
+        return self["zh"]
+
+
+def compile_language_templates(en: str, zh: str) -> Dict[str, Callable[..., str]]:
+    """
+    Compile an English/Chinese template pair into a language lookup table
+
+    Args:
+        en: English template
+        zh: Chinese template
+
+    Returns:
+        LanguageTable mapping "en"/"zh" to compiled renderers
+
+    Raises:
+        ValueError: If the two templates do not use the same fields, which
+            would otherwise surface as a KeyError for one language only
+    """
+    en_fields, zh_fields = template_fields(en), template_fields(zh)
+    if en_fields != zh_fields:
+        raise ValueError(
+            f"Template fields differ between languages: "
+            f"en only {sorted(en_fields - zh_fields)}, zh only {sorted(zh_fields - en_fields)}"
+        )
+    return LanguageTable(en=compile_template(en), zh=compile_template(zh))
+
+
+def template_fields(template: str) -> FrozenSet[str]:
+    """Names of the {fields} a str.format template uses"""
+    return frozenset(name for _, name, _, _ in Formatter().parse(template) if name is not None)
@@ -0,0 +1,67 @@
+"""
+Request rate limiter
+Spaces LLM requests to stay under a provider's requests-per-minute and
+tokens-per-minute limits, shared by worker threads and asyncio tasks alike
+"""
+import asyncio
+import threading
+import time
+from typing import Optional
+
+
+class RateLimiter:
+    """Evenly spaced requests/tokens-per-minute limiter (thread- and asyncio-safe)"""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None
+    ):
+        """
+        Initialize rate limiter
+
+        Args:
+            requests_per_minute: Maximum request rate; None or 0 disables limiting
+            tokens_per_minute: Maximum token rate; None or 0 disables limiting.
+                A request for N tokens holds back the next one until those
+                tokens have "refilled" at this rate.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._token_interval = 60.0 / tokens_per_minute if tokens_per_minute else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: int = 0) -> float:
+        """Reserve the next request slot and return how long to wait for it"""
+        if not self._interval and not self._token_interval:
+            return 0.0
+
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + max(self._interval, tokens * self._token_interval)
+            return slot - now
+
+    def acquire(self, tokens: int = 0) -> None:
+        """
+        Block the calling thread until a request may be sent
+
+        Args:
+            tokens: Estimated tokens the request will consume
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            time.sleep(delay)
+
+    async def aacquire(self, tokens: int = 0) -> None:
+        """
+        Wait (without blocking the event loop) until a request may be sent
+
+        Args:
+            tokens: Estimated tokens the request will consume
+        """
+        delay = self._reserve(tokens)
+        if delay > 0:
+            await asyncio.sleep(delay)
@@ -0,0 +1,131 @@
+"""
+JSON schemas for structured LLM output
+Used with response_format={"type": "json_schema", ...} when the provider supports it
+"""
+from typing import Any, Dict
+
+_JSON_TYPES = {
+    "string": str,
+    "array": list,
+    "object": dict,
+    "integer": int,
+    "number": (int, float),
+    "boolean": bool
+}
+
+
+def _string_list_object(name: str, key: str) -> Dict[str, Any]:
+    """Schema for an object holding a single list of strings"""
+    return {
+        "name": name,
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                key: {"type": "array", "items": {"type": "string"}}
+            },
+            "required": [key],
+            "additionalProperties": False
+        }
+    }
+
+
+QUESTIONS_SCHEMA = _string_list_object("intent_questions", "questions")
+
+TAGS_SCHEMA = _string_list_object("intent_tags", "tags")
+
+ASSISTANT_REPLY_SCHEMA = {
+    "name": "assistant_reply",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "content": {"type": "string"}
+        },
+        "required": ["content"],
+        "additionalProperties": False
+    }
+}
+
+NEXT_QUESTION_SCHEMA = {
+    "name": "next_question",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "question": {"type": "string"},
+            "intent": {"type": "string"}
+        },
+        "required": ["question", "intent"],
+        "additionalProperties": False
+    }
+}
+
+
+def _grouped_string_lists(name: str, prefix: str, count: int) -> Dict[str, Any]:
+    """Schema for an object of string lists keyed {prefix}_1..{prefix}_N"""
+    keys = [f"{prefix}_{i}" for i in range(1, count + 1)]
+    return {
+        "name": name,
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                key: {"type": "array", "items": {"type": "string"}}
+                for key in keys
+            },
+            "required": keys,
+            "additionalProperties": False
+        }
+    }
+
+
+def grouped_questions_schema(intent_count: int) -> Dict[str, Any]:
+    """Schema for a multi-intent question response keyed intent_1..intent_N"""
+    return _grouped_string_lists("grouped_intent_questions", "intent", intent_count)
+
+
+def grouped_tags_schema(parent_count: int) -> Dict[str, Any]:
+    """Schema for a multi-parent tag response keyed parent_1..parent_N"""
+    return _grouped_string_lists("grouped_intent_tags", "parent", parent_count)
+
+
+def validate_response(response: Any, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Check a parsed JSON response against one of the schemas above
+
+    Covers the subset of JSON Schema used here (object properties, required
+    keys, primitive and array item types), so plain JSON mode responses get
+    the same guarantees as server-enforced structured output.
+
+    Args:
+        response: Parsed JSON response
+        schema: Schema spec ({"name", "schema", "strict"})
+
+    Returns:
+        The response, unchanged
+
+    Raises:
+        ValueError if the response does not match
+    """
+    spec = schema["schema"]
+    name = schema.get("name", "response")
+
+    if not isinstance(response, dict):
+        raise ValueError(f"Invalid {name}: expected a JSON object, got {type(response).__name__}")
+
+    for key in spec.get("required", []):
+        if key not in response:
+            raise ValueError(f"Invalid {name}: missing '{key}'")
+
+    for key, prop in spec.get("properties", {}).items():
+        if key not in response:
+            continue
+        value = response[key]
+        if not isinstance(value, _JSON_TYPES[prop["type"]]):
+            raise ValueError(f"Invalid {name}: '{key}' should be {prop['type']}")
+        items = prop.get("items")
+        if items and not all(isinstance(item, _JSON_TYPES[items["type"]]) for item in value):
+            raise ValueError(f"Invalid {name}: '{key}' items should be {items['type']}")
+
+    return response
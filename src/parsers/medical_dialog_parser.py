@@ -2,11 +2,41 @@
 Medical Dialog Parser
 Parses medical conversation transcripts from MedVAL-Bench format
 """
+import logging
 import re
+from importlib.util import find_spec
 import pandas as pd
-from typing import List, Dict, Any
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
 from datetime import datetime
 
+# pyarrow (optional extra) backs pandas' multithreaded CSV engine and Parquet I/O
+_PARQUET = find_spec("pyarrow") is not None
+_CSV_ENGINE = "pyarrow" if _PARQUET else "c"
+
+logger = logging.getLogger(__name__)
+
+# Columns used from the CSV and their dtypes
+_CSV_COLUMNS = ['task', 'input', 'id']
+_CSV_DTYPES = {'task': 'category', 'input': 'string', 'id': 'int64'}
+
+# Rows per chunk when streaming a CSV with iter_csv()
+CSV_CHUNK_SIZE = 100_000
+
+# Speaker markers: [doctor] or [patient]; the captured name is kept by re.split
+_SPEAKER_RE = re.compile(r'\[(doctor|patient)\]\s*')
+
+# Standard chat role for each speaker marker
+_ROLE_MAP = {'doctor': 'assistant', 'patient': 'user'}
+
+
+def _is_fresh(cache_path: Path, source_path: str) -> bool:
+    """Whether cache_path exists and is at least as new as source_path"""
+    try:
+        return cache_path.stat().st_mtime >= Path(source_path).stat().st_mtime
+    except FileNotFoundError:
+        return False
+
 
 class MedicalDialogParser:
     """Parse medical dialogues from CSV format into structured conversations"""
@@ -14,51 +44,110 @@ class MedicalDialogParser:
     def __init__(self):
         self.conversation_counter = 0
 
-    def parse_csv(self, csv_path: str, task_filter: str = "dialogue2note") -> List[Dict[str, Any]]:
+    def parse_csv(
+        self,
+        csv_path: str,
+        task_filter: str = "dialogue2note",
+        chunksize: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
         """
         Parse CSV file and extract medical dialogues
 
+        With pyarrow installed, a whole-file read also keeps the used columns
+        in a sibling .parquet file and reads that instead of reparsing the CSV
+        while it is at least as new as the CSV.
+
         Args:
             csv_path: Path to CSV file
             task_filter: Task type to filter (default: dialogue2note)
+            chunksize: Rows read at a time (None reads the whole file at once)
 
         Returns:
             List of structured conversation dictionaries
         """
-        df = pd.read_csv(csv_path)
+        return list(self.iter_csv(csv_path, task_filter, chunksize))
+
+    def iter_csv(
+        self,
+        csv_path: str,
+        task_filter: str = "dialogue2note",
+        chunksize: Optional[int] = CSV_CHUNK_SIZE
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Parse a CSV file lazily, reading it chunksize rows at a time
 
-        # Filter by task type if specified
-        if task_filter:
-            df = df[df['task'] == task_filter]
+        Peak memory is bounded by one chunk, and consumers that stop early
+        (e.g. with a --limit) never read the rest of the file.
 
-        conversations = []
-        for idx, row in df.iterrows():
-            conv = self._parse_dialogue_text(row['input'], row['id'])
-            if conv:
-                conversations.append(conv)
+        Args:
+            csv_path: Path to CSV file
+            task_filter: Task type to filter (default: dialogue2note)
+            chunksize: Rows read at a time (None reads the whole file at once)
 
-        return conversations
+        Yields:
+            Structured conversation dictionaries
+        """
+        # Conversation IDs carry the parse date; compute it once per file
+        timestamp = datetime.now().strftime("%Y%m%d")
 
-    def _parse_dialogue_text(self, dialogue_text: str, dialogue_id: int) -> Dict[str, Any]:
+        for df in self._read_frames(csv_path, chunksize):
+            # Filter by task type if specified
+            if task_filter:
+                df = df[df['task'] == task_filter]
+
+            # Plain column arrays avoid building a Series per row (as iterrows does)
+            for dialogue_text, dialogue_id in zip(df['input'].to_numpy(), df['id'].to_numpy()):
+                conv = self._parse_dialogue_text(dialogue_text, dialogue_id, timestamp)
+                if conv:
+                    yield conv
+
+    @staticmethod
+    def _read_frames(csv_path: str, chunksize: Optional[int]) -> Iterator[pd.DataFrame]:
+        """Read the used columns of a CSV as one DataFrame or as chunks"""
+        # Only these columns are used; declared dtypes skip type inference
+        options = dict(usecols=_CSV_COLUMNS, dtype=_CSV_DTYPES)
+        if chunksize:
+            # The pyarrow engine cannot read in chunks
+            yield from pd.read_csv(csv_path, chunksize=chunksize, **options)
+            return
+
+        parquet_path = Path(csv_path).with_suffix('.parquet')
+        if _PARQUET and _is_fresh(parquet_path, csv_path):
+            yield pd.read_parquet(parquet_path, columns=_CSV_COLUMNS)
+            return
+
+        # The pyarrow engine (optional extra) parses on multiple threads
+        df = pd.read_csv(csv_path, engine=_CSV_ENGINE, **options)
+        if _PARQUET:
+            try:
+                df.to_parquet(parquet_path, index=False)
+            except OSError as e:
+                logger.debug(f"Could not write Parquet cache {parquet_path}: {e}")
+        yield df
+
+    def _parse_dialogue_text(
+        self,
+        dialogue_text: str,
+        dialogue_id: int,
+        timestamp: Optional[str] = None
+    ) -> Dict[str, Any]:
         """
         Parse dialogue text into structured turns
 
         Args:
             dialogue_text: Raw dialogue text with [doctor]/[patient] markers
             dialogue_id: Original dialogue ID from dataset
+            timestamp: YYYYMMDD date for the conversation ID (default: today)
 
         Returns:
             Structured conversation dictionary
         """
         # Split by speaker markers
-        # Pattern: [doctor] or [patient]
-        pattern = r'\[(doctor|patient)\]\s*'
-
-        # Find all speaker markers and their positions
-        splits = re.split(pattern, dialogue_text)
+        splits = _SPEAKER_RE.split(dialogue_text)
 
         # Remove empty strings and reconstruct turns
         turns = []
+        user_turns = 0
         current_speaker = None
 
         for i, segment in enumerate(splits):
@@ -66,11 +155,11 @@ class MedicalDialogParser:
             if not segment:
                 continue
 
-            if segment in ['doctor', 'patient']:
+            if segment in _ROLE_MAP:
                 current_speaker = segment
             elif current_speaker:
-                # Map to standard roles
-                role = 'assistant' if current_speaker == 'doctor' else 'user'
+                role = _ROLE_MAP[current_speaker]
+                user_turns += role == 'user'
                 turns.append({
                     'role': role,
                     'content': segment,
@@ -83,7 +172,8 @@ class MedicalDialogParser:
 
         # Generate conversation ID
         self.conversation_counter += 1
-        timestamp = datetime.now().strftime("%Y%m%d")
+        if timestamp is None:
+            timestamp = datetime.now().strftime("%Y%m%d")
 
         return {
             'conversation_id': f'medval_{dialogue_id}_{timestamp}',
@@ -92,7 +182,9 @@ class MedicalDialogParser:
             'domain': 'medical',
             'task': 'dialogue2note',
             'turns': turns,
-            'num_turns': len(turns)
+            'num_turns': len(turns),
+            'num_user_turns': user_turns,
+            'num_assistant_turns': len(turns) - user_turns
         }
 
     def get_statistics(self, conversations: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -100,15 +192,29 @@ class MedicalDialogParser:
         if not conversations:
             return {}
 
-        total_turns = sum(c['num_turns'] for c in conversations)
-        user_turns = sum(len([t for t in c['turns'] if t['role'] == 'user']) for c in conversations)
+        # One pass over the conversations for every aggregate
+        total_turns = 0
+        user_turns = 0
+        min_turns = max_turns = conversations[0]['num_turns']
+        for c in conversations:
+            num_turns = c['num_turns']
+            total_turns += num_turns
+            if num_turns < min_turns:
+                min_turns = num_turns
+            elif num_turns > max_turns:
+                max_turns = num_turns
+            if 'num_user_turns' in c:
+                user_turns += c['num_user_turns']
+            else:
+                # Conversations parsed before the count was recorded
+                user_turns += sum(1 for t in c['turns'] if t['role'] == 'user')
 
         return {
             'total_conversations': len(conversations),
             'total_turns': total_turns,
             'user_turns': user_turns,
             'assistant_turns': total_turns - user_turns,
-            'avg_turns_per_conversation': total_turns / len(conversations) if conversations else 0,
-            'min_turns': min(c['num_turns'] for c in conversations),
-            'max_turns': max(c['num_turns'] for c in conversations)
+            'avg_turns_per_conversation': total_turns / len(conversations),
+            'min_turns': min_turns,
+            'max_turns': max_turns
         }
@@ -8,8 +8,17 @@ from typing import Any, Dict
 import logging
 import re
 
+try:
+    # libyaml-backed loader, when PyYAML was built with it
+    from yaml import CSafeLoader as _YAMLLoader
+except ImportError:
+    from yaml import SafeLoader as _YAMLLoader
+
 logger = logging.getLogger(__name__)
 
+# ${VAR_NAME} or ${VAR_NAME:default}
+_ENV_RE = re.compile(r'\$\{([^}:]+)(?::([^}]*))?\}')
+
 
 def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     """
@@ -25,8 +34,8 @@ def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
     if not config_file.exists():
         raise FileNotFoundError(f"Config file not found: {config_path}")
 
-    with open(config_file, "r") as f:
-        config = yaml.safe_load(f)
+    with open(config_file, "rb") as f:
+        config = yaml.load(f, Loader=_YAMLLoader)
 
     # Substitute environment variables
     config = _substitute_env_vars(config)
@@ -37,35 +46,57 @@ def load_config(config_path: str = "config.yaml") -> Dict[str, Any]:
 
 def _substitute_env_vars(obj: Any) -> Any:
     """
-    Recursively substitute environment variables in config
+    Substitute environment variables in config, in place
 
-    Supports ${VAR_NAME} and ${VAR_NAME:default_value} syntax
+    Supports ${VAR_NAME} and ${VAR_NAME:default_value} syntax. Nested dicts
+    and lists are walked with an explicit stack and updated in place, so
+    only the strings that change are reallocated.
 
     Args:
         obj: Object to process (dict, list, str, or other)
 
     Returns:
-        Processed object
+        Processed object (the same dict or list that was passed in)
     """
-    if isinstance(obj, dict):
-        return {k: _substitute_env_vars(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [_substitute_env_vars(item) for item in obj]
-    elif isinstance(obj, str):
-        # Pattern: ${VAR_NAME} or ${VAR_NAME:default}
-        pattern = r'\$\{([^}:]+)(?::([^}]*))?\}'
-
-        def replacer(match):
-            var_name = match.group(1)
-            default_value = match.group(2) if match.group(2) is not None else ""
-            value = os.environ.get(var_name, default_value)
-            if not value and not default_value:
-                logger.warning(f"Environment variable {var_name} not set and no default provided")
-            return value
-
-        return re.sub(pattern, replacer, obj)
-    else:
-        return obj
+    if isinstance(obj, str):
+        return _substitute_str(obj)
+
+    stack = [obj]
+    while stack:
+        container = stack.pop()
+        if isinstance(container, dict):
+            items = container.items()
+        elif isinstance(container, list):
+            items = enumerate(container)
+        else:
+            continue
+
+        for key, value in items:
+            if isinstance(value, str):
+                # Assigning to an existing key does not resize the dict
+                container[key] = _substitute_str(value)
+            elif isinstance(value, (dict, list)):
+                stack.append(value)
+
+    return obj
+
+
+def _substitute_str(value: str) -> str:
+    """Expand the ${...} references in one config string"""
+    # Most values reference no variable; skip the regex scan for them
+    if '${' not in value:
+        return value
+    return _ENV_RE.sub(_replace_env_var, value)
+
+
+def _replace_env_var(match: re.Match) -> str:
+    """Value of the environment variable named by an _ENV_RE match, or its default"""
+    var_name = match.group(1)
+    default_value = match.group(2) if match.group(2) is not None else ""
+    value = os.environ.get(var_name, default_value)
+    if not value and not default_value:
+        logger.warning(f"Environment variable {var_name} not set and no default provided")
+    return value
 
 
 def validate_config(config: Dict[str, Any]) -> bool:
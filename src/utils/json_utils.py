@@ -0,0 +1,187 @@
+"""
+Fast JSON (de)serialization helpers
+Uses orjson when available, falling back to the stdlib json module
+"""
+import io
+import json
+import os
+from multiprocessing import Pool
+from typing import IO, Any, Iterable, List, Optional, Sequence, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Buffer size for JSON/JSONL output files (fewer write syscalls on large outputs)
+WRITE_BUFFER_SIZE = 1 << 20
+
+# Stdlib-encoded JSONL exports at least this large are serialized on a process pool
+PARALLEL_MIN_RECORDS = 50_000
+PARALLEL_CHUNK_SIZE = 10_000
+
+# Most buffers a single writev() call accepts
+try:
+    WRITEV_MAX_BUFFERS = os.sysconf("SC_IOV_MAX")
+except (AttributeError, ValueError, OSError):
+    WRITEV_MAX_BUFFERS = -1
+if WRITEV_MAX_BUFFERS <= 0:
+    WRITEV_MAX_BUFFERS = 16  # POSIX minimum
+
+
+def dumps(obj: Any, indent: bool = False) -> bytes:
+    """
+    Serialize an object to UTF-8 encoded JSON bytes (non-ASCII kept as-is)
+
+    Args:
+        obj: Object to serialize
+        indent: Pretty-print with 2-space indentation
+
+    Returns:
+        JSON document as bytes
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+    if indent:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode("utf-8")
+    # Compact like orjson: no whitespace after separators
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Parse a JSON document
+
+    Raises:
+        json.JSONDecodeError (orjson's decode error is a subclass)
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def write_jsonl(f: IO[bytes], records: Iterable[Any]) -> int:
+    """
+    Write records as JSON lines, one gathered write per ~WRITE_BUFFER_SIZE bytes
+
+    Args:
+        f: File opened in binary write mode
+        records: Records to serialize (any iterable, consumed lazily)
+
+    Returns:
+        Number of records written
+    """
+    chunk = []
+    size = 0
+    count = 0
+    for record in records:
+        line = dumps(record) + b"\n"
+        chunk.append(line)
+        size += len(line)
+        count += 1
+        if size >= WRITE_BUFFER_SIZE or len(chunk) >= WRITEV_MAX_BUFFERS:
+            _write_buffers(f, chunk)
+            chunk.clear()
+            size = 0
+
+    if chunk:
+        _write_buffers(f, chunk)
+    return count
+
+
+def write_jsonl_parallel(f: IO[bytes], records: Sequence[Any], processes: Optional[int] = None) -> int:
+    """
+    Write records as JSON lines, serializing chunks on a process pool
+
+    Only worth it for the stdlib encoder: orjson serializes faster than
+    records can be pickled to a worker, so with orjson (or for small
+    inputs, or on one core) this is write_jsonl().
+
+    Args:
+        f: File opened in binary write mode
+        records: Records to serialize
+        processes: Worker processes (default: CPU count)
+
+    Returns:
+        Number of records written
+    """
+    if orjson is not None or len(records) < PARALLEL_MIN_RECORDS or (os.cpu_count() or 1) < 2:
+        return write_jsonl(f, records)
+
+    chunks = (records[i:i + PARALLEL_CHUNK_SIZE] for i in range(0, len(records), PARALLEL_CHUNK_SIZE))
+    with Pool(processes) as pool:
+        for buffer in pool.imap(_serialize_jsonl_chunk, chunks):
+            f.write(buffer)
+    return len(records)
+
+
+def _serialize_jsonl_chunk(records: Sequence[Any]) -> bytes:
+    """JSON lines for a chunk of records (runs in a worker process)"""
+    return b"".join(dumps(record) + b"\n" for record in records)
+
+
+def write_json_array(f: IO[bytes], records: Iterable[Any]) -> int:
+    """
+    Write records as a pretty-printed JSON array without materializing it
+
+    The output is byte-identical to dumps(list(records), indent=True).
+
+    Args:
+        f: File opened in binary write mode
+        records: Records to serialize (any iterable, consumed lazily)
+
+    Returns:
+        Number of records written
+    """
+    chunk = []
+    size = 0
+    count = 0
+    for record in records:
+        # JSON strings never contain raw newlines, so every line can be re-indented
+        item = (b",\n  " if count else b"[\n  ") + dumps(record, indent=True).replace(b"\n", b"\n  ")
+        chunk.append(item)
+        size += len(item)
+        count += 1
+        if size >= WRITE_BUFFER_SIZE or len(chunk) >= WRITEV_MAX_BUFFERS:
+            _write_buffers(f, chunk)
+            chunk.clear()
+            size = 0
+
+    chunk.append(b"\n]" if count else b"[]")
+    _write_buffers(f, chunk)
+    return count
+
+
+def _write_buffers(f: IO[bytes], buffers: List[bytes]) -> None:
+    """
+    Write byte strings in order, with one writev() syscall for full chunks
+
+    Chunks smaller than WRITE_BUFFER_SIZE (and short of a full writev batch)
+    go through the file object's buffer instead, so small writes such as a
+    single record per call don't each cost a flush and a syscall. Also falls
+    back to a joined write for file objects without a file descriptor
+    (e.g. BytesIO) or platforms without os.writev.
+    """
+    total = sum(map(len, buffers))
+    if total < WRITE_BUFFER_SIZE and len(buffers) < WRITEV_MAX_BUFFERS:
+        f.write(b"".join(buffers))
+        return
+
+    try:
+        fd = f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        fd = None
+
+    if fd is None or not hasattr(os, "writev") or len(buffers) > WRITEV_MAX_BUFFERS:
+        f.write(b"".join(buffers))
+        return
+
+    # Bypass the file object's buffer: drain it first so output stays in order
+    f.flush()
+    written = os.writev(fd, buffers)
+    if written < total:
+        f.write(b"".join(buffers)[written:])
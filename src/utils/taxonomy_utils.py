@@ -18,11 +18,7 @@ def export_taxonomy_text(node: 'IntentNode', indent: int = 0) -> str:
     Returns:
         Formatted taxonomy text with hierarchical structure
     """
-    lines = []
-    prefix = "  " * indent
-    lines.append(f"{prefix}- {node.name}")
-
-    for child in node.children:
-        lines.append(export_taxonomy_text(child, indent + 1))
-
-    return "\n".join(lines)
+    return "\n".join(
+        f"{'  ' * (indent + depth)}- {n.name}"
+        for n, depth in node.walk()
+    )
@@ -0,0 +1,129 @@
+"""
+io_uring-backed JSONL writer for very large exports on Linux
+Uses the optional liburing binding and falls back to json_utils.write_jsonl
+"""
+import logging
+import os
+from typing import Any, Iterable, List
+
+from . import json_utils
+
+try:
+    import liburing
+except ImportError:
+    liburing = None
+
+logger = logging.getLogger(__name__)
+
+# Serialized records are grouped into writes of about this many bytes
+URING_CHUNK_SIZE = 1 << 16
+
+# Writes submitted before waiting for their completions
+URING_QUEUE_DEPTH = 256
+
+
+def write_jsonl_uring(path: str, records: Iterable[Any]) -> int:
+    """
+    Write records as JSON lines through io_uring, submitting writes in batches
+
+    Falls back to a buffered write when liburing is not installed or the
+    kernel refuses to set up a ring (non-Linux, seccomp, old kernels).
+
+    Args:
+        path: Output JSONL file
+        records: Records to serialize (any iterable, consumed lazily)
+
+    Returns:
+        Number of records written
+    """
+    ring = _open_ring()
+    if ring is None:
+        with open(path, "wb", buffering=json_utils.WRITE_BUFFER_SIZE) as f:
+            return json_utils.write_jsonl(f, records)
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        writer = _UringWriter(ring, fd)
+        chunk = []
+        size = 0
+        count = 0
+        for record in records:
+            line = json_utils.dumps(record) + b"\n"
+            chunk.append(line)
+            size += len(line)
+            count += 1
+            if size >= URING_CHUNK_SIZE:
+                writer.write(b"".join(chunk))
+                chunk.clear()
+                size = 0
+
+        if chunk:
+            writer.write(b"".join(chunk))
+        writer.drain()
+    finally:
+        os.close(fd)
+        liburing.io_uring_queue_exit(ring)
+
+    return count
+
+
+def _open_ring():
+    """Initialized ring, or None if io_uring is unavailable"""
+    if liburing is None:
+        return None
+
+    ring = liburing.Ring()
+    try:
+        liburing.io_uring_queue_init(URING_QUEUE_DEPTH, ring)
+    except OSError as e:
+        logger.debug(f"io_uring unavailable, using buffered writes: {e}")
+        return None
+    return ring
+
+
+class _UringWriter:
+    """Queue positioned writes on a ring and reap them a batch at a time"""
+
+    def __init__(self, ring, fd: int):
+        self.ring = ring
+        self.fd = fd
+        self.offset = 0
+        # Buffers must stay referenced until the kernel completes their writes
+        self.inflight: List[tuple] = []
+
+    def write(self, data: bytes) -> None:
+        """Queue data at the current end of the file"""
+        sqe = liburing.io_uring_get_sqe(self.ring)
+        if not sqe:  # submission queue full
+            self.drain()
+            sqe = liburing.io_uring_get_sqe(self.ring)
+
+        liburing.io_uring_prep_write(sqe, self.fd, data, offset=self.offset)
+        liburing.io_uring_sqe_set_data64(sqe, len(self.inflight))
+        self.inflight.append((data, self.offset))
+        self.offset += len(data)
+
+        if len(self.inflight) >= URING_QUEUE_DEPTH:
+            self.drain()
+
+    def drain(self) -> None:
+        """Submit queued writes and wait for all of them to complete"""
+        if not self.inflight:
+            return
+
+        liburing.io_uring_submit(self.ring)
+        cqe = liburing.Cqe()
+        for _ in range(len(self.inflight)):
+            liburing.io_uring_wait_cqe(self.ring, cqe)
+            entry = cqe[0]
+            written = entry.res
+            data, offset = self.inflight[liburing.io_uring_cqe_get_data64(entry)]
+            liburing.io_uring_cqe_seen(self.ring, entry)
+
+            if written < 0:
+                raise OSError(-written, os.strerror(-written))
+            while written < len(data):
+                # Short write: finish the rest synchronously
+                written += os.pwrite(self.fd, data[written:], offset + written)
+
+        self.inflight.clear()